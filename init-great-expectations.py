@@ -2,19 +2,26 @@
 """
 Script de inicialização do Great Expectations
 Executa automaticamente no container para configurar o ambiente
+
+A instalação (pip) só acontece com --instalar; sem a flag, a falta do pacote
+é reportada e o script termina com erro.
 """
 
+import argparse
 import os
 import sys
 import subprocess
 
-def install_great_expectations():
-    """Instala Great Expectations se não estiver disponível"""
+def install_great_expectations(instalar=False):
+    """Verifica o Great Expectations e, com instalar=True, instala se não estiver disponível"""
     try:
         import great_expectations as gx
         print(f"✅ Great Expectations já instalado: {gx.__version__}")
         return True
     except ImportError:
+        if not instalar:
+            print("❌ Great Expectations não instalado (use --instalar para instalar com pip)")
+            return False
         print("📦 Instalando Great Expectations...")
         try:
             subprocess.check_call([
@@ -50,9 +57,14 @@ def initialize_data_context():
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Configura o Great Expectations no container.")
+    parser.add_argument("--instalar", action="store_true",
+                        help="Instala great-expectations e sqlalchemy com pip se não estiverem disponíveis.")
+    args = parser.parse_args()
+
     print("🚀 Configurando Great Expectations...")
     
-    if install_great_expectations():
+    if install_great_expectations(args.instalar):
         initialize_data_context()
         print("✅ Great Expectations configurado com sucesso!")
     else:
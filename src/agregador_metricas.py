@@ -0,0 +1,127 @@
+"""
+Agregador de métricas de qualidade em uma única passada por dataset.
+
+As regras de alerta ficam em config/regras_alertas.json. Cada regra declara uma
+métrica sobre uma coluna e um limite:
+    taxa_nulos      fração de linhas com a coluna nula
+    taxa_regex      fração de linhas cujo valor casa com "padrao" (nulos não casam)
+    taxa_menor_que  fração de linhas com valor < "valor" (nulos não contam)
+
+O arquivo é lido em blocos apenas com as colunas usadas pelas regras; cada bloco
+atualiza os contadores de todas as métricas e os limites são avaliados no final.
+Métricas repetidas (mesma coluna, tipo e parâmetro) são calculadas uma só vez.
+"""
+
+import json
+import operator
+import os
+import re
+
+import numpy as np
+
+from armazenamento import ler_em_blocos
+from instrumentacao import contar
+from planos_tipos import aplicar_plano, tipos_leitura
+
+ARQUIVO_REGRAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'regras_alertas.json')
+TAMANHO_BLOCO = 1_000_000
+
+CONDICOES = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def carregar_regras(caminho=ARQUIVO_REGRAS):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _chave_metrica(regra):
+    return (regra['coluna'], regra['metrica'], regra.get('padrao', regra.get('valor')))
+
+
+def _contar_nulos(serie, parametro):
+    return int(serie.isna().sum())
+
+
+def _contar_regex(serie, padrao):
+    # object garante a semântica do módulo re (\w unicode) em qualquer backend de string
+    texto = serie.dropna().astype(str).astype(object)
+    return int(texto.str.contains(padrao, regex=True, na=False).sum())
+
+
+def _contar_menor_que(serie, valor):
+    return int(np.count_nonzero(serie.to_numpy(dtype='float64', na_value=np.nan) < valor))
+
+
+CONTADORES = {
+    'taxa_nulos': _contar_nulos,
+    'taxa_regex': _contar_regex,
+    'taxa_menor_que': _contar_menor_que,
+}
+
+
+class AgregadorMetricas:
+    """
+    Acumula, bloco a bloco, os contadores de todas as métricas das regras.
+    """
+
+    def __init__(self, regras):
+        self.regras = regras
+        self.metricas = {}
+        for regra in regras:
+            if regra['metrica'] not in CONTADORES:
+                raise ValueError(f"Métrica desconhecida na regra '{regra.get('nome')}': {regra['metrica']}")
+            chave = _chave_metrica(regra)
+            parametro = re.compile(regra['padrao']) if regra['metrica'] == 'taxa_regex' else regra.get('valor')
+            self.metricas[chave] = parametro
+        self.contagens = dict.fromkeys(self.metricas, 0)
+        self.linhas = 0
+
+    @property
+    def colunas(self):
+        return sorted({coluna for coluna, _, _ in self.metricas})
+
+    def atualizar(self, bloco):
+        for chave, parametro in self.metricas.items():
+            coluna, metrica, _ = chave
+            self.contagens[chave] += CONTADORES[metrica](bloco[coluna], parametro)
+        self.linhas += len(bloco)
+        return self
+
+    def resultado(self):
+        """
+        Retorna {nome_da_regra: taxa}; a taxa é NaN quando não há linhas.
+        """
+        valores = {}
+        for regra in self.regras:
+            contagem = self.contagens[_chave_metrica(regra)]
+            valores[regra['nome']] = contagem / self.linhas if self.linhas else float('nan')
+        return valores
+
+
+def calcular_metricas(path, regras, chunksize=TAMANHO_BLOCO, plano=None):
+    """
+    Calcula todas as métricas das regras em uma leitura do arquivo, aplicando a
+    cada bloco o plano de tipos do dataset (planos_tipos), se informado.
+    """
+    agregador = AgregadorMetricas(regras)
+    for bloco in ler_em_blocos(path, chunksize, colunas=agregador.colunas, dtype=tipos_leitura(plano) or None):
+        agregador.atualizar(aplicar_plano(bloco, plano))
+    contar('linhas_entrada', agregador.linhas)
+    return agregador.resultado()
+
+
+def avaliar_regras(regras, metricas):
+    """
+    Retorna as mensagens das regras cujo limite foi violado.
+    """
+    alertas = []
+    for regra in regras:
+        valor = metricas[regra['nome']]
+        if CONDICOES[regra['condicao']](valor, regra['limite']):
+            alertas.append(regra['mensagem'])
+    return alertas
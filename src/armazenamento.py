@@ -0,0 +1,509 @@
+"""
+Camada de armazenamento plugável para a troca de dados entre as etapas do pipeline.
+
+O formato é inferido pela extensão do arquivo:
+    .csv              -> texto (mantido como formato de exportação)
+    .parquet          -> Parquet colunar, tipado
+    .arrow / .feather -> Arrow IPC sem compressão, lido com memory map
+
+Arquivos CSV de origem podem vir comprimidos (.csv.gz ou .csv.zst); a
+descompressão é feita durante a leitura. Para zstd é usado o pacote zstandard
+ou, na falta dele, o codec do pyarrow.
+
+Parquet e Arrow preservam os tipos das colunas (datas, inteiros, categorias) entre
+as etapas e dependem do pyarrow, importado apenas quando necessário.
+
+Uma tabela Parquet/Arrow pode ser um diretório de partes (vendas.parquet/
+parte-000000.parquet, parte-000001.parquet, ...): é o que anexar_tabela produz,
+gravando cada anexo como uma parte nova em vez de regravar a tabela. As funções
+de leitura tratam o diretório como uma única tabela, na ordem das partes.
+
+Para ler um CSV sem compressão em lotes paralelos, lotes_csv localiza em uma
+única leitura sequencial os bytes onde cada lote começa (quebras de linha fora
+de aspas), e ler_intervalo com deslocamento lê cada lote direto do seu offset,
+sem reprocessar as linhas anteriores.
+"""
+
+import importlib.util
+import io
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+DIRETORIO_PROCESSADO = '../data/processed'
+
+EXTENSOES = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+}
+
+COMPRESSOES = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+}
+
+# Formato usado nos arquivos intermediários entre as etapas (csv, parquet ou arrow)
+FORMATO_INTERMEDIARIO = os.environ.get('DATAOPS_FORMATO', 'parquet')
+
+
+def _pyarrow(formato):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError(f"O formato '{formato}' requer o pacote pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+
+def compressao_do_caminho(caminho):
+    return COMPRESSOES.get(os.path.splitext(caminho)[1].lower())
+
+
+def formato_do_caminho(caminho):
+    base, extensao = os.path.splitext(caminho)
+    compressao = COMPRESSOES.get(extensao.lower())
+    if compressao:
+        extensao = os.path.splitext(base)[1]
+    extensao = extensao.lower()
+    if extensao not in EXTENSOES:
+        raise ValueError(f"Extensão não suportada para armazenamento: '{extensao}'")
+    if compressao and EXTENSOES[extensao] != 'csv':
+        raise ValueError(f"Compressão externa ({compressao}) só é suportada em arquivos csv: '{caminho}'")
+    return EXTENSOES[extensao]
+
+
+def _ler_csv(caminho, **kwargs):
+    """
+    pd.read_csv com descompressão pelo sufixo (.gz, .zst) do caminho.
+    """
+    if compressao_do_caminho(caminho) == 'zstd' and importlib.util.find_spec('zstandard') is None:
+        fonte = _pyarrow('csv.zst').input_stream(caminho, compression='zstd')
+        return pd.read_csv(fonte, **kwargs)
+    return pd.read_csv(caminho, **kwargs)
+
+
+def partes_tabela(caminho):
+    """
+    Arquivos que compõem a tabela: as partes, em ordem, quando caminho é um
+    diretório; senão o próprio caminho.
+    """
+    if not os.path.isdir(caminho):
+        return [caminho]
+    extensao = os.path.splitext(caminho)[1]
+    return sorted(os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                  if nome.startswith('parte-') and nome.endswith(extensao))
+
+
+def assinatura_tabela(caminho):
+    """
+    Tamanho total e mtime mais recente dos arquivos da tabela, para invalidar
+    caches quando ela muda (inclusive quando uma parte é anexada).
+    """
+    infos = [os.stat(parte) for parte in partes_tabela(caminho)]
+    mtimes = [info.st_mtime_ns for info in infos]
+    if os.path.isdir(caminho):
+        mtimes.append(os.stat(caminho).st_mtime_ns)
+    return {'tamanho': sum(info.st_size for info in infos), 'mtime_ns': max(mtimes)}
+
+
+def _ler_arrow(caminho, formato, colunas=None):
+    pa = _pyarrow(formato)
+    tabelas = []
+    for parte in partes_tabela(caminho):
+        if formato == 'parquet':
+            tabelas.append(pa.parquet.read_table(parte, columns=colunas, memory_map=True))
+        else:
+            tabelas.append(pa.feather.read_table(parte, columns=colunas, memory_map=True))
+    if len(tabelas) == 1:
+        return tabelas[0]
+    return pa.concat_tables(tabelas, promote_options='permissive')
+
+
+def caminho_processado(nome, formato=None, diretorio=DIRETORIO_PROCESSADO):
+    """
+    Monta o caminho de um arquivo intermediário, ex.: caminho_processado('vendas_corrigido').
+    """
+    formato = formato or FORMATO_INTERMEDIARIO
+    extensao = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}[formato]
+    return os.path.join(diretorio, nome + extensao)
+
+
+def ler_tabela(caminho, colunas=None, formato=None, **kwargs):
+    """
+    Lê uma tabela inteira. kwargs extras (ex.: dtype) são repassados ao
+    pd.read_csv no formato csv e ignorados nos formatos tipados.
+    """
+    formato = formato or formato_do_caminho(caminho)
+    if formato == 'csv':
+        return _ler_csv(caminho, usecols=colunas, **kwargs)
+    return _ler_arrow(caminho, formato, colunas).to_pandas()
+
+
+def ler_em_blocos(caminho, chunksize, colunas=None, formato=None, dtype=None):
+    """
+    Itera sobre a tabela em DataFrames de até chunksize linhas. dtype é repassado
+    ao pd.read_csv em CSV (Parquet e Arrow já guardam os tipos).
+
+    Sempre produz ao menos um bloco (possivelmente vazio) para que o esquema das
+    colunas chegue ao destino mesmo quando a entrada não tem linhas.
+    """
+    formato = formato or formato_do_caminho(caminho)
+    vazio = True
+    if formato == 'csv':
+        for bloco in _ler_csv(caminho, usecols=colunas, chunksize=chunksize, dtype=dtype):
+            vazio = False
+            yield bloco
+        if vazio:
+            yield _ler_csv(caminho, usecols=colunas, nrows=0, dtype=dtype)
+        return
+    pa = _pyarrow(formato)
+    vazia = None
+    for parte in partes_tabela(caminho):
+        if formato == 'parquet':
+            arquivo = pa.parquet.ParquetFile(parte, memory_map=True)
+            for lote in arquivo.iter_batches(batch_size=chunksize, columns=colunas):
+                vazio = False
+                yield lote.to_pandas()
+            vazia = arquivo.schema_arrow.empty_table() if vazia is None else vazia
+        else:
+            tabela = pa.feather.read_table(parte, columns=colunas, memory_map=True)
+            for inicio in range(0, tabela.num_rows, chunksize):
+                vazio = False
+                yield tabela.slice(inicio, chunksize).to_pandas()
+            vazia = tabela.slice(0, 0) if vazia is None else vazia
+    # partes vazias (ex.: a primeira de uma saída incremental) não encerram a leitura
+    if vazio and vazia is not None:
+        yield vazia.select(colunas or vazia.column_names).to_pandas()
+
+
+def contar_linhas(caminho, formato=None):
+    """
+    Número de linhas da tabela: lido dos metadados em Parquet/Arrow; em CSV
+    conta as linhas lendo só a primeira coluna (respeita campos entre aspas).
+    """
+    formato = formato or formato_do_caminho(caminho)
+    if formato == 'csv':
+        return sum(len(bloco) for bloco in _ler_csv(caminho, usecols=[0], chunksize=1_000_000))
+    pa = _pyarrow(formato)
+    total = 0
+    for parte in partes_tabela(caminho):
+        if formato == 'parquet':
+            total += pa.parquet.ParquetFile(parte, memory_map=True).metadata.num_rows
+        else:
+            with pa.memory_map(parte) as fonte:
+                leitor = pa.ipc.open_file(fonte)
+                total += sum(leitor.get_batch(i).num_rows for i in range(leitor.num_record_batches))
+    return total
+
+
+def lotes_csv(caminho, linhas_por_lote, tamanho_leitura=1 << 22):
+    """
+    Divide um CSV sem compressão em lotes de até linhas_por_lote registros,
+    retornados como (inicio, fim, (byte_inicio, byte_fim)), em uma leitura
+    sequencial. Um registro termina em uma quebra de linha com um número par de
+    aspas antes dela, então campos entre aspas com quebras de linha não são
+    cortados. Sempre há ao menos um lote (possivelmente vazio).
+    """
+    fronteiras, quebras_vistas, aspas, posicao = [], 0, 0, 0
+    ultimo = None
+    with open(caminho, 'rb') as arquivo:
+        while True:
+            dados = arquivo.read(tamanho_leitura)
+            if not dados:
+                break
+            buffer = np.frombuffer(dados, dtype=np.uint8)
+            e_aspa = buffer == ord('"')
+            # cumsum em uint8 dá a paridade correta mesmo com o estouro em 256
+            paridade = (np.cumsum(e_aspa, dtype=np.uint8) + np.uint8(aspas & 1)) & 1
+            fins = np.flatnonzero((buffer == ord('\n')) & (paridade == 0)) + posicao + 1
+            # a quebra 0 fecha o cabeçalho; a k-ésima seguinte fecha o registro k
+            indices = quebras_vistas + np.arange(len(fins))
+            fronteiras.extend(int(f) for f in fins[indices % linhas_por_lote == 0])
+            if len(fins):
+                ultimo = int(fins[-1])
+            quebras_vistas += len(fins)
+            aspas += int(np.count_nonzero(e_aspa))
+            posicao += len(dados)
+    tamanho = posicao
+    if not fronteiras:
+        return [(0, 0, (tamanho, tamanho))]
+    registros = max(quebras_vistas - 1, 0) + (1 if (ultimo or 0) < tamanho else 0)
+    if fronteiras[-1] < tamanho:
+        fronteiras.append(tamanho)
+    lotes = [(i * linhas_por_lote, min((i + 1) * linhas_por_lote, registros), (inicio, fim))
+             for i, (inicio, fim) in enumerate(zip(fronteiras, fronteiras[1:]))]
+    return lotes or [(0, 0, (tamanho, tamanho))]
+
+
+def _ler_csv_deslocamento(caminho, deslocamento, colunas):
+    cabecalho = _ler_csv(caminho, nrows=0)
+    inicio, fim = deslocamento
+    if fim <= inicio:
+        return _ler_csv(caminho, usecols=colunas, nrows=0)
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        dados = arquivo.read(fim - inicio)
+    return pd.read_csv(io.BytesIO(dados), header=None, names=list(cabecalho.columns), usecols=colunas)
+
+
+def ler_intervalo(caminho, inicio, fim, colunas=None, formato=None, deslocamento=None):
+    """
+    Lê as linhas [inicio, fim) da tabela. Em Parquet só os row groups que cobrem
+    o intervalo são lidos; em Arrow o intervalo é uma fatia do arquivo mapeado.
+    Em CSV, deslocamento é o (byte_inicio, byte_fim) do lote calculado por
+    lotes_csv; sem ele as linhas anteriores precisam ser lidas e descartadas
+    (caso dos CSVs comprimidos, que não permitem seek).
+    """
+    formato = formato or formato_do_caminho(caminho)
+    if formato == 'csv':
+        if deslocamento is not None:
+            return _ler_csv_deslocamento(caminho, deslocamento, colunas)
+        return _ler_csv(caminho, usecols=colunas, skiprows=range(1, inicio + 1), nrows=fim - inicio)
+    pa = _pyarrow(formato)
+    fatias, deslocamento, vazia = [], 0, None
+    for parte in partes_tabela(caminho):
+        if formato == 'parquet':
+            arquivo = pa.parquet.ParquetFile(parte, memory_map=True)
+            grupos, primeiro = [], None
+            for i in range(arquivo.metadata.num_row_groups):
+                linhas = arquivo.metadata.row_group(i).num_rows
+                if deslocamento < fim and deslocamento + linhas > inicio:
+                    grupos.append(i)
+                    primeiro = deslocamento if primeiro is None else primeiro
+                deslocamento += linhas
+            vazia = arquivo.schema_arrow.empty_table()
+            if grupos:
+                tabela = arquivo.read_row_groups(grupos, columns=colunas)
+                fatias.append(tabela.slice(max(inicio - primeiro, 0), fim - max(inicio, primeiro)))
+        else:
+            tabela = pa.feather.read_table(parte, columns=colunas, memory_map=True)
+            vazia = tabela.slice(0, 0)
+            if deslocamento < fim and deslocamento + tabela.num_rows > inicio:
+                fatias.append(tabela.slice(max(inicio - deslocamento, 0), fim - max(inicio, deslocamento)))
+            deslocamento += tabela.num_rows
+        if deslocamento >= fim:
+            break
+    if not fatias:
+        return vazia.select(colunas or vazia.column_names).to_pandas()
+    return pa.concat_tables(fatias, promote_options='permissive').to_pandas()
+
+
+def _criar_diretorio(caminho):
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+
+
+def _preparar_destino(caminho):
+    """
+    Cria o diretório pai e remove uma tabela em partes que ocupe o caminho,
+    já que a tabela será regravada como um arquivo único.
+    """
+    _criar_diretorio(caminho)
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho)
+
+
+def salvar_tabela(df, caminho, formato=None):
+    formato = formato or formato_do_caminho(caminho)
+    _preparar_destino(caminho)
+    if formato == 'csv':
+        df.to_csv(caminho, index=False)
+        return
+    pa = _pyarrow(formato)
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    if formato == 'parquet':
+        pa.parquet.write_table(tabela, caminho)
+    else:
+        # Sem compressão para permitir leitura zero-copy via memory map
+        pa.feather.write_feather(tabela, caminho, compression='uncompressed')
+
+
+def _proxima_parte(caminho):
+    """
+    Converte a tabela em arquivo único para um diretório de partes (a tabela
+    existente vira a parte 0, sem cópia) e devolve o caminho da próxima parte.
+    """
+    extensao = os.path.splitext(caminho)[1]
+    if not os.path.isdir(caminho):
+        temporario = caminho + '.convertendo'
+        os.replace(caminho, temporario)
+        os.makedirs(caminho)
+        os.replace(temporario, os.path.join(caminho, f'parte-000000{extensao}'))
+    partes = partes_tabela(caminho)
+    numero = int(os.path.basename(partes[-1])[len('parte-'):-len(extensao)]) + 1 if partes else 0
+    return os.path.join(caminho, f'parte-{numero:06d}{extensao}')
+
+
+def anexar_tabela(df, caminho, formato=None):
+    """
+    Anexa as linhas de df ao final de uma tabela existente.
+
+    Em CSV é uma escrita em modo append. Parquet e Arrow não permitem append no
+    mesmo arquivo: as linhas novas são gravadas como uma parte nova do diretório
+    da tabela (ver partes_tabela), então o custo depende só de len(df). Os tipos
+    são promovidos em relação à última parte quando necessário (int -> float,
+    coluna nula -> tipo da coluna).
+    """
+    formato = formato or formato_do_caminho(caminho)
+    if not os.path.exists(caminho):
+        salvar_tabela(df, caminho, formato)
+        return
+    if len(df) == 0:
+        return
+    if formato == 'csv':
+        colunas = pd.read_csv(caminho, nrows=0).columns
+        df[list(colunas)].to_csv(caminho, mode='a', header=False, index=False)
+        return
+    pa = _pyarrow(formato)
+    ultima = partes_tabela(caminho)[-1]
+    if formato == 'parquet':
+        esquema = pa.parquet.read_schema(ultima, memory_map=True)
+    else:
+        with pa.memory_map(ultima) as fonte:
+            esquema = pa.ipc.open_file(fonte).schema
+    novos = pa.Table.from_pandas(df[esquema.names], preserve_index=False)
+    novos = novos.cast(_unificar_esquemas(esquema, novos.schema))
+    parte = _proxima_parte(caminho)
+    temporario = os.path.join(os.path.dirname(parte), '.' + os.path.basename(parte) + '.tmp')
+    if formato == 'parquet':
+        pa.parquet.write_table(novos, temporario)
+    else:
+        pa.feather.write_feather(novos, temporario, compression='uncompressed')
+    os.replace(temporario, parte)
+
+
+def exportar_csv(caminho_origem, caminho_csv):
+    """
+    Exporta uma tabela intermediária (qualquer formato) para CSV.
+    """
+    salvar_tabela(ler_tabela(caminho_origem), caminho_csv, formato='csv')
+
+
+def _unificar_esquemas(atual, novo):
+    """
+    Esquema que acomoda atual e novo: cada coluna é promovida quando o pyarrow
+    sabe unir os tipos (coluna nula -> tipo, int -> float); senão fica com o
+    tipo de atual, para onde o bloco novo é convertido (texto -> categoria).
+    """
+    pa = _pyarrow('parquet')
+    campos = []
+    for campo in atual:
+        outro = novo.field(campo.name) if campo.name in novo.names else campo
+        try:
+            campos.append(pa.unify_schemas([pa.schema([campo]), pa.schema([outro])],
+                                           promote_options='permissive').field(0))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            campos.append(campo)
+    return _metadados_pandas(pa.schema(campos), [atual, novo])
+
+
+def _metadados_pandas(esquema, esquemas):
+    """
+    Metadados pandas do esquema unificado: cada coluna leva a descrição do
+    esquema de bloco em que ela já tinha o tipo final.
+    """
+    base, colunas = None, {}
+    for anterior in esquemas:
+        metadados = json.loads((anterior.metadata or {}).get(b'pandas', b'null'))
+        if not metadados:
+            continue
+        base = base or metadados
+        for coluna in metadados['columns']:
+            nome = coluna['field_name']
+            if nome in esquema.names and anterior.field(nome).type == esquema.field(nome).type:
+                colunas.setdefault(nome, coluna)
+    if base is None:
+        return esquema
+    base['columns'] = [colunas.get(coluna['field_name'], coluna) for coluna in base['columns']]
+    return esquema.with_metadata({b'pandas': json.dumps(base).encode()})
+
+
+class EscritorTabela:
+    """
+    Escreve uma tabela bloco a bloco, anexando cada DataFrame ao arquivo de destino.
+
+    Nos formatos colunares o esquema começa pelo do primeiro bloco não vazio.
+    Quando um bloco traz um tipo mais amplo (coluna toda nula no primeiro bloco,
+    int seguido de float) o esquema é promovido (_unificar_esquemas) e os blocos
+    já gravados são regravados uma vez com o novo esquema; valores que não cabem
+    no tipo da coluna (texto em coluna numérica) continuam sendo erro.
+    """
+
+    def __init__(self, caminho, formato=None):
+        self.caminho = caminho
+        self.formato = formato or formato_do_caminho(caminho)
+        self._iniciado = False
+        self._escritor = None
+        self._esquema = None
+        self._vazio = None
+        _preparar_destino(caminho)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _abrir(self, esquema):
+        pa = _pyarrow(self.formato)
+        self._esquema = esquema
+        if self.formato == 'parquet':
+            self._escritor = pa.parquet.ParquetWriter(self.caminho, esquema)
+        else:
+            self._escritor = pa.ipc.new_file(self.caminho, esquema)
+
+    def _lotes_gravados(self, caminho):
+        pa = _pyarrow(self.formato)
+        if self.formato == 'parquet':
+            yield from pa.parquet.ParquetFile(caminho).iter_batches()
+            return
+        with pa.memory_map(caminho) as origem:
+            leitor = pa.ipc.open_file(origem)
+            for i in range(leitor.num_record_batches):
+                yield leitor.get_batch(i)
+
+    def _promover(self, esquema):
+        """
+        Fecha o arquivo atual e o regrava, lote a lote, com o esquema promovido.
+        """
+        self._escritor.close()
+        anterior = self.caminho + '.promovendo'
+        os.replace(self.caminho, anterior)
+        try:
+            self._abrir(esquema)
+            for lote in self._lotes_gravados(anterior):
+                self._escritor.write_batch(lote.cast(esquema))
+        finally:
+            os.remove(anterior)
+
+    def escrever(self, df):
+        if self.formato == 'csv':
+            df.to_csv(self.caminho, mode='a' if self._iniciado else 'w', header=not self._iniciado, index=False)
+            self._iniciado = True
+            return
+        if len(df) == 0 and self._escritor is None:
+            self._vazio = df
+            return
+        pa = _pyarrow(self.formato)
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        if self._escritor is None:
+            self._abrir(tabela.schema)
+        elif not tabela.schema.equals(self._esquema):
+            esquema = _unificar_esquemas(self._esquema, tabela.schema)
+            if not esquema.remove_metadata().equals(self._esquema.remove_metadata()):
+                self._promover(esquema)
+            tabela = tabela.cast(self._esquema)
+        self._escritor.write_table(tabela)
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        elif self._vazio is not None:
+            salvar_tabela(self._vazio, self.caminho, self.formato)
+            self._vazio = None
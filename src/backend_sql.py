@@ -0,0 +1,574 @@
+"""
+Backend SQL (SQLite) para correção, validação e métricas de alertas.
+
+Com DATAOPS_BACKEND=sqlite os arquivos processados são carregados, bloco a
+bloco, em um banco SQLite local (../data/processed/dataops.sqlite, ou
+DATAOPS_BANCO_SQL), com índices nas colunas de id e de chave estrangeira
+(CHAVES). Cada arquivo vira uma tabela com o nome do arquivo e um hash do
+caminho absoluto (vendas.parquet -> vendas_<hash>, então o bruto e o processado
+de um dataset não dividem a tabela) e só é recarregado quando muda (tamanho ou
+mtime). A checagem da tabela e o uso dela acontecem na mesma transação
+(BEGIN IMMEDIATE), para que outro processo não a recarregue no meio. A partir
+daí o trabalho é feito pelo SQLite, sem trazer a tabela inteira para a memória:
+    correção    uma única passada CREATE TABLE ... AS SELECT com as mesmas
+                regras de correcao_automatica (CORRECOES): padronização de email
+                e telefone, preenchimento de vazios, limites mínimos, valor_total
+                e datas; depois DELETE das duplicatas (primeira ocorrência fica)
+                e das linhas cuja FK não existe na dimensão corrigida (NOT EXISTS
+                sobre o índice). A tabela corrigida é exportada em blocos para o
+                arquivo de saída, com os tipos pandas de origem restaurados
+                (inclusive a lista de categorias das colunas categóricas).
+    validação   todas as expectativas de uma suíte em um único SELECT de
+                agregados (SUM(CASE ...)); unicidade com GROUP BY ... HAVING e
+                integridade referencial com EXISTS na tabela de onde o índice de
+                chaves foi construído. O resultado tem o mesmo formato do
+                backend nativo (validacao_nativa).
+    alertas     as métricas de agregador_metricas em um único SELECT.
+Regex usa a função REGEXP registrada na conexão (módulo re, como o pandas), e
+as datas são formatadas por motor_datas só nos valores distintos de cada
+coluna, aplicados por uma tabela de mapeamento.
+
+Os parâmetros chunksize e incremental das etapas de correção não se aplicam a
+este backend: a memória já não depende do tamanho da tabela e a carga é pulada
+quando o arquivo de origem não mudou.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import COMPRESSOES, EXTENSOES, EscritorTabela, assinatura_tabela, ler_em_blocos
+from instrumentacao import contar, etapa
+from motor_datas import formatar_datas
+from validacao_nativa import KERNELS, MAX_EXEMPLOS, ValidadorNativo, expectativa_suportada
+
+BACKEND = os.environ.get('DATAOPS_BACKEND', 'pandas').lower()
+ARQUIVO_BANCO = os.environ.get('DATAOPS_BANCO_SQL', '../data/processed/dataops.sqlite')
+TAMANHO_BLOCO = 1_000_000
+# etapas paralelas do orquestrador escrevem no mesmo banco: a espera cobre a carga de uma tabela grande
+TEMPO_ESPERA_S = 600
+
+CHAVES = {
+    'clientes': ('id_cliente',),
+    'produtos': ('id_produto',),
+    'vendas': ('id_venda', 'id_cliente', 'id_produto'),
+    'logistica': ('id_entrega', 'id_venda'),
+}
+
+# Mesmas regras de correcao_automatica, aplicadas nesta ordem:
+# funcoes -> preencher -> minimos -> calculadas -> datas -> duplicatas -> fks
+CORRECOES = {
+    'clientes': {
+        'funcoes': {'email': 'padronizar_email', 'telefone': 'padronizar_telefone'},
+        'preencher': {'nome': 'Cliente Não Informado', 'email': 'email@naoinformado.com'},
+        'datas': ('data_nascimento', 'data_cadastro'),
+        'duplicatas': ('id_cliente', 'email'),
+    },
+    'produtos': {
+        'preencher': {'nome_produto': 'Produto Não Informado', 'categoria': 'Sem Categoria'},
+        'minimos': {'preco': 0.0, 'estoque': 0},
+        'datas': ('data_criacao',),
+        'duplicatas': ('id_produto', 'nome_produto'),
+    },
+    'vendas': {
+        'minimos': {'quantidade': 1, 'valor_unitario': 0.0},
+        'calculadas': {'valor_total': ('quantidade', 'valor_unitario')},
+        'datas': ('data_venda',),
+        'fks': {'id_cliente': 'clientes', 'id_produto': 'produtos'},
+    },
+    'logistica': {
+        'datas': ('data_envio', 'data_entrega_prevista', 'data_entrega_real'),
+        'fks': {'id_venda': 'vendas'},
+    },
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS _tabelas (
+    tabela TEXT PRIMARY KEY,
+    origem TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    tipos TEXT NOT NULL
+);
+"""
+
+
+@lru_cache(maxsize=256)
+def _regex(padrao):
+    return re.compile(padrao)
+
+
+def _regexp(padrao, valor):
+    if valor is None:
+        return None
+    return _regex(padrao).search(str(valor)) is not None
+
+
+def _padronizar_email(valor):
+    return "" if valor is None else str(valor).strip().lower()
+
+
+def _padronizar_telefone(valor):
+    if valor is None:
+        return ""
+    telefone = re.sub(r'\D', '', str(valor))
+    return telefone.zfill(11) if len(telefone) <= 11 else telefone[:11]
+
+
+FUNCOES = {
+    'padronizar_email': _padronizar_email,
+    'padronizar_telefone': _padronizar_telefone,
+}
+
+
+def conectar(banco=ARQUIVO_BANCO):
+    """
+    Conexão em autocommit (as transações são abertas com BEGIN IMMEDIATE), em
+    modo WAL, com REGEXP e as funções de padronização registradas.
+    """
+    os.makedirs(os.path.dirname(banco) or '.', exist_ok=True)
+    conexao = sqlite3.connect(banco, timeout=TEMPO_ESPERA_S, isolation_level=None)
+    conexao.execute('PRAGMA journal_mode=WAL')
+    conexao.create_function('REGEXP', 2, _regexp, deterministic=True)
+    for nome, funcao in FUNCOES.items():
+        conexao.create_function(nome, 1, funcao, deterministic=True)
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+
+def _q(nome):
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def nome_tabela(caminho):
+    """
+    Nome da tabela de um arquivo: o nome sem as extensões de formato e
+    compressão seguido do hash do caminho absoluto (clientes_<12 hex>).
+    """
+    nome = os.path.basename(caminho)
+    base, extensao = os.path.splitext(nome)
+    while extensao.lower() in EXTENSOES or extensao.lower() in COMPRESSOES:
+        nome = base
+        base, extensao = os.path.splitext(nome)
+    return f"{nome}_{hashlib.sha1(os.path.abspath(caminho).encode()).hexdigest()[:12]}"
+
+
+def _dataset(tabela):
+    return tabela.split('_', 1)[0]
+
+
+def _assinatura(caminho):
+    info = assinatura_tabela(caminho)
+    return os.path.abspath(caminho), info['tamanho'], info['mtime_ns']
+
+
+def _tipo_sql(serie):
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(serie):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _tipo_coluna(serie):
+    """
+    Tipo pandas da coluna para _tabelas.tipos; categorias são guardadas como a lista de categorias.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.categories.tolist()
+    return str(serie.dtype)
+
+
+def _valores(serie):
+    """
+    Valores Python da coluna para o sqlite3: datas como texto ISO, nulos como None.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        serie = serie.dt.strftime('%Y-%m-%d %H:%M:%S')
+    valores = serie.tolist()
+    for posicao in np.flatnonzero(serie.isna().to_numpy()):
+        valores[posicao] = None
+    return valores
+
+
+def _inserir(conexao, tabela, bloco):
+    if len(bloco) == 0:
+        return
+    marcadores = ', '.join('?' * len(bloco.columns))
+    linhas = zip(*(_valores(bloco[coluna]) for coluna in bloco.columns))
+    conexao.executemany(f"INSERT INTO {_q(tabela)} VALUES ({marcadores})", linhas)
+
+
+def _indexar(conexao, tabela, colunas):
+    existentes = {linha[1] for linha in conexao.execute(f"PRAGMA table_info({_q(tabela)})")}
+    for coluna in colunas:
+        if coluna in existentes:
+            conexao.execute(f"CREATE INDEX IF NOT EXISTS {_q(f'idx_{tabela}_{coluna}')} "
+                            f"ON {_q(tabela)} ({_q(coluna)})")
+
+
+def _registrar(conexao, tabela, caminho, tipos):
+    origem, tamanho, mtime_ns = _assinatura(caminho)
+    conexao.execute('INSERT OR REPLACE INTO _tabelas VALUES (?, ?, ?, ?, ?)',
+                    (tabela, origem, tamanho, mtime_ns, json.dumps(tipos)))
+
+
+def _atual(conexao, tabela, caminho):
+    linha = conexao.execute('SELECT origem, tamanho, mtime_ns FROM _tabelas WHERE tabela = ?', (tabela,)).fetchone()
+    return linha is not None and tuple(linha) == _assinatura(caminho)
+
+
+def tipos_tabela(conexao, tabela):
+    linha = conexao.execute('SELECT tipos FROM _tabelas WHERE tabela = ?', (tabela,)).fetchone()
+    return json.loads(linha[0]) if linha else {}
+
+
+@contextmanager
+def transacao(conexao):
+    """
+    Transação de escrita (BEGIN IMMEDIATE) com COMMIT no fim e ROLLBACK em erro;
+    dentro de uma transação já aberta na conexão não abre outra.
+    """
+    if conexao.in_transaction:
+        yield conexao
+        return
+    conexao.execute('BEGIN IMMEDIATE')
+    try:
+        yield conexao
+    except BaseException:
+        conexao.execute('ROLLBACK')
+        raise
+    conexao.execute('COMMIT')
+
+
+def garantir_tabela(conexao, caminho, plano=None, chunksize=TAMANHO_BLOCO):
+    """
+    Carrega caminho (aplicando o plano de tipos a cada bloco) na tabela de
+    nome_tabela(caminho), a menos que ela já tenha sido carregada desse arquivo
+    sem alterações. Retorna o nome da tabela. Quem usa a tabela depois deve
+    chamar dentro de transacao(conexao), que mantém a trava até o uso.
+    """
+    from planos_tipos import aplicar_plano
+
+    tabela = nome_tabela(caminho)
+    with transacao(conexao):
+        if _atual(conexao, tabela, caminho):
+            return tabela
+        logging.info(f"Carregando {caminho} na tabela SQL {tabela}.")
+        conexao.execute(f"DROP TABLE IF EXISTS {_q(tabela)}")
+        tipos = None
+        for bloco in ler_em_blocos(caminho, chunksize):
+            bloco = aplicar_plano(bloco, plano)
+            if tipos is None:
+                tipos = {coluna: _tipo_coluna(bloco[coluna]) for coluna in bloco.columns}
+                colunas = ', '.join(f"{_q(coluna)} {_tipo_sql(bloco[coluna])}" for coluna in bloco.columns)
+                conexao.execute(f"CREATE TABLE {_q(tabela)} ({colunas})")
+            else:
+                for coluna, tipo in tipos.items():
+                    if isinstance(tipo, list) and isinstance(bloco[coluna].dtype, pd.CategoricalDtype):
+                        tipo += [c for c in bloco[coluna].cat.categories.tolist() if c not in set(tipo)]
+            _inserir(conexao, tabela, bloco)
+        _indexar(conexao, tabela, CHAVES.get(_dataset(tabela), ()))
+        _registrar(conexao, tabela, caminho, tipos)
+    return tabela
+
+
+def _restaurar_tipos(bloco, tipos):
+    for coluna, tipo in tipos.items():
+        if coluna not in bloco.columns or tipo == 'str':
+            continue
+        if isinstance(tipo, list):
+            bloco[coluna] = bloco[coluna].astype(pd.CategoricalDtype(tipo))
+        elif tipo in ('boolean', 'string') or tipo.startswith('Int'):
+            bloco[coluna] = bloco[coluna].astype(tipo)
+        elif tipo in ('int64', 'float64') and str(bloco[coluna].dtype) != tipo and \
+                (tipo == 'float64' or not bloco[coluna].isna().any()):
+            bloco[coluna] = bloco[coluna].astype(tipo)
+    return bloco
+
+
+def exportar_tabela(conexao, tabela, caminho, chunksize=TAMANHO_BLOCO):
+    """
+    Grava a tabela em caminho (formato pela extensão), em blocos e na ordem de
+    inserção, e registra o arquivo como origem da tabela. Retorna o número de linhas.
+    """
+    tipos = tipos_tabela(conexao, tabela)
+    linhas = 0
+    with EscritorTabela(caminho) as escritor:
+        for bloco in pd.read_sql_query(f"SELECT * FROM {_q(tabela)} ORDER BY rowid", conexao, chunksize=chunksize):
+            escritor.escrever(_restaurar_tipos(bloco, tipos))
+            linhas += len(bloco)
+        if linhas == 0:
+            colunas = [linha[1] for linha in conexao.execute(f"PRAGMA table_info({_q(tabela)})")]
+            escritor.escrever(_restaurar_tipos(pd.DataFrame(columns=colunas), tipos))
+    _registrar(conexao, tabela, caminho, tipos)
+    return linhas
+
+
+def _mapear_datas(conexao, tabela, colunas):
+    """
+    Tabela temporária (coluna, valor, formatada) com as datas distintas de cada
+    coluna formatadas por motor_datas.formatar_datas.
+    """
+    conexao.execute('CREATE TEMP TABLE IF NOT EXISTS _mapa_datas (coluna TEXT, valor, formatada TEXT)')
+    conexao.execute('CREATE INDEX IF NOT EXISTS temp._idx_mapa_datas ON _mapa_datas (coluna, valor)')
+    conexao.execute('DELETE FROM _mapa_datas')
+    for coluna in colunas:
+        distintos = [valor for (valor,) in conexao.execute(f"SELECT DISTINCT {_q(coluna)} FROM {_q(tabela)}")]
+        formatadas = formatar_datas(pd.Series(distintos, dtype=object)).tolist()
+        conexao.executemany('INSERT INTO _mapa_datas VALUES (?, ?, ?)',
+                            ((coluna, valor, formatada) for valor, formatada in zip(distintos, formatadas)))
+
+
+def _expressao_correcao(coluna, regras):
+    expressao = f"t.{_q(coluna)}"
+    if coluna in regras.get('funcoes', {}):
+        expressao = f"{regras['funcoes'][coluna]}({expressao})"
+    if coluna in regras.get('preencher', {}):
+        expressao = f"COALESCE({expressao}, ?)"
+    if coluna in regras.get('minimos', {}):
+        expressao = f"CASE WHEN {expressao} < ? THEN ? ELSE {expressao} END"
+    if coluna in regras.get('calculadas', {}):
+        fatores = [_expressao_correcao(fator, regras) for fator in regras['calculadas'][coluna]]
+        expressao = ' * '.join(f"({fator})" for fator in fatores)
+    if coluna in regras.get('datas', ()):
+        expressao = f"(SELECT formatada FROM _mapa_datas WHERE coluna = ? AND valor IS {expressao})"
+    return expressao
+
+
+def _parametros_correcao(coluna, regras):
+    parametros = []
+    if coluna in regras.get('preencher', {}):
+        parametros.append(regras['preencher'][coluna])
+    if coluna in regras.get('minimos', {}):
+        parametros += [regras['minimos'][coluna]] * 2
+    if coluna in regras.get('calculadas', {}):
+        for fator in regras['calculadas'][coluna]:
+            parametros += _parametros_correcao(fator, regras)
+    if coluna in regras.get('datas', ()):
+        parametros.append(coluna)
+    return parametros
+
+
+def _tipos_corrigidos(tipos, regras):
+    tipos = dict(tipos)
+    for coluna in regras.get('funcoes', {}):
+        tipos[coluna] = 'str'
+    for coluna, valor in regras.get('preencher', {}).items():
+        if isinstance(tipos.get(coluna), list) and valor not in tipos[coluna]:
+            tipos[coluna] = tipos[coluna] + [valor]
+    for coluna, minimo in regras.get('minimos', {}).items():
+        tipos[coluna] = 'float64' if isinstance(minimo, float) else 'int64'
+    for coluna, fatores in regras.get('calculadas', {}).items():
+        tipos[coluna] = 'float64' if any(tipos.get(f) == 'float64' for f in fatores) else 'int64'
+    for coluna in regras.get('datas', ()):
+        tipos[coluna] = 'str'
+    return tipos
+
+
+def corrigir_sql(dataset, path_in, path_out, referencias=None, banco=None):
+    """
+    Corrige path_in no SQLite com as regras de CORRECOES[dataset] e grava path_out.
+    referencias: {coluna_fk: caminho da dimensão já corrigida}.
+    """
+    from planos_tipos import PLANOS
+
+    regras = CORRECOES[dataset]
+    conexao = conectar(banco or ARQUIVO_BANCO)
+    try:
+        # uma transação da carga das entradas até a exportação: nenhuma tabela muda no meio
+        with transacao(conexao):
+            origem = garantir_tabela(conexao, path_in, PLANOS.get(dataset))
+            dimensoes = {coluna: garantir_tabela(conexao, caminho) for coluna, caminho in (referencias or {}).items()}
+            destino = nome_tabela(path_out)
+            colunas = [linha[1] for linha in conexao.execute(f"PRAGMA table_info({_q(origem)})")]
+            entrada = conexao.execute(f"SELECT COUNT(*) FROM {_q(origem)}").fetchone()[0]
+            contar('linhas_entrada', entrada)
+
+            _mapear_datas(conexao, origem, [c for c in regras.get('datas', ()) if c in colunas])
+            selecao = ', '.join(f"{_expressao_correcao(c, regras)} AS {_q(c)}" for c in colunas)
+            parametros = [p for c in colunas for p in _parametros_correcao(c, regras)]
+            conexao.execute(f"DROP TABLE IF EXISTS {_q(destino)}")
+            conexao.execute(f"CREATE TABLE {_q(destino)} AS SELECT {selecao} FROM {_q(origem)} AS t ORDER BY t.rowid",
+                            parametros)
+            if regras.get('duplicatas'):
+                grupo = ', '.join(_q(c) for c in regras['duplicatas'])
+                removidas = conexao.execute(f"DELETE FROM {_q(destino)} WHERE rowid NOT IN "
+                                            f"(SELECT MIN(rowid) FROM {_q(destino)} GROUP BY {grupo})").rowcount
+                contar('removidas_duplicatas', removidas)
+                logging.info(f"Removidas {removidas} duplicatas.")
+            if dimensoes:
+                # IS: FK nula só é mantida se a dimensão também tem a chave nula, como no índice de chaves
+                faltando = ' OR '.join(f"NOT EXISTS (SELECT 1 FROM {_q(dimensao)} AS d "
+                                       f"WHERE d.{_q(coluna)} IS {_q(destino)}.{_q(coluna)})"
+                                       for coluna, dimensao in dimensoes.items())
+                contar('removidas_fk', conexao.execute(f"DELETE FROM {_q(destino)} WHERE {faltando}").rowcount)
+            _indexar(conexao, destino, CHAVES.get(dataset, ()))
+            # os tipos ficam registrados já aqui; exportar_tabela troca a origem pelo arquivo de saída
+            _registrar(conexao, destino, path_in, _tipos_corrigidos(tipos_tabela(conexao, origem), regras))
+            contar('linhas_saida', exportar_tabela(conexao, destino, path_out))
+    finally:
+        conexao.close()
+
+
+def _limite_sql(valor, tipo):
+    if valor is not None and tipo.startswith('datetime64'):
+        return pd.Timestamp(valor).strftime('%Y-%m-%d %H:%M:%S')
+    return valor
+
+
+def _inesperado(conexao, tabela, config, tipos):
+    """
+    (expressão SQL que vale 1 nas linhas inesperadas, parâmetros).
+    """
+    tipo, kwargs = config['expectation_type'], config['kwargs']
+    coluna = _q(kwargs['column'])
+    if tipo == 'expect_column_values_to_not_be_null':
+        return f"{coluna} IS NULL", []
+    if tipo == 'expect_column_values_to_match_regex':
+        _regex(kwargs['regex'])  # padrão inválido vira erro da expectativa, não da consulta
+        return f"NOT REGEXP(?, {coluna})", [kwargs['regex']]
+    if tipo == 'expect_column_values_to_be_between':
+        tipo_coluna = str(tipos.get(kwargs['column'], ''))
+        condicoes, parametros = [], []
+        for limite, estrito, maior in (('min_value', 'strict_min', True), ('max_value', 'strict_max', False)):
+            valor = _limite_sql(kwargs.get(limite), tipo_coluna)
+            if valor is not None:
+                operador = ('>' if maior else '<') + ('' if kwargs.get(estrito) else '=')
+                condicoes.append(f"{coluna} {operador} ?")
+                parametros.append(valor)
+        return (f"NOT ({' AND '.join(condicoes)})" if condicoes else "0"), parametros
+    if tipo == 'expect_column_values_to_be_in_set':
+        valores = list(kwargs['value_set'])
+        return f"{coluna} NOT IN ({', '.join('?' * len(valores))})", valores
+    if tipo == 'expect_column_values_to_be_close':
+        outras = kwargs['other']
+        referencia = ' * '.join(_q(outra) for outra in ([outras] if isinstance(outras, str) else outras))
+        return (f"NOT (abs({coluna} - ({referencia})) <= ? + ? * abs({referencia}))",
+                [kwargs.get('atol', 0.0), kwargs.get('rtol', 0.0)])
+    if tipo == 'expect_column_values_to_be_in_key_index':
+        dimensao, coluna_dimensao = _dimensao_do_indice(conexao, kwargs['indice'])
+        return (f"NOT EXISTS (SELECT 1 FROM {_q(dimensao)} AS d WHERE d.{_q(coluna_dimensao)} = t.{coluna})", [])
+    raise ValueError(f"Expectativa não suportada pelo backend SQL: {tipo}")
+
+
+def _dimensao_do_indice(conexao, indice):
+    """
+    Tabela e coluna de onde o índice de chaves foi construído (metadados do .npy).
+    """
+    from indice_chaves import IndiceChaves
+
+    metadados = IndiceChaves.metadados(indice)
+    if metadados is None:
+        raise ValueError(f"Índice de chaves sem metadados: {indice}")
+    return garantir_tabela(conexao, metadados['origem']['caminho']), metadados['coluna']
+
+
+def validar_tabela(conexao, tabela, suite, max_exemplos=MAX_EXEMPLOS):
+    """
+    Valida a tabela com a suíte; o resultado segue o formato do backend nativo.
+    Chamada dentro de transacao(conexao) quando a tabela vem de garantir_tabela.
+    """
+    validador = ValidadorNativo(suite, max_exemplos)
+    colunas = {linha[1] for linha in conexao.execute(f"PRAGMA table_info({_q(tabela)})")}
+    tipos = tipos_tabela(conexao, tabela)
+    agregados, parametros, avaliadas = ['COUNT(*)'], [], []
+    for config, estado in zip(validador.expectativas, validador.estados):
+        try:
+            if not expectativa_suportada(config):
+                raise ValueError(f"Expectativa não suportada pelo backend SQL: {config['expectation_type']}")
+            kwargs = config['kwargs']
+            if kwargs['column'] not in colunas:
+                raise KeyError(kwargs['column'])
+            coluna = _q(kwargs['column'])
+            ignora_nulos = KERNELS[config['expectation_type']][1]
+            if config['expectation_type'] == 'expect_column_values_to_be_unique':
+                condicao, extras = None, []
+            else:
+                condicao, extras = _inesperado(conexao, tabela, config, tipos)
+                if ignora_nulos:
+                    condicao = f"{coluna} IS NOT NULL AND ({condicao})"
+        except Exception as e:
+            estado['erro'] = repr(e)
+            continue
+        agregados.append(f"SUM({coluna} IS NULL)" if ignora_nulos else "0")
+        agregados.append(f"SUM(CASE WHEN {condicao} THEN 1 ELSE 0 END)" if condicao else "0")
+        parametros += extras
+        avaliadas.append((config, estado, condicao, extras))
+
+    with etapa(f"validar_{suite.get('expectation_suite_name', 'suite')}"):
+        totais = conexao.execute(f"SELECT {', '.join(agregados)} FROM {_q(tabela)} AS t", parametros).fetchone()
+        contar('linhas_entrada', totais[0])
+        for posicao, (config, estado, condicao, extras) in enumerate(avaliadas):
+            coluna = _q(config['kwargs']['column'])
+            estado['elementos'] = totais[0]
+            estado['ausentes'] = totais[1 + 2 * posicao] or 0
+            estado['inesperados'] = totais[2 + 2 * posicao] or 0
+            if condicao is None:
+                repetidos = conexao.execute(
+                    f"SELECT {coluna}, COUNT(*) FROM {_q(tabela)} WHERE {coluna} IS NOT NULL "
+                    f"GROUP BY {coluna} HAVING COUNT(*) > 1 ORDER BY MIN(rowid)").fetchall()
+                estado['contagens'] = [pd.Series([n for _, n in repetidos], index=[v for v, _ in repetidos],
+                                                 dtype='int64')]
+            elif estado['inesperados']:
+                estado['exemplos'] = [valor for (valor,) in conexao.execute(
+                    f"SELECT {coluna} FROM {_q(tabela)} AS t WHERE {condicao} ORDER BY t.rowid LIMIT ?",
+                    extras + [max_exemplos])]
+    resultado = validador.resultado()
+    resultado['meta']['backend'] = 'sqlite'
+    return resultado
+
+
+def validar_arquivo_sql(path, suite, banco=None):
+    """
+    Equivalente a validacao_nativa.validar_arquivo executado no SQLite.
+    """
+    conexao = conectar(banco or ARQUIVO_BANCO)
+    try:
+        with transacao(conexao):
+            return validar_tabela(conexao, garantir_tabela(conexao, path), suite)
+    finally:
+        conexao.close()
+
+
+def _contagem_metrica(metrica, coluna, parametro):
+    coluna = _q(coluna)
+    if metrica == 'taxa_nulos':
+        return f"SUM({coluna} IS NULL)", []
+    if metrica == 'taxa_regex':
+        return f"SUM(CASE WHEN {coluna} IS NOT NULL AND REGEXP(?, {coluna}) THEN 1 ELSE 0 END)", [parametro]
+    if metrica == 'taxa_menor_que':
+        return f"SUM(CASE WHEN {coluna} < ? THEN 1 ELSE 0 END)", [parametro]
+    raise ValueError(f"Métrica desconhecida: {metrica}")
+
+
+def calcular_metricas_sql(path, regras, banco=None):
+    """
+    Equivalente a agregador_metricas.calcular_metricas em uma consulta ao SQLite.
+    """
+    chaves = list(dict.fromkeys((r['coluna'], r['metrica'], r.get('padrao', r.get('valor'))) for r in regras))
+    agregados, parametros = ['COUNT(*)'], []
+    for coluna, metrica, parametro in chaves:
+        expressao, extras = _contagem_metrica(metrica, coluna, parametro)
+        agregados.append(expressao)
+        parametros += extras
+    conexao = conectar(banco or ARQUIVO_BANCO)
+    try:
+        with transacao(conexao):
+            tabela = garantir_tabela(conexao, path)
+            totais = conexao.execute(f"SELECT {', '.join(agregados)} FROM {_q(tabela)}", parametros).fetchone()
+    finally:
+        conexao.close()
+    linhas = totais[0]
+    contar('linhas_entrada', linhas)
+    contagens = dict(zip(chaves, (total or 0 for total in totais[1:])))
+    return {regra['nome']: contagens[(regra['coluna'], regra['metrica'], regra.get('padrao', regra.get('valor')))] / linhas
+            if linhas else float('nan') for regra in regras}
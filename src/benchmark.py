@@ -0,0 +1,383 @@
+"""
+Benchmark de escala das etapas do pipeline sobre dados sintéticos.
+
+Gera (ou reaproveita) os datasets de dados_sinteticos e executa cada etapa
+(ingestão com validação de schema, correções, enriquecimentos, suítes de
+expectativas com o backend nativo e alertas) em um processo próprio, criado do
+zero para a etapa: o pico de memória (ru_maxrss) medido no processo é só daquela
+etapa. Para cada etapa são registrados o tempo, as linhas de entrada e saída, as
+linhas por segundo e o pico de memória.
+
+Cada execução é anexada ao histórico (../data/benchmarks/historico.json) e
+comparada com a linha de base do mesmo cenário (tamanho, formato intermediário
+e tamanho de bloco) em ../data/benchmarks/baseline.json: uma etapa mais lenta ou
+com pico de memória acima da tolerância é marcada como regressão e o processo
+termina com código 1. --salvar-baseline grava a execução como nova linha de base.
+
+--inicializacao mede o tempo de inicialização da CLI (python dataops.py
+<subcomando> --help, mediana de processos novos) no cenário "inicializacao" do
+mesmo histórico; além da comparação com a linha de base, cada comando tem um
+limite absoluto em LIMITE_INICIALIZACAO_MS.
+
+Os arquivos da execução ficam em <trabalho> (padrão ../data/benchmarks/trabalho),
+incluindo os índices de chaves, para não tocar em data/processed nem no cache
+de índices do pipeline.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+DIRETORIO_BENCHMARKS = '../data/benchmarks'
+HISTORICO = os.path.join(DIRETORIO_BENCHMARKS, 'historico.json')
+BASELINE = os.path.join(DIRETORIO_BENCHMARKS, 'baseline.json')
+TOLERANCIA_TEMPO = 0.20
+TOLERANCIA_MEMORIA = 0.20
+# diferenças de tempo menores que isso são ruído, mesmo acima da tolerância relativa
+FOLGA_TEMPO_S = 0.5
+
+COMANDOS_INICIALIZACAO = ('--help', 'alerts --help', 'ingest --help', 'validate --help', 'docs --help')
+LIMITE_INICIALIZACAO_MS = {'alerts --help': 200}
+FOLGA_INICIALIZACAO_S = 0.02
+
+DATASETS = ('clientes', 'produtos', 'vendas', 'logistica')
+
+
+class EtapaBenchmark:
+    """
+    Etapa medida: função funcao do módulo modulo, com os caminhos de entrada e saída usados na contagem de linhas.
+    """
+
+    def __init__(self, nome, modulo, funcao, args=(), kwargs=None, entradas=(), saidas=()):
+        self.nome = nome
+        self.modulo = modulo
+        self.funcao = funcao
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.entradas = tuple(entradas)
+        self.saidas = tuple(saidas)
+
+
+def _pico_memoria_mb():
+    # VmHWM, do espaço de endereçamento do filho; o ru_maxrss de um processo
+    # criado por spawn herda, através do exec, o pico do processo do benchmark
+    from instrumentacao import pico_memoria_mb
+    return pico_memoria_mb()
+
+
+def _tempo_cpu():
+    tempos = os.times()
+    return tempos.user + tempos.system
+
+
+def _executar_medindo(etapa, ambiente, fila):
+    """
+    Roda no processo filho: importa o módulo, executa a etapa e devolve as medidas pela fila.
+    """
+    try:
+        os.environ.update(ambiente)
+        logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+        import importlib
+        funcao = getattr(importlib.import_module(etapa.modulo), etapa.funcao)
+        base = _pico_memoria_mb()
+        cpu, inicio = _tempo_cpu(), time.perf_counter()
+        funcao(*etapa.args, **etapa.kwargs)
+        duracao = time.perf_counter() - inicio
+        fila.put({'status': 'ok', 'tempo_s': duracao, 'cpu_s': _tempo_cpu() - cpu,
+                  'memoria_base_mb': base, 'pico_memoria_mb': _pico_memoria_mb()})
+    except BaseException as e:
+        fila.put({'status': 'erro', 'erro': repr(e)})
+
+
+def medir_etapa(etapa, ambiente=None):
+    """
+    Executa a etapa em um processo novo (spawn) e retorna tempo, CPU e pico de memória.
+    """
+    contexto = multiprocessing.get_context('spawn')
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar_medindo, args=(etapa, dict(ambiente or {}), fila))
+    processo.start()
+    try:
+        medidas = fila.get()
+    except KeyboardInterrupt:
+        processo.terminate()
+        raise
+    processo.join()
+    if processo.exitcode not in (0, None) and medidas.get('status') == 'ok':
+        medidas = {'status': 'erro', 'erro': f'processo terminou com código {processo.exitcode}'}
+    return medidas
+
+
+def _contar(caminhos, conhecidas):
+    from armazenamento import contar_linhas
+    total = 0
+    for caminho in caminhos:
+        if caminho in conhecidas:
+            total += conhecidas[caminho]
+        elif os.path.exists(caminho):
+            total += contar_linhas(caminho)
+        else:
+            return None
+    return total
+
+
+def validar_suite_sintetica(nome_suite, path, diretorio_indices, diretorio_suites=None):
+    """
+    Executa a suíte salva sobre os dados do benchmark, apontando as expectativas
+    de integridade referencial para os índices de chaves do próprio benchmark.
+    """
+    from backend_sql import BACKEND, validar_arquivo_sql
+    from validacao_nativa import DIRETORIO_SUITES, carregar_suite, validar_arquivo
+    suite = carregar_suite(nome_suite, diretorio_suites or DIRETORIO_SUITES)
+    for config in suite.get('expectations', []):
+        if config.get('expectation_type') == 'expect_column_values_to_be_in_key_index':
+            config['kwargs']['indice'] = os.path.join(diretorio_indices, os.path.basename(config['kwargs']['indice']))
+    return validar_arquivo_sql(path, suite) if BACKEND == 'sqlite' else validar_arquivo(path, suite)
+
+
+def etapas_benchmark(origem, trabalho, chunksize=None, formato=None, diretorio_suites=None):
+    """
+    Etapas do pipeline na ordem de dependência, lendo de origem (CSVs sintéticos)
+    e gravando em trabalho.
+    """
+    from armazenamento import caminho_processado
+    from validacao_nativa import DIRETORIO_SUITES
+
+    def p(nome):
+        return caminho_processado(nome, formato=formato, diretorio=trabalho)
+
+    brutos = [os.path.join(origem, f'{nome}.csv') for nome in DATASETS]
+    indices = os.path.join(trabalho, 'cache', 'chaves')
+    bloco = {'chunksize': chunksize}
+    etapas = [
+        EtapaBenchmark('ingestao', 'pipeline_ingestao', 'executar_ingestao', (origem,),
+                       {**bloco, 'diretorio_destino': trabalho}, brutos, [p(nome) for nome in DATASETS]),
+        EtapaBenchmark('corrigir_clientes', 'correcao_automatica', 'corrigir_clientes',
+                       (p('clientes'), p('clientes_corrigido')), bloco, [p('clientes')], [p('clientes_corrigido')]),
+        EtapaBenchmark('corrigir_produtos', 'correcao_automatica', 'corrigir_produtos',
+                       (p('produtos'), p('produtos_corrigido')), bloco, [p('produtos')], [p('produtos_corrigido')]),
+        EtapaBenchmark('corrigir_vendas', 'correcao_automatica', 'corrigir_vendas',
+                       (p('vendas'), p('vendas_corrigido'), p('clientes_corrigido'), p('produtos_corrigido')), bloco,
+                       [p('vendas')], [p('vendas_corrigido')]),
+        EtapaBenchmark('corrigir_logistica', 'correcao_automatica', 'corrigir_logistica',
+                       (p('logistica'), p('logistica_corrigido'), p('vendas_corrigido')), bloco,
+                       [p('logistica')], [p('logistica_corrigido')]),
+    ]
+    for nome in ('clientes', 'produtos', 'logistica'):
+        etapas.append(EtapaBenchmark(f'enriquecer_{nome}', 'enriquecimento_dados', f'enriquecer_{nome}',
+                                     (p(f'{nome}_corrigido'), p(f'{nome}_enriquecido')),
+                                     entradas=[p(f'{nome}_corrigido')], saidas=[p(f'{nome}_enriquecido')]))
+    for nome in DATASETS:
+        if os.path.exists(os.path.join(diretorio_suites or DIRETORIO_SUITES, f'{nome}_suite.json')):
+            etapas.append(EtapaBenchmark(f'validar_{nome}', 'benchmark', 'validar_suite_sintetica',
+                                         (f'{nome}_suite', p(f'{nome}_corrigido'), indices, diretorio_suites),
+                                         entradas=[p(f'{nome}_corrigido')]))
+        else:
+            logging.info(f"Suite {nome}_suite não encontrada; etapa validar_{nome} não será medida.")
+    for nome in ('clientes', 'produtos', 'vendas'):
+        etapas.append(EtapaBenchmark(f'alertas_{nome}', 'sistema_alertas', f'verificar_alertas_{nome}',
+                                     (p(f'{nome}_corrigido'),), entradas=[p(f'{nome}_corrigido')]))
+    return etapas
+
+
+def executar_benchmark(origem, trabalho, chunksize=None, formato=None, linhas_conhecidas=None,
+                       diretorio_suites=None, backend=None):
+    """
+    Mede todas as etapas em sequência; uma etapa que falha interrompe as seguintes.
+    """
+    os.makedirs(trabalho, exist_ok=True)
+    ambiente = {'DATAOPS_CACHE_CHAVES': os.path.abspath(os.path.join(trabalho, 'cache', 'chaves')),
+                'DATAOPS_METRICAS_ETAPAS': os.path.abspath(os.path.join(trabalho, 'metricas_etapas.jsonl')),
+                'DATAOPS_HISTORICO_METRICAS': os.path.abspath(os.path.join(trabalho, 'historico_metricas.sqlite')),
+                'DATAOPS_BANCO_SQL': os.path.abspath(os.path.join(trabalho, 'dataops.sqlite'))}
+    if formato:
+        ambiente['DATAOPS_FORMATO'] = formato
+    if backend:
+        ambiente['DATAOPS_BACKEND'] = backend
+    resultados = {}
+    for etapa in etapas_benchmark(origem, trabalho, chunksize, formato, diretorio_suites):
+        medidas = medir_etapa(etapa, ambiente)
+        if medidas['status'] != 'ok':
+            logging.error(f"Etapa {etapa.nome} falhou: {medidas['erro']}")
+            resultados[etapa.nome] = medidas
+            break
+        medidas['linhas_entrada'] = _contar(etapa.entradas, linhas_conhecidas or {})
+        medidas['linhas_saida'] = _contar(etapa.saidas, linhas_conhecidas or {}) if etapa.saidas else None
+        medidas['linhas_por_s'] = (medidas['linhas_entrada'] / medidas['tempo_s']
+                                   if medidas['linhas_entrada'] and medidas['tempo_s'] > 0 else None)
+        resultados[etapa.nome] = medidas
+        logging.info(f"{etapa.nome:<20} {medidas['tempo_s']:8.2f}s  {medidas['linhas_por_s'] or 0:12,.0f} linhas/s  "
+                     f"pico {medidas['pico_memoria_mb'] or 0:8.1f} MB")
+    return resultados
+
+
+def medir_inicializacao(comandos=COMANDOS_INICIALIZACAO, repeticoes=10):
+    """
+    Tempo de parede (mediana de repeticoes processos novos) de cada comando da CLI.
+    """
+    import statistics
+    import subprocess
+
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataops.py')
+    resultados = {}
+    for comando in comandos:
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            processo = subprocess.run([sys.executable, cli, *comando.split()], capture_output=True)
+            tempos.append(time.perf_counter() - inicio)
+        if processo.returncode != 0:
+            resultados[comando] = {'status': 'erro', 'erro': processo.stderr.decode(errors='replace')[-500:]}
+            continue
+        resultados[comando] = {'status': 'ok', 'tempo_s': statistics.median(tempos), 'tempo_max_s': max(tempos)}
+        logging.info(f"{comando:<20} {resultados[comando]['tempo_s'] * 1000:8.1f} ms")
+    return resultados
+
+
+def limites_excedidos(resultados, limites=LIMITE_INICIALIZACAO_MS):
+    return [{'etapa': comando, 'medida': 'tempo_s', 'baseline': limite / 1000,
+             'atual': resultados[comando]['tempo_s'], 'variacao': resultados[comando]['tempo_s'] * 1000 / limite - 1}
+            for comando, limite in limites.items()
+            if resultados.get(comando, {}).get('status') == 'ok' and resultados[comando]['tempo_s'] * 1000 > limite]
+
+
+def chave_cenario(vendas, formato, chunksize, backend=None):
+    cenario = f"{vendas}:{formato}:{chunksize or 'completo'}"
+    return f"{cenario}:{backend}" if backend and backend != 'pandas' else cenario
+
+
+def comparar_com_baseline(etapas, baseline, tolerancia_tempo=TOLERANCIA_TEMPO,
+                          tolerancia_memoria=TOLERANCIA_MEMORIA, folga_tempo_s=FOLGA_TEMPO_S):
+    """
+    Lista as regressões de tempo e de pico de memória de cada etapa em relação à linha de base.
+    """
+    regressoes = []
+    for nome, atual in etapas.items():
+        base = (baseline or {}).get(nome)
+        if not base or atual.get('status') != 'ok':
+            continue
+        tempo, tempo_base = atual['tempo_s'], base['tempo_s']
+        if tempo > tempo_base * (1 + tolerancia_tempo) and tempo - tempo_base > folga_tempo_s:
+            regressoes.append({'etapa': nome, 'medida': 'tempo_s', 'baseline': tempo_base, 'atual': tempo,
+                               'variacao': tempo / tempo_base - 1})
+        memoria, memoria_base = atual.get('pico_memoria_mb'), base.get('pico_memoria_mb')
+        if memoria and memoria_base and memoria > memoria_base * (1 + tolerancia_memoria):
+            regressoes.append({'etapa': nome, 'medida': 'pico_memoria_mb', 'baseline': memoria_base,
+                               'atual': memoria, 'variacao': memoria / memoria_base - 1})
+    return regressoes
+
+
+def _ler_json(caminho, padrao):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _gravar_json(dados, caminho):
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def registrar_execucao(execucao, historico=HISTORICO, baseline=BASELINE, salvar_baseline=False,
+                       tolerancia_tempo=TOLERANCIA_TEMPO, tolerancia_memoria=TOLERANCIA_MEMORIA,
+                       folga_tempo_s=FOLGA_TEMPO_S):
+    """
+    Compara a execução com a linha de base do cenário, anexa ao histórico e,
+    se pedido, grava a execução como nova linha de base. Retorna as regressões.
+    """
+    linhas_base = _ler_json(baseline, {})
+    cenario = execucao['cenario']
+    execucao['regressoes'] = comparar_com_baseline(execucao['etapas'], linhas_base.get(cenario, {}).get('etapas'),
+                                                   tolerancia_tempo, tolerancia_memoria, folga_tempo_s)
+    execucao['regressoes'] += execucao.pop('limites_excedidos', [])
+    execucoes = _ler_json(historico, [])
+    execucoes.append(execucao)
+    _gravar_json(execucoes, historico)
+    if salvar_baseline:
+        linhas_base[cenario] = {'data': execucao['data'], 'etapas': execucao['etapas']}
+        _gravar_json(linhas_base, baseline)
+        logging.info(f"Linha de base do cenário {cenario} atualizada.")
+    for regressao in execucao['regressoes']:
+        logging.warning(f"Regressão em {regressao['etapa']} ({regressao['medida']}): {regressao['baseline']:.2f} -> "
+                        f"{regressao['atual']:.2f} ({regressao['variacao']:+.0%})")
+    return execucao['regressoes']
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Mede tempo, vazão e pico de memória de cada etapa do pipeline.")
+    parser.add_argument("--tamanho", default="1M", help="Número de vendas sintéticas (ex.: 1M, 10M, 100M).")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--origem", default=None,
+                        help="Diretório com os CSVs sintéticos (padrão ../data/sinteticos/<tamanho>; gerado se faltar).")
+    parser.add_argument("--trabalho", default=os.path.join(DIRETORIO_BENCHMARKS, 'trabalho'))
+    parser.add_argument("--tamanho-bloco", type=int, default=None,
+                        help="Ingestão e correção em blocos de N linhas (necessário nos tamanhos maiores).")
+    parser.add_argument("--formato", default=None, choices=["csv", "parquet", "arrow"],
+                        help="Formato intermediário (padrão DATAOPS_FORMATO).")
+    parser.add_argument("--backend", default=None, choices=["pandas", "sqlite"],
+                        help="Backend de correção, validação e alertas (padrão DATAOPS_BACKEND).")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava esta execução como linha de base.")
+    parser.add_argument("--tolerancia-tempo", type=float, default=TOLERANCIA_TEMPO)
+    parser.add_argument("--tolerancia-memoria", type=float, default=TOLERANCIA_MEMORIA)
+    parser.add_argument("--inicializacao", action="store_true",
+                        help="Mede apenas o tempo de inicialização da CLI (dataops.py <subcomando> --help).")
+    parser.add_argument("--repeticoes", type=int, default=10, help="Processos por comando em --inicializacao.")
+    args = parser.parse_args()
+
+    ambiente = {'python': platform.python_version(), 'plataforma': platform.platform(), 'cpus': os.cpu_count()}
+    if args.inicializacao:
+        comandos = medir_inicializacao(repeticoes=args.repeticoes)
+        execucao = {
+            'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'cenario': 'inicializacao',
+            'ambiente': ambiente,
+            'etapas': comandos,
+            'limites_excedidos': limites_excedidos(comandos),
+        }
+        regressoes = registrar_execucao(execucao, salvar_baseline=args.salvar_baseline,
+                                        tolerancia_tempo=args.tolerancia_tempo,
+                                        folga_tempo_s=FOLGA_INICIALIZACAO_S)
+        falhou = any(medidas['status'] != 'ok' for medidas in comandos.values())
+        raise SystemExit(1 if regressoes or falhou else 0)
+
+    from armazenamento import FORMATO_INTERMEDIARIO
+    from dados_sinteticos import gerar_datasets, interpretar_tamanho
+
+    origem = args.origem or os.path.join('../data/sinteticos', args.tamanho)
+    manifesto = _ler_json(os.path.join(origem, 'manifesto.json'), None)
+    if manifesto is None or manifesto['semente'] != args.semente or manifesto['vendas'] != interpretar_tamanho(args.tamanho):
+        manifesto = gerar_datasets(origem, args.tamanho, args.semente)
+    linhas_conhecidas = {os.path.join(origem, f'{nome}.csv'): total for nome, total in manifesto['linhas'].items()}
+
+    formato = args.formato or FORMATO_INTERMEDIARIO
+    backend = args.backend or os.environ.get('DATAOPS_BACKEND', 'pandas')
+    etapas = executar_benchmark(origem, args.trabalho, args.tamanho_bloco, formato, linhas_conhecidas,
+                                backend=backend)
+    execucao = {
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'cenario': chave_cenario(manifesto['vendas'], formato, args.tamanho_bloco, backend),
+        'vendas': manifesto['vendas'],
+        'semente': manifesto['semente'],
+        'linhas': manifesto['linhas'],
+        'formato': formato,
+        'tamanho_bloco': args.tamanho_bloco,
+        'backend': backend,
+        'ambiente': ambiente,
+        'etapas': etapas,
+    }
+    regressoes = registrar_execucao(execucao, salvar_baseline=args.salvar_baseline,
+                                    tolerancia_tempo=args.tolerancia_tempo,
+                                    tolerancia_memoria=args.tolerancia_memoria)
+    falhou = any(medidas['status'] != 'ok' for medidas in etapas.values())
+    raise SystemExit(1 if regressoes or falhou else 0)
@@ -0,0 +1,189 @@
+"""
+Carregador de tabelas com cache, compartilhado pelos módulos do pipeline.
+
+carregar_tabela lê um arquivo (csv, parquet ou arrow, via armazenamento) uma única
+vez por processo. Os DataFrames ficam em um cache LRU em memória cuja chave é
+o caminho, o mtime/tamanho do arquivo, o plano de tipos (dtypes, ver
+planos_tipos) e as colunas, então um arquivo alterado nunca é servido do cache.
+O total em memória é limitado por DATAOPS_CACHE_MB (padrão 1024); ao passar do
+limite, as tabelas usadas há mais tempo são descartadas.
+
+Para fontes CSV há ainda um cache em disco opcional (../data/cache/tabelas, em
+feather quando o pyarrow está disponível, senão pickle), que evita o parse do
+texto em processos seguintes. Parquet e Arrow já são binários e não passam pelo
+cache em disco.
+
+Quem recebe a tabela pode modificá-la livremente: cada chamada devolve uma cópia
+(rasa com copy-on-write no pandas 3, profunda nas versões anteriores).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from armazenamento import assinatura_tabela, formato_do_caminho, ler_tabela
+from planos_tipos import aplicar_plano, tipos_leitura
+
+DIRETORIO_CACHE = '../data/cache/tabelas'
+LIMITE_MEMORIA = int(os.environ.get('DATAOPS_CACHE_MB', '1024')) * 1024 * 1024
+CACHE_DISCO = os.environ.get('DATAOPS_CACHE_DISCO') == '1'
+
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+
+def _normalizar_dtypes(dtypes):
+    if not dtypes:
+        return ()
+    return tuple(sorted((coluna, str(tipo)) for coluna, tipo in dtypes.items()))
+
+
+def _chave(caminho, dtypes, colunas):
+    info = assinatura_tabela(caminho)
+    return (os.path.abspath(caminho), info['mtime_ns'], info['tamanho'], _normalizar_dtypes(dtypes),
+            tuple(colunas) if colunas is not None else None)
+
+
+def _copia(df):
+    return df.copy(deep=not _COPY_ON_WRITE)
+
+
+class CacheTabelas:
+    """
+    Cache LRU de DataFrames limitado pelo total de bytes em memória.
+    """
+
+    def __init__(self, limite_bytes=LIMITE_MEMORIA):
+        self.limite_bytes = limite_bytes
+        self._tabelas = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def __len__(self):
+        return len(self._tabelas)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def obter(self, chave):
+        with self._trava:
+            if chave not in self._tabelas:
+                return None
+            self._tabelas.move_to_end(chave)
+            return self._tabelas[chave][0]
+
+    def guardar(self, chave, df):
+        tamanho = int(df.memory_usage(deep=True, index=True).sum())
+        if tamanho > self.limite_bytes:
+            return
+        with self._trava:
+            # versões antigas do mesmo arquivo não serão mais pedidas
+            for antiga in [c for c in self._tabelas if c[0] == chave[0] and c[1:3] != chave[1:3]]:
+                self._remover(antiga)
+            if chave in self._tabelas:
+                self._remover(chave)
+            self._tabelas[chave] = (df, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.limite_bytes:
+                self._remover(next(iter(self._tabelas)))
+
+    def _remover(self, chave):
+        _, tamanho = self._tabelas.pop(chave)
+        self._bytes -= tamanho
+
+    def invalidar(self, caminho=None):
+        with self._trava:
+            alvo = os.path.abspath(caminho) if caminho is not None else None
+            for chave in [c for c in self._tabelas if alvo is None or c[0] == alvo]:
+                self._remover(chave)
+
+
+CACHE = CacheTabelas()
+
+
+def _arquivo_cache_disco(chave, diretorio):
+    resumo = hashlib.sha256(json.dumps(chave, default=str).encode('utf-8')).hexdigest()[:32]
+    try:
+        import pyarrow  # noqa: F401
+        extensao = '.feather'
+    except ImportError:
+        extensao = '.pkl'
+    return os.path.join(diretorio, resumo + extensao)
+
+
+def _ler_cache_disco(arquivo):
+    if not os.path.exists(arquivo):
+        return None
+    try:
+        if arquivo.endswith('.feather'):
+            return ler_tabela(arquivo)
+        return pd.read_pickle(arquivo)
+    except Exception as e:
+        logging.warning(f"Cache em disco ilegível ({arquivo}), relendo a origem: {e}")
+        return None
+
+
+def _gravar_cache_disco(df, arquivo):
+    try:
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        temporario = f"{arquivo}.{os.getpid()}.tmp"
+        if arquivo.endswith('.feather'):
+            df.reset_index(drop=True).to_feather(temporario)
+        else:
+            df.to_pickle(temporario)
+        os.replace(temporario, arquivo)
+    except Exception as e:
+        logging.warning(f"Não foi possível gravar o cache em disco {arquivo}: {e}")
+
+
+def _ler_origem(caminho, dtypes, colunas):
+    # texto, categorias e datas (como texto) já saem tipados do read_csv; o
+    # restante do plano (inteiros, booleanos, datas) é aplicado sobre o resultado
+    df = ler_tabela(caminho, colunas=colunas, dtype=tipos_leitura(dtypes) or None)
+    return aplicar_plano(df, dtypes) if dtypes else df
+
+
+def carregar_tabela(caminho, dtypes=None, colunas=None, cache_disco=None, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Lê caminho aplicando o plano de tipos dtypes ({coluna: tipo}) e apenas as colunas
+    pedidas, servindo do cache do processo (ou do cache em disco, em CSV) quando
+    o arquivo não mudou. Sempre devolve uma cópia que pode ser modificada.
+    """
+    chave = _chave(caminho, dtypes, colunas)
+    df = CACHE.obter(chave)
+    if df is None and colunas is not None:
+        completa = CACHE.obter(chave[:4] + (None,))
+        if completa is not None:
+            df = completa[list(colunas)]
+    if df is not None:
+        CACHE.acertos += 1
+        return _copia(df)
+
+    CACHE.falhas += 1
+    usar_disco = (CACHE_DISCO if cache_disco is None else cache_disco) and formato_do_caminho(caminho) == 'csv'
+    arquivo = _arquivo_cache_disco(chave, diretorio_cache) if usar_disco else None
+    df = _ler_cache_disco(arquivo) if usar_disco else None
+    if df is None:
+        df = _ler_origem(caminho, dtypes, colunas)
+        if usar_disco:
+            _gravar_cache_disco(df, arquivo)
+    CACHE.guardar(chave, df)
+    return _copia(df)
+
+
+def invalidar(caminho=None, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Descarta do cache em memória as tabelas de caminho (todas, se None). Sem
+    caminho, o cache em disco também é apagado.
+    """
+    CACHE.invalidar(caminho)
+    if caminho is None and os.path.isdir(diretorio_cache):
+        for nome in os.listdir(diretorio_cache):
+            os.remove(os.path.join(diretorio_cache, nome))
@@ -0,0 +1,115 @@
+"""
+Categorização de produtos por palavras-chave declaradas em config/categorias.json.
+
+Cada regra associa uma lista de palavras a uma categoria e a uma prioridade
+(menor vence; sem prioridade vale a ordem do arquivo). Todas as palavras são
+normalizadas (sem acentos, casefold) e compiladas em uma única expressão
+regular de alternância organizada como trie (prefixos comuns fatorados), então
+o custo por nome praticamente não cresce com o número de regras. A alternância
+fica dentro de um lookahead para encontrar as ocorrências em todas as posições,
+inclusive sobrepostas, e a de maior prioridade define a categoria.
+
+A categorização roda apenas sobre os nomes distintos da coluna; o resultado é
+mapeado de volta para as linhas pelos códigos do factorize.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from normalizacao_texto import normalizar_nomes
+
+ARQUIVO_CATEGORIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'categorias.json')
+
+
+def carregar_categorias(caminho=ARQUIVO_CATEGORIAS):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _regex_trie(palavras):
+    """
+    Monta uma alternância equivalente a palavra1|palavra2|... com os prefixos
+    comuns fatorados; em cada posição ela casa a palavra mais longa possível.
+    """
+    trie = {}
+    for palavra in palavras:
+        no = trie
+        for caractere in palavra:
+            no = no.setdefault(caractere, {})
+        no[''] = True
+
+    def montar(no):
+        ramos = [re.escape(c) + montar(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ''
+        corpo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+        if '' in no:
+            return '(?:' + corpo + ')?'
+        return corpo
+
+    return montar(trie)
+
+
+class CategorizadorProdutos:
+    """
+    Regras compiladas: padrao é a regex única e palavras mapeia cada palavra
+    normalizada para (prioridade, ordem, categoria) da regra que ela aciona.
+
+    Como a regex devolve só a palavra mais longa que começa em cada posição,
+    melhores guarda para cada palavra a melhor regra entre ela e as palavras
+    que são seus prefixos (que também ocorrem ali).
+    """
+
+    def __init__(self, configuracao):
+        self.categoria_padrao = configuracao.get('padrao', 'Outros')
+        self.palavras = {}
+        for ordem, regra in enumerate(configuracao['regras']):
+            if not regra.get('palavras'):
+                raise ValueError(f"Regra de categoria sem palavras-chave: {regra.get('categoria')}")
+            prioridade = regra.get('prioridade', ordem)
+            normalizadas = normalizar_nomes(pd.Series(regra['palavras'], dtype=object))
+            for palavra in normalizadas:
+                candidata = (prioridade, ordem, regra['categoria'])
+                if palavra and (palavra not in self.palavras or candidata < self.palavras[palavra]):
+                    self.palavras[palavra] = candidata
+        self.melhores = {
+            palavra: min(self.palavras[palavra[:i]] for i in range(1, len(palavra) + 1) if palavra[:i] in self.palavras)
+            for palavra in self.palavras
+        }
+        self.padrao = re.compile('(?=(' + _regex_trie(self.palavras) + '))') if self.palavras else None
+
+    def categoria(self, nome_normalizado):
+        if self.padrao is None:
+            return self.categoria_padrao
+        encontradas = self.padrao.findall(nome_normalizado)
+        if not encontradas:
+            return self.categoria_padrao
+        return min(self.melhores[palavra] for palavra in encontradas)[2]
+
+    def categorizar(self, serie):
+        """
+        Categoriza uma coluna de nomes avaliando cada nome distinto uma única vez.
+        """
+        codigos, unicos = pd.factorize(serie)
+        normalizados = normalizar_nomes(pd.Series(unicos, dtype=object))
+        categorias = np.array([self.categoria(nome) for nome in normalizados] + [self.categoria_padrao], dtype=object)
+        # código -1 (nome nulo) aponta para a última posição, a categoria padrão
+        return pd.Series(categorias[codigos], index=serie.index, name=serie.name)
+
+
+@lru_cache(maxsize=None)
+def categorizador_produtos(caminho=ARQUIVO_CATEGORIAS):
+    return CategorizadorProdutos(carregar_categorias(caminho))
+
+
+def categorizar_produtos(serie):
+    return categorizador_produtos().categorizar(serie)
+
+
+def categorizar_produto(nome):
+    return categorizar_produtos(pd.Series([nome], dtype=object)).iloc[0]
@@ -0,0 +1,71 @@
+"""
+Conjunto compacto de chaves em hash (uint64) para deduplicação entre blocos.
+
+Guarda 8 bytes por chave distinta em vez das linhas originais, o que permite
+aplicar drop_duplicates de forma correta em arquivos processados em blocos.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def hash_chaves(df, subset):
+    """
+    Calcula um hash uint64 por linha para as colunas de subset.
+
+    Colunas numéricas são normalizadas para float64 e as demais para object, de modo
+    que o mesmo valor gere o mesmo hash mesmo quando o pandas infere tipos diferentes
+    em blocos diferentes (ex.: int64 em um bloco e float64 em outro com nulos, ou
+    texto em object, string Arrow ou categoria).
+    """
+    chaves = {}
+    for coluna in subset:
+        serie = df[coluna]
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            chaves[coluna] = serie.astype('float64')
+        else:
+            # nulos normalizados para NaN: None, pd.NA e NaN geram o mesmo hash
+            chaves[coluna] = serie.astype(object).where(serie.notna(), np.nan)
+    return pd.util.hash_pandas_object(pd.DataFrame(chaves), index=False).to_numpy()
+
+
+class ConjuntoChavesHash:
+    """
+    Conjunto de hashes mantido como poucas execuções ordenadas de numpy.
+
+    Novas chaves entram como uma execução ordenada; execuções de tamanho parecido
+    são fundidas (esquema logarítmico), então há O(log n) execuções para consultar
+    com searchsorted e o custo total de inserção é O(n log n).
+    """
+
+    def __init__(self):
+        self._execucoes = []
+
+    def __len__(self):
+        return sum(len(execucao) for execucao in self._execucoes)
+
+    def contem(self, hashes):
+        encontrados = np.zeros(len(hashes), dtype=bool)
+        for execucao in self._execucoes:
+            posicoes = np.searchsorted(execucao, hashes)
+            posicoes[posicoes == len(execucao)] = 0
+            encontrados |= execucao[posicoes] == hashes
+        return encontrados
+
+    def adicionar(self, hashes):
+        nova = np.unique(hashes)
+        while self._execucoes and len(self._execucoes[-1]) <= 2 * len(nova):
+            nova = np.union1d(self._execucoes.pop(), nova)
+        if len(nova):
+            self._execucoes.append(nova)
+
+    def filtrar_novos(self, hashes):
+        """
+        Retorna a máscara das linhas cuja chave ainda não foi vista (primeira
+        ocorrência, como drop_duplicates keep='first') e registra essas chaves.
+        """
+        novos = ~pd.Series(hashes).duplicated().to_numpy()
+        if self._execucoes:
+            novos &= ~self.contem(hashes)
+        self.adicionar(hashes[novos])
+        return novos
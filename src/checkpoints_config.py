@@ -1,8 +1,35 @@
+"""
+Checkpoints de validação.
+
+criar_checkpoint registra um SimpleCheckpoint do Great Expectations.
+executar_checkpoints valida todas as suítes de uma vez com o backend nativo
+(validacao_nativa): cada arquivo é dividido em lotes de linhas contíguas que
+são validados em paralelo em um pool de processos, e os estados parciais de
+cada suíte são combinados em ordem em um único resultado. Em CSV sem compressão
+os lotes são delimitados por offsets de bytes (armazenamento.lotes_csv) e cada
+processo lê o seu lote direto do offset. Como o estado é feito
+de contagens (e das contagens de valores, para unicidade), unexpected_percent,
+missing_count e o sucesso com mostly saem iguais aos de uma validação única.
+Com DATAOPS_BACKEND=sqlite cada suíte é validada inteira no SQLite
+(backend_sql.validar_arquivo_sql), sem lotes: a consulta de agregados já não
+traz a tabela para a memória.
+"""
+
+import argparse
+import json
 import os
 import logging
-from great_expectations.data_context import DataContext
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from armazenamento import caminho_processado, compressao_do_caminho, contar_linhas, formato_do_caminho, ler_intervalo, lotes_csv
+from carregador import carregar_tabela
+from instrumentacao import contar, instrumentar
+from validacao_nativa import ValidadorNativo, carregar_suite
+
+DATASETS = ('clientes', 'produtos', 'vendas', 'logistica')
+LINHAS_POR_LOTE = 250_000
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 def criar_checkpoint(context, checkpoint_name, suite_name, batch_request):
     """
@@ -23,23 +50,151 @@ def criar_checkpoint(context, checkpoint_name, suite_name, batch_request):
     context.add_checkpoint(**checkpoint_config)
     logging.info(f"Checkpoint '{checkpoint_name}' criado para suite '{suite_name}'.")
 
-if __name__ == "__main__":
-    ge_root = os.path.join(os.getcwd(), "great_expectations")
-    context = DataContext(ge_root)
-
-    # Exemplo de batch_request para clientes
-    import pandas as pd
-    df_clientes = pd.read_csv("../data/datasets/clientes.csv")
-    batch_request_clientes = {
-        "datasource_name": "pandas_datasource",
-        "data_connector_name": "default_runtime_data_connector_name",
-        "data_asset_name": "clientes_runtime",
-        "runtime_parameters": {"batch_data": df_clientes},
-        "batch_identifiers": {"default_identifier_name": "clientes_1"},
+
+def lotes_de_linhas(total, linhas_por_lote=LINHAS_POR_LOTE):
+    """
+    Intervalos [inicio, fim) que cobrem total linhas (ao menos um, mesmo vazio).
+    """
+    return [(inicio, min(inicio + linhas_por_lote, total)) for inicio in range(0, total, linhas_por_lote)] or [(0, 0)]
+
+
+def lotes_do_arquivo(path, linhas_por_lote=LINHAS_POR_LOTE):
+    """
+    Lotes (inicio, fim, deslocamento) do arquivo; deslocamento são os bytes do
+    lote em CSV sem compressão e None nos demais formatos.
+    """
+    if formato_do_caminho(path) == 'csv' and not compressao_do_caminho(path):
+        return lotes_csv(path, linhas_por_lote)
+    return [(inicio, fim, None) for inicio, fim in lotes_de_linhas(contar_linhas(path), linhas_por_lote)]
+
+
+def _validar_lote(path, suite, inicio, fim, deslocamento=None):
+    validador = ValidadorNativo(suite)
+    return validador.atualizar(ler_intervalo(path, inicio, fim, colunas=validador.colunas or None,
+                                             deslocamento=deslocamento))
+
+
+def _linhas_do_resultado(resultado):
+    return max((r['result'].get('element_count') or 0 for r in resultado['results']), default=0)
+
+
+def _validar_em_lotes(validacoes, suites, max_workers, linhas_por_lote):
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {}
+        for nome, path in validacoes.items():
+            lotes = lotes_do_arquivo(path, linhas_por_lote)
+            futuros[nome] = [executor.submit(_validar_lote, path, suites[nome], inicio, fim, deslocamento)
+                             for inicio, fim, deslocamento in lotes]
+            logging.info(f"Suite '{nome}': {len(lotes)} lote(s) de até {linhas_por_lote} linhas.")
+        resultados = {}
+        for nome, parciais in futuros.items():
+            validador = ValidadorNativo(suites[nome])
+            for futuro in parciais:
+                validador.combinar(futuro.result())
+            resultados[nome] = validador.resultado()
+    return resultados
+
+
+@instrumentar('checkpoints')
+def executar_checkpoints(validacoes, max_workers=None, linhas_por_lote=LINHAS_POR_LOTE):
+    """
+    validacoes: {nome_da_suite: caminho_do_arquivo}. Todos os lotes de todas as
+    suítes entram no mesmo pool (no backend SQLite as suítes rodam uma a uma);
+    retorna {nome_da_suite: resultado}.
+    """
+    from backend_sql import BACKEND, validar_arquivo_sql
+
+    inicio_total = time.perf_counter()
+    suites = {nome: carregar_suite(nome) for nome in validacoes}
+    if BACKEND == 'sqlite':
+        resultados = {nome: validar_arquivo_sql(path, suites[nome]) for nome, path in validacoes.items()}
+    else:
+        resultados = _validar_em_lotes(validacoes, suites, max_workers, linhas_por_lote)
+    for nome, resultado in resultados.items():
+        contar('linhas_entrada', _linhas_do_resultado(resultado))
+        estatisticas = resultado['statistics']
+        logging.info(f"Checkpoint '{nome}': {estatisticas['successful_expectations']}/"
+                     f"{estatisticas['evaluated_expectations']} expectativas atendidas.")
+    logging.info(f"Checkpoints concluídos em {time.perf_counter() - inicio_total:.2f}s.")
+    return resultados
+
+
+def gravar_checkpoints(resultados, diretorio='../data/quality'):
+    """
+    Grava cada resultado em <diretorio>/checkpoint_<suite>.json.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    for nome, resultado in resultados.items():
+        with open(os.path.join(diretorio, f'checkpoint_{nome}.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+
+def _batch_request_sql(caminho):
+    """
+    Batch request sobre a tabela do backend_sql com o conteúdo de caminho
+    (carregada se ainda não estiver atualizada), na datasource de
+    great_expectations_setup.ensure_sql_datasource.
+    """
+    from backend_sql import conectar, garantir_tabela
+
+    conexao = conectar()
+    try:
+        tabela = garantir_tabela(conexao, caminho)
+    finally:
+        conexao.close()
+    return {
+        "datasource_name": "sqlite_datasource",
+        "data_connector_name": "default_inferred_data_connector_name",
+        "data_asset_name": tabela,
     }
 
-    criar_checkpoint(context, "checkpoint_clientes", "clientes_suite", batch_request_clientes)
 
-    # Repita para produtos e vendas conforme necessário
+def registrar_checkpoints_ge(context):
+    """
+    Registra um SimpleCheckpoint por dataset. Com DATAOPS_BACKEND=sqlite os
+    checkpoints validam as tabelas do banco pela SqlAlchemyExecutionEngine; nos
+    demais casos, o DataFrame carregado na datasource pandas.
+    """
+    from backend_sql import BACKEND
+
+    if BACKEND == 'sqlite':
+        from great_expectations_setup import ensure_sql_datasource
+        ensure_sql_datasource(context)
+    for dataset in DATASETS:
+        caminho = f"../data/datasets/{dataset}.csv"
+        if BACKEND == 'sqlite':
+            batch_request = _batch_request_sql(caminho)
+        else:
+            batch_request = {
+                "datasource_name": "pandas_datasource",
+                "data_connector_name": "default_runtime_data_connector_name",
+                "data_asset_name": f"{dataset}_runtime",
+                "runtime_parameters": {"batch_data": carregar_tabela(caminho)},
+                "batch_identifiers": {"default_identifier_name": f"{dataset}_1"},
+            }
+        criar_checkpoint(context, f"checkpoint_{dataset}", f"{dataset}_suite", batch_request)
+
+
+if __name__ == "__main__":
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    parser = argparse.ArgumentParser(description="Executa os checkpoints de todas as suítes em paralelo.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Número de processos do pool.")
+    parser.add_argument("--linhas-por-lote", type=int, default=LINHAS_POR_LOTE,
+                        help="Tamanho dos lotes de linhas validados em paralelo.")
+    parser.add_argument("--registrar-ge", action="store_true",
+                        help="Apenas registra os SimpleCheckpoints no contexto do Great Expectations.")
+    args = parser.parse_args()
+
+    if args.registrar_ge:
+        from great_expectations.data_context import DataContext
+        registrar_checkpoints_ge(DataContext(os.path.join(os.getcwd(), "great_expectations")))
+        logging.info("Configuração de checkpoints concluída.")
+        raise SystemExit(0)
 
-    logging.info("Configuração de checkpoints concluída.")
\ No newline at end of file
+    resultados = executar_checkpoints({f"{dataset}_suite": caminho_processado(f"{dataset}_corrigido")
+                                       for dataset in DATASETS},
+                                      max_workers=args.workers, linhas_por_lote=args.linhas_por_lote)
+    gravar_checkpoints(resultados)
+    raise SystemExit(0 if all(r['success'] for r in resultados.values()) else 1)
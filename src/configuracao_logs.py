@@ -0,0 +1,36 @@
+"""
+Configuração de logs do pipeline, feita por quem executa (CLI, __main__ dos
+módulos, processos do orquestrador) e nunca na importação dos módulos.
+
+configurar_logs() envia as mensagens para o console e para o log de auditoria
+(../data/quality/auditoria.log, ou DATAOPS_AUDITORIA; vazio desativa). Pode ser
+chamada mais de uma vez no mesmo processo: os handlers são criados uma só vez.
+"""
+
+import logging
+import os
+
+FORMATO = "%(asctime)s - %(levelname)s - %(message)s"
+ARQUIVO_AUDITORIA = os.environ.get('DATAOPS_AUDITORIA', '../data/quality/auditoria.log')
+
+
+def _tem_handler(raiz, nome):
+    return any(handler.get_name() == nome for handler in raiz.handlers)
+
+
+def configurar_logs(nivel=logging.INFO, auditoria=True, arquivo=None):
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel)
+    formatador = logging.Formatter(FORMATO)
+    if not _tem_handler(raiz, 'dataops_console'):
+        console = logging.StreamHandler()
+        console.set_name('dataops_console')
+        console.setFormatter(formatador)
+        raiz.addHandler(console)
+    arquivo = ARQUIVO_AUDITORIA if arquivo is None else arquivo
+    if auditoria and arquivo and not _tem_handler(raiz, 'dataops_auditoria'):
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+        registro = logging.FileHandler(arquivo, encoding='utf-8')
+        registro.set_name('dataops_auditoria')
+        registro.setFormatter(formatador)
+        raiz.addHandler(registro)
@@ -2,10 +2,17 @@ import pandas as pd
 import re
 import logging
 import os
-
-os.makedirs('../data/processed', exist_ok=True)
-
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+from functools import partial
+from armazenamento import EscritorTabela, caminho_processado, ler_em_blocos, salvar_tabela
+from backend_sql import BACKEND, corrigir_sql
+from carregador import carregar_tabela
+from chaves_hash import ConjuntoChavesHash, hash_chaves
+from incremental import processar_incremental
+from indice_chaves import indice_chaves
+from instrumentacao import contar, instrumentar
+from limpeza_vetorizada import padronizar_emails, padronizar_telefones, limitar_minimo
+from motor_datas import formatar_datas
+from planos_tipos import PLANOS, tipos_leitura
 
 def padronizar_email(email):
     if pd.isnull(email):
@@ -28,64 +35,182 @@ def remover_duplicatas(df, subset):
     antes = len(df)
     df = df.drop_duplicates(subset=subset)
     depois = len(df)
+    contar('removidas_duplicatas', antes - depois)
     logging.info(f"Removidas {antes - depois} duplicatas.")
     return df
 
+def preencher_vazios(serie, valor):
+    # em colunas categóricas o valor de preenchimento precisa existir nas categorias
+    if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+        serie = serie.cat.add_categories([valor])
+    return serie.fillna(valor)
+
 def preencher_campos_vazios_clientes(df):
     df['nome'] = df['nome'].fillna('Cliente Não Informado')
     df['email'] = df['email'].fillna('email@naoinformado.com')
     return df
 
-def corrigir_clientes(path_in, path_out):
-    df = pd.read_csv(path_in)
-    df['email'] = df['email'].apply(padronizar_email)
-    df['telefone'] = df['telefone'].apply(padronizar_telefone)
-    df['data_nascimento'] = df['data_nascimento'].apply(padronizar_data)
-    df['data_cadastro'] = df['data_cadastro'].apply(padronizar_data)
-    df = remover_duplicatas(df, ['id_cliente', 'email'])
-    df = preencher_campos_vazios_clientes(df)
-    df.to_csv(path_out, index=False)
-    logging.info("Correção de clientes concluída.")
+def _limpar_clientes(df):
+    df['email'] = padronizar_emails(df['email'])
+    df['telefone'] = padronizar_telefones(df['telefone'])
+    df['data_nascimento'] = formatar_datas(df['data_nascimento'])
+    df['data_cadastro'] = formatar_datas(df['data_cadastro'])
+    return df
 
-def corrigir_produtos(path_in, path_out):
-    df = pd.read_csv(path_in)
+def _limpar_produtos(df):
     df['nome_produto'] = df['nome_produto'].fillna('Produto Não Informado')
-    df['categoria'] = df['categoria'].fillna('Sem Categoria')
-    df['preco'] = df['preco'].apply(lambda x: max(float(x), 0))
-    df['estoque'] = df['estoque'].apply(lambda x: max(int(x), 0))
-    df['data_criacao'] = df['data_criacao'].apply(padronizar_data)
-    df = remover_duplicatas(df, ['id_produto', 'nome_produto'])
-    df.to_csv(path_out, index=False)
-    logging.info("Correção de produtos concluída.")
+    df['categoria'] = preencher_vazios(df['categoria'], 'Sem Categoria')
+    df['preco'] = limitar_minimo(df['preco'], 0, float)
+    df['estoque'] = limitar_minimo(df['estoque'], 0, int)
+    df['data_criacao'] = formatar_datas(df['data_criacao'])
+    return df
 
-def corrigir_vendas(path_in, path_out, clientes_path, produtos_path):
-    df = pd.read_csv(path_in)
-    clientes = pd.read_csv(clientes_path)
-    produtos = pd.read_csv(produtos_path)
-    df['quantidade'] = df['quantidade'].apply(lambda x: max(int(x), 1))
-    df['valor_unitario'] = df['valor_unitario'].apply(lambda x: max(float(x), 0))
+def _limpar_vendas(df, indice_clientes, indice_produtos):
+    df['quantidade'] = limitar_minimo(df['quantidade'], 1, int)
+    df['valor_unitario'] = limitar_minimo(df['valor_unitario'], 0, float)
     df['valor_total'] = df['quantidade'] * df['valor_unitario']
-    df['data_venda'] = df['data_venda'].apply(padronizar_data)
+    df['data_venda'] = formatar_datas(df['data_venda'])
     # Validação de chaves estrangeiras
-    df = df[df['id_cliente'].isin(clientes['id_cliente'])]
-    df = df[df['id_produto'].isin(produtos['id_produto'])]
-    df.to_csv(path_out, index=False)
-    logging.info("Correção de vendas concluída.")
+    antes = len(df)
+    df = df[indice_clientes.contem(df['id_cliente'])]
+    df = df[indice_produtos.contem(df['id_produto'])]
+    contar('removidas_fk', antes - len(df))
+    return df
 
-def corrigir_logistica(path_in, path_out, vendas_path):
-    df = pd.read_csv(path_in)
-    vendas = pd.read_csv(vendas_path)
-    df['data_envio'] = df['data_envio'].apply(padronizar_data)
-    df['data_entrega_prevista'] = df['data_entrega_prevista'].apply(padronizar_data)
-    df['data_entrega_real'] = df['data_entrega_real'].apply(padronizar_data)
+def _limpar_logistica(df, indice_vendas):
+    df['data_envio'] = formatar_datas(df['data_envio'])
+    df['data_entrega_prevista'] = formatar_datas(df['data_entrega_prevista'])
+    df['data_entrega_real'] = formatar_datas(df['data_entrega_real'])
     # Validação de chaves estrangeiras
-    df = df[df['id_venda'].isin(vendas['id_venda'])]
-    df.to_csv(path_out, index=False)
+    antes = len(df)
+    df = df[indice_vendas.contem(df['id_venda'])]
+    contar('removidas_fk', antes - len(df))
+    return df
+
+def corrigir_em_blocos(path_in, path_out, chunksize, limpar, subset=None, finalizar=None, tipos=None):
+    """
+    Processa path_in em blocos de chunksize linhas e anexa cada bloco a path_out.
+
+    A memória fica limitada ao tamanho do bloco mais um conjunto de hashes das
+    chaves de subset (8 bytes por chave distinta), que mantém remover_duplicatas
+    correto entre blocos. Em entradas CSV, as colunas de tipos (dtype= do
+    read_csv) já saem tipadas; as demais são inferidas bloco a bloco.
+    """
+    vistas = ConjuntoChavesHash() if subset else None
+    removidas = 0
+    with EscritorTabela(path_out) as escritor:
+        for bloco in ler_em_blocos(path_in, chunksize, dtype=tipos):
+            contar('linhas_entrada', len(bloco))
+            bloco = limpar(bloco)
+            if vistas is not None:
+                novos = vistas.filtrar_novos(hash_chaves(bloco, subset))
+                removidas += len(bloco) - int(novos.sum())
+                bloco = bloco[novos]
+            if finalizar is not None:
+                bloco = finalizar(bloco)
+            contar('linhas_saida', len(bloco))
+            escritor.escrever(bloco)
+    if vistas is not None:
+        contar('removidas_duplicatas', removidas)
+        logging.info(f"Removidas {removidas} duplicatas.")
+
+@instrumentar()
+def corrigir_clientes(path_in, path_out, chunksize=None, incremental=False):
+    if BACKEND == 'sqlite':
+        corrigir_sql('clientes', path_in, path_out)
+    elif incremental:
+        processar_incremental('corrigir_clientes', path_in, path_out, 'id_cliente', ['id_cliente', 'email'],
+                              lambda df: preencher_campos_vazios_clientes(_limpar_clientes(df)),
+                              tipos=tipos_leitura(PLANOS['clientes']))
+    elif chunksize:
+        corrigir_em_blocos(path_in, path_out, chunksize, _limpar_clientes,
+                           subset=['id_cliente', 'email'], finalizar=preencher_campos_vazios_clientes,
+                           tipos=tipos_leitura(PLANOS['clientes']))
+    else:
+        df = carregar_tabela(path_in, dtypes=PLANOS['clientes'])
+        contar('linhas_entrada', len(df))
+        df = _limpar_clientes(df)
+        df = remover_duplicatas(df, ['id_cliente', 'email'])
+        df = preencher_campos_vazios_clientes(df)
+        contar('linhas_saida', len(df))
+        salvar_tabela(df, path_out)
+    logging.info("Correção de clientes concluída.")
+
+@instrumentar()
+def corrigir_produtos(path_in, path_out, chunksize=None, incremental=False):
+    if BACKEND == 'sqlite':
+        corrigir_sql('produtos', path_in, path_out)
+    elif incremental:
+        processar_incremental('corrigir_produtos', path_in, path_out, 'id_produto', ['id_produto', 'nome_produto'],
+                              _limpar_produtos, tipos=tipos_leitura(PLANOS['produtos']))
+    elif chunksize:
+        corrigir_em_blocos(path_in, path_out, chunksize, _limpar_produtos,
+                           subset=['id_produto', 'nome_produto'], tipos=tipos_leitura(PLANOS['produtos']))
+    else:
+        df = carregar_tabela(path_in, dtypes=PLANOS['produtos'])
+        contar('linhas_entrada', len(df))
+        df = _limpar_produtos(df)
+        df = remover_duplicatas(df, ['id_produto', 'nome_produto'])
+        contar('linhas_saida', len(df))
+        salvar_tabela(df, path_out)
+    logging.info("Correção de produtos concluída.")
+
+@instrumentar()
+def corrigir_vendas(path_in, path_out, clientes_path, produtos_path, chunksize=None, incremental=False):
+    if BACKEND == 'sqlite':
+        corrigir_sql('vendas', path_in, path_out, {'id_cliente': clientes_path, 'id_produto': produtos_path})
+        logging.info("Correção de vendas concluída.")
+        return
+    limpar = partial(_limpar_vendas, indice_clientes=indice_chaves(clientes_path, 'id_cliente'),
+                     indice_produtos=indice_chaves(produtos_path, 'id_produto'))
+    if incremental:
+        processar_incremental('corrigir_vendas', path_in, path_out, 'id_venda', ['id_venda'], limpar,
+                              dependencias=[clientes_path, produtos_path], tipos=tipos_leitura(PLANOS['vendas']))
+    elif chunksize:
+        corrigir_em_blocos(path_in, path_out, chunksize, limpar, tipos=tipos_leitura(PLANOS['vendas']))
+    else:
+        df = carregar_tabela(path_in, dtypes=PLANOS['vendas'])
+        contar('linhas_entrada', len(df))
+        df = limpar(df)
+        contar('linhas_saida', len(df))
+        salvar_tabela(df, path_out)
+    logging.info("Correção de vendas concluída.")
+
+@instrumentar()
+def corrigir_logistica(path_in, path_out, vendas_path, chunksize=None, incremental=False):
+    if BACKEND == 'sqlite':
+        corrigir_sql('logistica', path_in, path_out, {'id_venda': vendas_path})
+        logging.info("Correção de logística concluída.")
+        return
+    limpar = partial(_limpar_logistica, indice_vendas=indice_chaves(vendas_path, 'id_venda'))
+    if incremental:
+        processar_incremental('corrigir_logistica', path_in, path_out, 'id_entrega', ['id_entrega'], limpar,
+                              dependencias=[vendas_path], tipos=tipos_leitura(PLANOS['logistica']))
+    elif chunksize:
+        corrigir_em_blocos(path_in, path_out, chunksize, limpar, tipos=tipos_leitura(PLANOS['logistica']))
+    else:
+        df = carregar_tabela(path_in, dtypes=PLANOS['logistica'])
+        contar('linhas_entrada', len(df))
+        df = limpar(df)
+        contar('linhas_saida', len(df))
+        salvar_tabela(df, path_out)
     logging.info("Correção de logística concluída.")
 
+def executar_correcao(chunksize=None, incremental=False):
+    """
+    Corrige os quatro datasets de data/processed na ordem das dependências.
+    """
+    corrigir_clientes(caminho_processado("clientes"), caminho_processado("clientes_corrigido"), chunksize=chunksize, incremental=incremental)
+    corrigir_produtos(caminho_processado("produtos"), caminho_processado("produtos_corrigido"), chunksize=chunksize, incremental=incremental)
+    corrigir_vendas(caminho_processado("vendas"), caminho_processado("vendas_corrigido"), caminho_processado("clientes_corrigido"), caminho_processado("produtos_corrigido"), chunksize=chunksize, incremental=incremental)
+    corrigir_logistica(caminho_processado("logistica"), caminho_processado("logistica_corrigido"), caminho_processado("vendas_corrigido"), chunksize=chunksize, incremental=incremental)
+    logging.info("Sistema de correção automática finalizado.")
+
 if __name__ == "__main__":
-    corrigir_clientes("./notebooks/datasets/clientes.csv", "../data/processed/clientes_corrigido.csv")
-    corrigir_produtos("./notebooks/datasets/produtos.csv", "../data/processed/produtos_corrigido.csv")
-    corrigir_vendas("./notebooks/datasets/vendas.csv", "../data/processed/vendas_corrigido.csv", "../data/processed/clientes_corrigido.csv", "../data/processed/produtos_corrigido.csv")
-    corrigir_logistica("./notebooks/datasets/logistica.csv", "../data/processed/logistica_corrigido.csv", "../data/processed/vendas_corrigido.csv")
-    logging.info("Sistema de correção automática finalizado.")
\ No newline at end of file
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    # Modo streaming opcional: DATAOPS_TAMANHO_BLOCO=<linhas por bloco>
+    # Modo incremental opcional: DATAOPS_INCREMENTAL=1 processa apenas as linhas novas
+    executar_correcao(chunksize=int(os.environ.get("DATAOPS_TAMANHO_BLOCO", "0")) or None,
+                      incremental=os.environ.get("DATAOPS_INCREMENTAL") == "1")
\ No newline at end of file
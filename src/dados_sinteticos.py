@@ -0,0 +1,325 @@
+"""
+Gerador de dados sintéticos para testes de escala do pipeline.
+
+Reproduz os schemas de clientes, produtos, vendas e logística de
+notebooks/datasets e os mesmos tipos de problema descritos no README dos
+datasets, com taxas configuráveis (TAXAS_DEFEITOS): emails vazios ou inválidos,
+telefones truncados, preços e estoques negativos, chaves estrangeiras órfãs,
+datas malformadas ou futuras, status fora do domínio, totais inconsistentes e
+linhas duplicadas.
+
+O tamanho é dado pelo número de vendas (ex.: '1M', '10M', '100M'); os demais
+datasets são proporcionais (PROPORCOES). Os arquivos são gerados e gravados em
+blocos de LINHAS_POR_BLOCO linhas, então a memória não depende do tamanho, e
+cada bloco usa um gerador aleatório derivado de (semente, dataset, bloco): a
+mesma semente e o mesmo tamanho produzem sempre os mesmos arquivos.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import EscritorTabela
+
+LINHAS_POR_BLOCO = 1_000_000
+
+# linhas de cada dataset por venda (com mínimos para tamanhos pequenos)
+PROPORCOES = {'clientes': 0.1, 'produtos': 0.001, 'vendas': 1.0, 'logistica': 0.9}
+MINIMOS = {'clientes': 10, 'produtos': 20, 'vendas': 1, 'logistica': 1}
+PRIMEIRO_ID = {'clientes': 1, 'produtos': 101, 'vendas': 1001, 'logistica': 2001}
+
+TAXAS_DEFEITOS = {
+    'clientes': {'duplicada': 0.02, 'nome_vazio': 0.03, 'email_vazio': 0.05, 'email_invalido': 0.03,
+                 'telefone_truncado': 0.04, 'menor_de_idade': 0.01, 'data_malformada': 0.01},
+    'produtos': {'duplicada': 0.01, 'nome_vazio': 0.02, 'categoria_vazia': 0.05, 'preco_negativo': 0.02,
+                 'preco_zero': 0.01, 'estoque_negativo': 0.02, 'data_malformada': 0.01},
+    'vendas': {'cliente_orfao': 0.02, 'produto_orfao': 0.01, 'quantidade_negativa': 0.01,
+               'quantidade_zero': 0.01, 'total_incorreto': 0.02, 'data_futura': 0.005,
+               'data_malformada': 0.01, 'status_invalido': 0.01},
+    'logistica': {'venda_orfa': 0.01, 'venda_repetida': 0.01, 'transportadora_vazia': 0.03,
+                  'entrega_antes_do_envio': 0.01, 'prevista_vazia': 0.05, 'entregue_sem_data': 0.01,
+                  'data_malformada': 0.01},
+}
+
+PRIMEIROS_NOMES = ['João', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Juliana', 'Lucas', 'Fernanda', 'Rafael',
+                   'Camila', 'Bruno', 'Beatriz', 'Gabriel', 'Larissa', 'Mateus', 'Patrícia']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Costa', 'Pereira', 'Lima', 'Ferreira', 'Almeida',
+              'Rodrigues', 'Gomes', 'Martins', 'Araújo', 'Ribeiro']
+DOMINIOS = ['email.com', 'gmail.com', 'hotmail.com', 'yahoo.com.br']
+CIDADES = [('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'), ('Porto Alegre', 'RS'),
+           ('Curitiba', 'PR'), ('Salvador', 'BA'), ('Recife', 'PE'), ('Fortaleza', 'CE'), ('Brasília', 'DF'),
+           ('Manaus', 'AM'), ('Campinas', 'SP'), ('Niterói', 'RJ')]
+PRODUTOS = [('Smartphone', 'Eletrônicos', 899.99), ('Notebook', 'Informática', 1299.99),
+            ('Mouse', 'Informática', 29.99), ('Teclado', 'Informática', 199.99),
+            ('Headset', 'Informática', 299.99), ('Monitor', 'Eletrônicos', 599.99),
+            ('Cadeira', 'Móveis', 799.99), ('Webcam', 'Informática', 149.99),
+            ('Tablet', 'Eletrônicos', 399.99), ('Carregador', 'Acessórios', 89.99),
+            ('Cabo HDMI', 'Acessórios', 25.99), ('Vaso', 'Casa e Jardim', 45.90)]
+MODELOS = ['XYZ', 'ABC', 'Gamer', 'Pro', 'Max', 'HD', 'Plus', 'Lite']
+STATUS_VENDA = ['Concluída', 'Pendente', 'Cancelada', 'Processando']
+PESOS_STATUS_VENDA = [0.7, 0.15, 0.1, 0.05]
+TRANSPORTADORAS = ['Correios', 'Transportadora XYZ', 'Transportadora ABC']
+
+
+def interpretar_tamanho(tamanho):
+    """
+    '1M' -> 1_000_000, '250k' -> 250_000, '100M' -> 100_000_000; inteiros passam direto.
+    """
+    if isinstance(tamanho, int):
+        return tamanho
+    texto = str(tamanho).strip().lower().replace('_', '')
+    multiplicador = {'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000}.get(texto[-1:], 1)
+    return int(float(texto.rstrip('kmb')) * multiplicador)
+
+
+def linhas_por_dataset(vendas):
+    return {nome: max(int(vendas * proporcao), MINIMOS[nome]) for nome, proporcao in PROPORCOES.items()}
+
+
+def _rng(semente, dataset, bloco):
+    return np.random.default_rng([semente, list(PROPORCOES).index(dataset), bloco])
+
+
+def _sortear(rng, n, taxa):
+    return rng.random(n) < taxa
+
+
+def _escolher(rng, valores, n, p=None):
+    return np.asarray(valores, dtype=object)[rng.choice(len(valores), size=n, p=p)]
+
+
+def _datas(rng, n, inicio, dias):
+    return (np.datetime64(inicio) + rng.integers(0, dias, size=n)).astype('datetime64[D]')
+
+
+def _texto_datas(datas):
+    return datas.astype(str).astype(object)
+
+
+def _malformar_datas(rng, texto, mascara):
+    """
+    Troca as datas marcadas por formatos que o pipeline não espera: dd/mm/aaaa ou um dia inexistente.
+    """
+    indices = np.flatnonzero(mascara & pd.notna(texto))
+    if len(indices) == 0:
+        return texto
+    originais = pd.Series(texto[indices], dtype=object)
+    brasileiro = originais.str[8:10] + '/' + originais.str[5:7] + '/' + originais.str[:4]
+    inexistente = originais.str[:4] + '-02-30'
+    texto[indices] = np.where(rng.random(len(indices)) < 0.5, brasileiro, inexistente)
+    return texto
+
+
+def _duplicar_linhas(rng, df, taxa):
+    """
+    Sobrescreve uma fração das linhas com cópias exatas de linhas anteriores do bloco.
+    """
+    destinos = np.flatnonzero(_sortear(rng, len(df), taxa))
+    destinos = destinos[destinos > 0]
+    if len(destinos):
+        origens = (rng.random(len(destinos)) * destinos).astype(np.int64)
+        for coluna in df.columns:
+            valores = df[coluna].to_numpy(copy=True)
+            valores[destinos] = valores[origens]
+            df[coluna] = valores
+    return df
+
+
+def taxas_do_dataset(nome, taxas=None):
+    """
+    Taxas de defeitos do dataset: as de TAXAS_DEFEITOS com as informadas por cima
+    (ex.: {'email_vazio': 0.5} muda só essa taxa).
+    """
+    return {**TAXAS_DEFEITOS[nome], **(taxas or {})}
+
+
+def gerar_clientes(inicio, n, rng, taxas=None):
+    taxas = taxas_do_dataset('clientes', taxas)
+    ids = np.arange(inicio, inicio + n) + PRIMEIRO_ID['clientes']
+    primeiros = _escolher(rng, PRIMEIROS_NOMES, n)
+    sobrenomes = _escolher(rng, SOBRENOMES, n)
+    nomes = pd.Series(primeiros + ' ' + sobrenomes, dtype=object)
+    usuarios = (pd.Series(primeiros + '.' + sobrenomes, dtype=object).str.lower()
+                .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii'))
+    emails = usuarios + ids.astype(str) + '@' + _escolher(rng, DOMINIOS, n)
+    invalidos = _sortear(rng, n, taxas['email_invalido'])
+    emails[invalidos] = usuarios[invalidos] + '@invalid'
+    emails[_sortear(rng, n, taxas['email_vazio'])] = None
+    nomes[_sortear(rng, n, taxas['nome_vazio'])] = None
+
+    telefones = (rng.integers(11, 100, size=n) * 1_000_000_000 + 900_000_000
+                 + rng.integers(0, 100_000_000, size=n)).astype(str).astype(object)
+    truncados = np.flatnonzero(_sortear(rng, n, taxas['telefone_truncado']))
+    telefones[truncados] = [t[:tamanho] for t, tamanho in zip(telefones[truncados],
+                                                                rng.integers(6, 9, size=len(truncados)))]
+
+    nascimento = _datas(rng, n, '1950-01-01', 55 * 365)
+    menores = _sortear(rng, n, taxas['menor_de_idade'])
+    nascimento[menores] = _datas(rng, int(menores.sum()), '2010-01-01', 5 * 365)
+    cidades = rng.integers(0, len(CIDADES), size=n)
+    df = pd.DataFrame({
+        'id_cliente': ids,
+        'nome': nomes.to_numpy(),
+        'email': emails.to_numpy(),
+        'telefone': telefones,
+        'data_nascimento': _malformar_datas(rng, _texto_datas(nascimento), _sortear(rng, n, taxas['data_malformada'])),
+        'cidade': np.asarray([c for c, _ in CIDADES], dtype=object)[cidades],
+        'estado': np.asarray([e for _, e in CIDADES], dtype=object)[cidades],
+        'data_cadastro': _malformar_datas(rng, _texto_datas(_datas(rng, n, '2020-01-01', 4 * 365)),
+                                          _sortear(rng, n, taxas['data_malformada'])),
+    })
+    return _duplicar_linhas(rng, df, taxas['duplicada'])
+
+
+def gerar_produtos(inicio, n, rng, taxas=None):
+    taxas = taxas_do_dataset('produtos', taxas)
+    tipos = rng.integers(0, len(PRODUTOS), size=n)
+    nomes = (np.asarray([p[0] for p in PRODUTOS], dtype=object)[tipos] + ' ' + _escolher(rng, MODELOS, n))
+    nomes[_sortear(rng, n, taxas['nome_vazio'])] = None
+    categorias = np.asarray([p[1] for p in PRODUTOS], dtype=object)[tipos]
+    categorias[_sortear(rng, n, taxas['categoria_vazia'])] = None
+    precos = np.round(np.asarray([p[2] for p in PRODUTOS])[tipos] * rng.uniform(0.8, 1.2, size=n), 2)
+    precos[_sortear(rng, n, taxas['preco_negativo'])] *= -1
+    precos[_sortear(rng, n, taxas['preco_zero'])] = 0
+    estoque = rng.integers(0, 500, size=n)
+    negativos = _sortear(rng, n, taxas['estoque_negativo'])
+    estoque[negativos] = -rng.integers(1, 50, size=int(negativos.sum()))
+    df = pd.DataFrame({
+        'id_produto': np.arange(inicio, inicio + n) + PRIMEIRO_ID['produtos'],
+        'nome_produto': nomes,
+        'categoria': categorias,
+        'preco': precos,
+        'estoque': estoque,
+        'data_criacao': _malformar_datas(rng, _texto_datas(_datas(rng, n, '2022-01-01', 2 * 365)),
+                                         _sortear(rng, n, taxas['data_malformada'])),
+        'ativo': np.where(rng.random(n) < 0.9, 'true', 'false'),
+    })
+    return _duplicar_linhas(rng, df, taxas['duplicada'])
+
+
+def gerar_vendas(inicio, n, rng, linhas, taxas=None):
+    taxas = taxas_do_dataset('vendas', taxas)
+    clientes = rng.integers(0, linhas['clientes'], size=n) + PRIMEIRO_ID['clientes']
+    orfaos = _sortear(rng, n, taxas['cliente_orfao'])
+    clientes[orfaos] = PRIMEIRO_ID['clientes'] + linhas['clientes'] + rng.integers(0, 1000, size=int(orfaos.sum()))
+    produtos = rng.integers(0, linhas['produtos'], size=n) + PRIMEIRO_ID['produtos']
+    orfaos = _sortear(rng, n, taxas['produto_orfao'])
+    produtos[orfaos] = PRIMEIRO_ID['produtos'] + linhas['produtos'] + rng.integers(0, 1000, size=int(orfaos.sum()))
+
+    quantidade = rng.integers(1, 6, size=n)
+    negativas = _sortear(rng, n, taxas['quantidade_negativa'])
+    quantidade[negativas] = -quantidade[negativas]
+    quantidade[_sortear(rng, n, taxas['quantidade_zero'])] = 0
+    unitario = np.round(np.asarray([p[2] for p in PRODUTOS])[rng.integers(0, len(PRODUTOS), size=n)], 2)
+    total = np.round(quantidade * unitario, 2)
+    incorretos = _sortear(rng, n, taxas['total_incorreto'])
+    total[incorretos] = np.round(total[incorretos] * rng.uniform(0.5, 1.5, size=int(incorretos.sum())), 2)
+
+    datas = _datas(rng, n, '2023-01-01', 365)
+    futuras = _sortear(rng, n, taxas['data_futura'])
+    datas[futuras] = _datas(rng, int(futuras.sum()), '2030-01-01', 365)
+    status = _escolher(rng, STATUS_VENDA, n, PESOS_STATUS_VENDA)
+    status[_sortear(rng, n, taxas['status_invalido'])] = 'Erro'
+    return pd.DataFrame({
+        'id_venda': np.arange(inicio, inicio + n) + PRIMEIRO_ID['vendas'],
+        'id_cliente': clientes,
+        'id_produto': produtos,
+        'quantidade': quantidade,
+        'valor_unitario': unitario,
+        'valor_total': total,
+        'data_venda': _malformar_datas(rng, _texto_datas(datas), _sortear(rng, n, taxas['data_malformada'])),
+        'status': status,
+    })
+
+
+def gerar_logistica(inicio, n, rng, linhas, taxas=None):
+    taxas = taxas_do_dataset('logistica', taxas)
+    # cada entrega aponta para uma venda distinta, espalhadas por todo o intervalo de vendas
+    vendas = ((np.arange(inicio, inicio + n) * linhas['vendas']) // linhas['logistica']) + PRIMEIRO_ID['vendas']
+    repetidas = np.flatnonzero(_sortear(rng, n, taxas['venda_repetida']))
+    repetidas = repetidas[repetidas > 0]
+    vendas[repetidas] = vendas[repetidas - 1]
+    orfas = _sortear(rng, n, taxas['venda_orfa'])
+    vendas[orfas] = PRIMEIRO_ID['vendas'] + linhas['vendas'] + rng.integers(0, 10_000, size=int(orfas.sum()))
+
+    envio = _datas(rng, n, '2023-01-02', 365)
+    prevista = envio + rng.integers(3, 8, size=n)
+    real = envio + rng.integers(2, 11, size=n)
+    antes = _sortear(rng, n, taxas['entrega_antes_do_envio'])
+    real[antes] = envio[antes] - rng.integers(1, 5, size=int(antes.sum()))
+
+    status = np.full(n, 'Entregue', dtype=object)
+    em_transito = rng.random(n) < 0.1
+    status[em_transito] = 'Em Trânsito'
+    envio_texto, prevista_texto, real_texto = _texto_datas(envio), _texto_datas(prevista), _texto_datas(real)
+    real_texto[em_transito | _sortear(rng, n, taxas['entregue_sem_data'])] = None
+    prevista_texto[_sortear(rng, n, taxas['prevista_vazia'])] = None
+    transportadoras = _escolher(rng, TRANSPORTADORAS, n)
+    transportadoras[_sortear(rng, n, taxas['transportadora_vazia'])] = None
+    return pd.DataFrame({
+        'id_entrega': np.arange(inicio, inicio + n) + PRIMEIRO_ID['logistica'],
+        'id_venda': vendas,
+        'transportadora': transportadoras,
+        'data_envio': _malformar_datas(rng, envio_texto, _sortear(rng, n, taxas['data_malformada'])),
+        'data_entrega_prevista': prevista_texto,
+        'data_entrega_real': real_texto,
+        'status_entrega': status,
+    })
+
+
+GERADORES = {
+    'clientes': lambda inicio, n, rng, linhas, taxas: gerar_clientes(inicio, n, rng, taxas),
+    'produtos': lambda inicio, n, rng, linhas, taxas: gerar_produtos(inicio, n, rng, taxas),
+    'vendas': gerar_vendas,
+    'logistica': gerar_logistica,
+}
+
+
+def gerar_dataset(nome, caminho, linhas, semente=42, taxas=None):
+    """
+    Gera o dataset nome com linhas[nome] linhas em caminho, bloco a bloco.
+    """
+    total = linhas[nome]
+    with EscritorTabela(caminho) as escritor:
+        for bloco, inicio in enumerate(range(0, total, LINHAS_POR_BLOCO)):
+            n = min(LINHAS_POR_BLOCO, total - inicio)
+            escritor.escrever(GERADORES[nome](inicio, n, _rng(semente, nome, bloco), linhas,
+                                              (taxas or {}).get(nome)))
+    return total
+
+
+def gerar_datasets(diretorio, tamanho='1M', semente=42, formato='csv', taxas=None):
+    """
+    Gera os quatro datasets em diretorio (clientes.csv etc., o formato lido pela
+    ingestão) e grava manifesto.json com a semente, as taxas e o número de linhas.
+    """
+    vendas = interpretar_tamanho(tamanho)
+    linhas = linhas_por_dataset(vendas)
+    os.makedirs(diretorio, exist_ok=True)
+    for nome in PROPORCOES:
+        inicio = time.perf_counter()
+        gerar_dataset(nome, os.path.join(diretorio, f'{nome}.{formato}'), linhas, semente, taxas)
+        logging.info(f"Dataset sintético {nome}: {linhas[nome]} linhas em {time.perf_counter() - inicio:.2f}s.")
+    manifesto = {'semente': semente, 'vendas': vendas, 'formato': formato, 'linhas': linhas,
+                 'taxas_defeitos': {nome: taxas_do_dataset(nome, (taxas or {}).get(nome))
+                                    for nome in TAXAS_DEFEITOS}}
+    with open(os.path.join(diretorio, 'manifesto.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=2, ensure_ascii=False)
+    return manifesto
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Gera datasets sintéticos com os problemas de qualidade do projeto.")
+    parser.add_argument("--tamanho", default="1M", help="Número de vendas (ex.: 1M, 10M, 100M).")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--formato", default="csv", choices=["csv", "parquet", "arrow"])
+    parser.add_argument("--destino", default=None, help="Diretório de saída (padrão ../data/sinteticos/<tamanho>).")
+    args = parser.parse_args()
+    gerar_datasets(args.destino or os.path.join('../data/sinteticos', args.tamanho), args.tamanho,
+                   args.semente, args.formato)
@@ -1,15 +1,173 @@
-import os
+"""
+Relatórios de qualidade.
+
+Data Docs do Great Expectations:
+    gerar_data_docs(context)                    reconstrói o site inteiro (build_data_docs)
+    gerar_data_docs(context, incremental=True)  renderiza só os resultados de validação
+        gravados depois da última geração e atualiza as páginas de índice
+O ponto de parada é o run_time mais recente já renderizado (e as chaves com
+esse mesmo run_time), salvo em ../data/quality/data_docs_estado.json junto com
+as entradas da página de índice de cada validação (sucesso, asset, batch). O
+índice é regravado a partir dessas entradas: o DefaultSiteIndexBuilder do Great
+Expectations carregaria do validations store todos os resultados do histórico
+a cada geração, então o custo da geração incremental depende só dos resultados
+novos.
+
+Resumo estático (sem Great Expectations): gerar_resumo() monta
+../data/quality/resumo_qualidade.json e .html a partir dos resultados agregados
+já gravados (validacao_<dataset>.json, checkpoint_<suite>.json) e das métricas
+de etapas da última execução, sem abrir o validations store.
+"""
+
+import argparse
+import glob
+import html
+import json
 import logging
-from great_expectations.data_context import DataContext
+import os
+from collections import OrderedDict
+from datetime import datetime
+
+from instrumentacao import etapas_mais_lentas, ler_ultima_execucao
+
+DIRETORIO_QUALIDADE = '../data/quality'
+ARQUIVO_ESTADO_DOCS = os.path.join(DIRETORIO_QUALIDADE, 'data_docs_estado.json')
+RESULTADOS_AGREGADOS = ('validacao_*.json', 'checkpoint_*.json')
+MAX_FALHAS_RESUMO = 20
+
+
+def _run_time(chave):
+    run_time = getattr(chave.run_id, 'run_time', None)
+    return run_time.strftime('%Y%m%dT%H%M%S.%fZ') if run_time else ''
+
+
+def _ler_estado(caminho=ARQUIVO_ESTADO_DOCS):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _gravar_estado(chaves, indice, anterior=None, caminho=ARQUIVO_ESTADO_DOCS):
+    marca = max([_run_time(c) for c in chaves] + [(anterior or {}).get('marca', '')])
+    na_marca = {str(c.to_tuple()) for c in chaves if _run_time(c) == marca}
+    if anterior and anterior.get('marca') == marca:
+        na_marca |= set(anterior.get('chaves_na_marca', []))
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump({'marca': marca, 'chaves_na_marca': sorted(na_marca), 'indice': indice,
+                   'gerado_em': datetime.now().isoformat(timespec='seconds')}, arquivo, indent=2)
+    os.replace(temporario, caminho)
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def gerar_data_docs(context):
+def _entrada_indice(chave, validacao):
     """
-    Gera os Data Docs (relatórios HTML) do Great Expectations.
+    O que a página de índice mostra de uma validação (os mesmos campos que o
+    DefaultSiteIndexBuilder lê do resultado), em JSON.
     """
-    context.build_data_docs()
-    logging.info("Data Docs gerados com sucesso.")
+    meta = validacao.meta
+    asset = ((meta.get('batch_kwargs') or {}).get('data_asset_name')
+             or (meta.get('batch_spec') or {}).get('data_asset_name')
+             or (meta.get('active_batch_definition') or {}).get('data_asset_name'))
+    return json.loads(json.dumps({'chave': list(chave.to_tuple()), 'sucesso': validacao.success, 'asset': asset,
+                                  'batch_kwargs': meta.get('batch_kwargs', {}),
+                                  'batch_spec': meta.get('batch_spec', {})}, default=str))
+
+
+def _sites(context):
+    from great_expectations.data_context.util import instantiate_class_from_config
+
+    for nome, config in (context.variables.data_docs_sites or {}).items():
+        yield instantiate_class_from_config(
+            config=config,
+            runtime_environment={'data_context': context, 'root_directory': context.root_directory,
+                                 'site_name': nome},
+            config_defaults={'class_name': 'SiteBuilder',
+                             'module_name': 'great_expectations.render.renderer.site_builder'})
+
+
+def gravar_indices(context, indice):
+    """
+    Regrava a página de índice de cada site de Data Docs com as entradas de
+    indice (_entrada_indice), sem ler o validations store. Filtro de run_name e
+    validation_results_limit do site são respeitados como no Great Expectations.
+    """
+    from great_expectations.data_context.types.resource_identifiers import (ExpectationSuiteIdentifier,
+                                                                            ValidationResultIdentifier)
+    from great_expectations.render.renderer.site_builder import (FALSEY_YAML_STRINGS,
+                                                                 resource_key_passes_run_name_filter)
+
+    entradas = sorted(((ValidationResultIdentifier.from_tuple(tuple(e['chave'])), e) for e in indice),
+                      key=lambda item: item[0].run_id.run_time, reverse=True)
+    for site in _sites(context):
+        construtor = site.site_index_builder
+        links = OrderedDict(site_name=construtor.site_name)
+        if construtor.show_how_to_buttons:
+            links['cta_object'] = construtor.get_calls_to_action()
+        paginas_suites = construtor.target_store.store_backends[ExpectationSuiteIdentifier].list_keys()
+        for chave in sorted(paginas_suites):
+            construtor.add_resource_info_to_index_links_dict(
+                index_links_dict=links, section_name='expectations',
+                expectation_suite_name=ExpectationSuiteIdentifier.from_tuple(chave).expectation_suite_name)
+        secao = construtor.site_section_builders_config.get('validations', 'None')
+        if secao and secao not in FALSEY_YAML_STRINGS:
+            visiveis = [(chave, e) for chave, e in entradas
+                        if resource_key_passes_run_name_filter(chave, secao['run_name_filter'])]
+            for chave, entrada in visiveis[:construtor.validation_results_limit or None]:
+                construtor.add_resource_info_to_index_links_dict(
+                    index_links_dict=links, section_name='validations',
+                    expectation_suite_name=chave.expectation_suite_identifier.expectation_suite_name,
+                    batch_identifier=chave.batch_identifier, run_id=chave.run_id,
+                    validation_success=entrada['sucesso'], run_time=chave.run_id.run_time,
+                    run_name=chave.run_id.run_name, asset_name=entrada['asset'],
+                    batch_kwargs=entrada['batch_kwargs'], batch_spec=entrada['batch_spec'])
+        pagina = construtor.view_class.render(construtor.renderer_class.render(links),
+                                              data_context_id=construtor.data_context_id,
+                                              show_how_to_buttons=construtor.show_how_to_buttons)
+        construtor.target_store.write_index_page(pagina)
+
+
+def validacoes_novas(context, estado):
+    """
+    Chaves do validations store ainda não renderizadas (só as chaves são
+    listadas; nenhum resultado é carregado).
+    """
+    chaves = context.validations_store.list_keys()
+    if estado is None:
+        return chaves
+    marca, na_marca = estado.get('marca', ''), set(estado.get('chaves_na_marca', []))
+    return [c for c in chaves
+            if _run_time(c) > marca or (_run_time(c) == marca and str(c.to_tuple()) not in na_marca)]
+
+
+def gerar_data_docs(context, incremental=False):
+    """
+    Gera os Data Docs (relatórios HTML) do Great Expectations. Com incremental,
+    renderiza apenas as validações novas desde a última geração e lê do store
+    só esses resultados; sem estado anterior, o site é gerado por inteiro. Em
+    ambos os casos o índice vem de gravar_indices.
+    """
+    estado = _ler_estado() if incremental else None
+    store = context.validations_store
+    if estado is None or 'indice' not in estado:
+        chaves = store.list_keys()
+        context.build_data_docs(build_index=False)
+        indice = [_entrada_indice(chave, store.get(chave)) for chave in chaves]
+        gravar_indices(context, indice)
+        _gravar_estado(chaves, indice)
+        logging.info("Data Docs gerados com sucesso.")
+        return
+    novas = validacoes_novas(context, estado)
+    if not novas:
+        logging.info("Data Docs já atualizados: nenhuma validação nova.")
+        return
+    context.build_data_docs(resource_identifiers=novas, build_index=False)
+    indice = estado['indice'] + [_entrada_indice(chave, store.get(chave)) for chave in novas]
+    gravar_indices(context, indice)
+    _gravar_estado(novas, indice, estado)
+    logging.info(f"Data Docs atualizados com {len(novas)} validações novas.")
+
 
 def abrir_data_docs(context):
     """
@@ -19,9 +177,113 @@ def abrir_data_docs(context):
     for site in docs_sites:
         print(f"Data Docs disponível em: {site['site_url']}")
 
+
+def _resumir_resultado(resultado):
+    falhas = [{
+        'expectativa': r['expectation_config']['expectation_type'],
+        'coluna': r['expectation_config']['kwargs'].get('column'),
+        'unexpected_percent': r.get('result', {}).get('unexpected_percent'),
+    } for r in resultado.get('results', []) if not r.get('success')]
+    return {
+        'suite': resultado.get('meta', {}).get('expectation_suite_name'),
+        'validado_em': resultado.get('meta', {}).get('validation_time'),
+        'success': resultado.get('success'),
+        'statistics': resultado.get('statistics', {}),
+        'falhas': falhas[:MAX_FALHAS_RESUMO],
+    }
+
+
+def montar_resumo(diretorio=DIRETORIO_QUALIDADE, arquivo_metricas=None):
+    """
+    Resumo da qualidade a partir dos resultados agregados de diretorio e das
+    etapas da última execução registrada.
+    """
+    validacoes = {}
+    for padrao in RESULTADOS_AGREGADOS:
+        for caminho in sorted(glob.glob(os.path.join(diretorio, padrao))):
+            with open(caminho, encoding='utf-8') as arquivo:
+                validacoes[os.path.splitext(os.path.basename(caminho))[0]] = _resumir_resultado(json.load(arquivo))
+    etapas = ler_ultima_execucao(arquivo_metricas)
+    return {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'validacoes': validacoes,
+        'execucao': etapas[-1]['execucao'] if etapas else None,
+        'etapas_mais_lentas': [{chave: r.get(chave) for chave in
+                                ('etapa', 'status', 'tempo_s', 'pico_memoria_mb', 'linhas_entrada', 'linhas_saida')}
+                               for r in etapas_mais_lentas(etapas)],
+    }
+
+
+def _linhas_tabela(cabecalho, linhas):
+    celulas = ''.join(f'<th>{html.escape(str(c))}</th>' for c in cabecalho)
+    corpo = ''.join('<tr>' + ''.join(f'<td>{html.escape("" if v is None else str(v))}</td>' for v in linha) + '</tr>'
+                    for linha in linhas)
+    return f'<table><tr>{celulas}</tr>{corpo}</table>'
+
+
+def resumo_html(resumo):
+    validacoes = _linhas_tabela(
+        ('resultado', 'suite', 'sucesso', 'expectativas atendidas', 'validado em'),
+        [(nome, v['suite'], 'sim' if v['success'] else 'NÃO',
+          f"{v['statistics'].get('successful_expectations')}/{v['statistics'].get('evaluated_expectations')}",
+          v['validado_em']) for nome, v in resumo['validacoes'].items()])
+    falhas = _linhas_tabela(
+        ('resultado', 'expectativa', 'coluna', '% inesperado'),
+        [(nome, f['expectativa'], f['coluna'], f['unexpected_percent'])
+         for nome, v in resumo['validacoes'].items() for f in v['falhas']])
+    etapas = _linhas_tabela(
+        ('etapa', 'status', 'tempo (s)', 'pico (MB)', 'entrada', 'saída'),
+        [tuple(r.values()) for r in resumo['etapas_mais_lentas']])
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Resumo de qualidade</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse;margin-bottom:2em}}
+td,th{{border:1px solid #ccc;padding:4px 8px;text-align:left}}</style></head><body>
+<h1>Resumo de qualidade</h1><p>Gerado em {html.escape(resumo['gerado_em'])}</p>
+<h2>Validações</h2>{validacoes}
+<h2>Expectativas com falha</h2>{falhas}
+<h2>Etapas mais lentas (execução {html.escape(str(resumo['execucao']))})</h2>{etapas}
+</body></html>
+"""
+
+
+def gerar_resumo(diretorio=DIRETORIO_QUALIDADE):
+    """
+    Grava resumo_qualidade.json e resumo_qualidade.html em diretorio.
+    """
+    resumo = montar_resumo(diretorio)
+    os.makedirs(diretorio, exist_ok=True)
+    base = os.path.join(diretorio, 'resumo_qualidade')
+    with open(base + '.json', 'w', encoding='utf-8') as arquivo:
+        json.dump(resumo, arquivo, indent=2, ensure_ascii=False)
+    with open(base + '.html', 'w', encoding='utf-8') as arquivo:
+        arquivo.write(resumo_html(resumo))
+    logging.info(f"Resumo de qualidade gravado em {base}.html")
+    return resumo
+
+
+def executar_relatorios(completo=False, somente_resumo=False, ge_root=None):
+    """
+    Gera o resumo estático e, salvo somente_resumo, os Data Docs (incrementais,
+    a menos que completo). O Great Expectations só é importado neste caso.
+    """
+    gerar_resumo()
+    if not somente_resumo:
+        from great_expectations.data_context import DataContext
+
+        context = DataContext(ge_root or os.path.join(os.getcwd(), "great_expectations"))
+        gerar_data_docs(context, incremental=not completo)
+        abrir_data_docs(context)
+    logging.info("Dashboard de qualidade finalizado.")
+
+
 if __name__ == "__main__":
-    ge_root = os.path.join(os.getcwd(), "great_expectations")
-    context = DataContext(ge_root)
-    gerar_data_docs(context)
-    abrir_data_docs(context)
-    logging.info("Dashboard de qualidade finalizado.")
\ No newline at end of file
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    parser = argparse.ArgumentParser(description="Gera os relatórios de qualidade.")
+    parser.add_argument("--completo", action="store_true",
+                        help="Reconstrói todos os Data Docs em vez de renderizar só as validações novas.")
+    parser.add_argument("--somente-resumo", action="store_true",
+                        help="Gera apenas o resumo estático, sem o Great Expectations.")
+    args = parser.parse_args()
+    executar_relatorios(completo=args.completo, somente_resumo=args.somente_resumo)
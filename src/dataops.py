@@ -0,0 +1,184 @@
+"""
+Ponto de entrada único do pipeline: python src/dataops.py <subcomando>.
+
+    ingest    ingestão dos datasets brutos (pipeline_ingestao.executar_ingestao)
+    correct   correção automática (correcao_automatica.executar_correcao)
+    enrich    enriquecimento (enriquecimento_dados.executar_enriquecimento)
+    validate  suítes salvas com o backend nativo (validacao_nativa.validar_processados)
+              ou, com --checkpoints, em lotes paralelos (checkpoints_config)
+    alerts    regras e tendências de alertas (sistema_alertas.executar_alertas)
+    docs      resumo de qualidade e Data Docs (dashboard_qualidade.executar_relatorios)
+    pipeline  grafo completo em paralelo (orquestrador.executar_pipeline)
+
+Este arquivo importa só a biblioteca padrão: o módulo de cada etapa (e com ele
+pandas, pyarrow ou o Great Expectations) é importado apenas quando o
+subcomando executa, então --help e erros de argumento respondem sem carregar
+nada disso. O tempo de inicialização é medido por benchmark.py --inicializacao.
+
+Com --backend sqlite (ou DATAOPS_BACKEND=sqlite) a correção, a validação e as
+métricas de alertas rodam no SQLite (backend_sql); a opção é repassada pelo
+ambiente, então vale também para os processos do pipeline.
+
+Os caminhos passados na linha de comando são resolvidos em relação ao diretório
+atual; em seguida o processo passa a rodar em src/, como os scripts das etapas
+(os caminhos padrão são relativos a ../data).
+"""
+
+import argparse
+import os
+import sys
+
+DIRETORIO_SRC = os.path.dirname(os.path.abspath(__file__))
+
+
+def _ambiente_incremental():
+    return os.environ.get("DATAOPS_INCREMENTAL") == "1"
+
+
+def _ambiente_bloco():
+    return int(os.environ.get("DATAOPS_TAMANHO_BLOCO", "0")) or None
+
+
+def _origem(valor):
+    dataset, separador, caminho = valor.partition('=')
+    if not separador or not dataset or not caminho:
+        raise argparse.ArgumentTypeError(f"esperado DATASET=CAMINHO, recebido '{valor}'")
+    return dataset, os.path.abspath(caminho)
+
+
+def ingest(args):
+    from pipeline_ingestao import executar_ingestao
+
+    kwargs = {'origens': dict(args.origem)}
+    if args.diretorio_origem:
+        kwargs['diretorio_origem'] = args.diretorio_origem
+    executar_ingestao(incremental=args.incremental, chunksize=args.tamanho_bloco, **kwargs)
+    return 0
+
+
+def correct(args):
+    from correcao_automatica import executar_correcao
+
+    executar_correcao(chunksize=args.tamanho_bloco, incremental=args.incremental)
+    return 0
+
+
+def enrich(args):
+    from enriquecimento_dados import executar_enriquecimento
+
+    executar_enriquecimento(incremental=args.incremental)
+    return 0
+
+
+def validate(args):
+    if args.checkpoints:
+        from checkpoints_config import DATASETS, executar_checkpoints, gravar_checkpoints
+        from armazenamento import caminho_processado
+
+        resultados = executar_checkpoints({f"{dataset}_suite": caminho_processado(f"{dataset}_corrigido")
+                                           for dataset in DATASETS}, max_workers=args.workers)
+        gravar_checkpoints(resultados)
+    else:
+        from validacao_nativa import validar_processados
+
+        resultados = validar_processados()
+    return 0 if all(r['success'] for r in resultados.values()) else 1
+
+
+def alerts(args):
+    from sistema_alertas import executar_alertas
+
+    executar_alertas()
+    return 0
+
+
+def docs(args):
+    from dashboard_qualidade import executar_relatorios
+
+    executar_relatorios(completo=args.completo, somente_resumo=args.somente_resumo)
+    return 0
+
+
+def pipeline(args):
+    from orquestrador import executar_pipeline
+
+    kwargs = {'diretorio_origem': args.diretorio_origem} if args.diretorio_origem else {}
+    resultados = executar_pipeline(args.workers, fail_fast=not args.continuar_em_erro,
+                                   chunksize=args.tamanho_bloco, incremental=args.incremental, **kwargs)
+    return 0 if all(r['status'] == 'ok' for r in resultados.values()) else 1
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="dataops", description="Pipeline DataOps da TechCommerce.")
+    subcomandos = parser.add_subparsers(dest="subcomando", metavar="subcomando", required=True)
+
+    incremental = argparse.ArgumentParser(add_help=False)
+    incremental.add_argument("--incremental", action="store_true", default=_ambiente_incremental(),
+                             help="Processa apenas as linhas novas (padrão: DATAOPS_INCREMENTAL=1).")
+    bloco = argparse.ArgumentParser(add_help=False)
+    bloco.add_argument("--tamanho-bloco", type=int, default=_ambiente_bloco(),
+                       help="Processa em blocos de N linhas (padrão: DATAOPS_TAMANHO_BLOCO).")
+    origem = argparse.ArgumentParser(add_help=False)
+    origem.add_argument("--diretorio-origem", type=os.path.abspath, default=None,
+                        help="Diretório dos CSVs brutos (padrão: notebooks/datasets).")
+    backend = argparse.ArgumentParser(add_help=False)
+    backend.add_argument("--backend", choices=["pandas", "sqlite"], default=None,
+                         help="Backend de correção, validação e alertas (padrão: DATAOPS_BACKEND ou pandas).")
+    workers = argparse.ArgumentParser(add_help=False)
+    workers.add_argument("--workers", type=int, default=os.cpu_count(), help="Número de processos do pool.")
+
+    sub = subcomandos.add_parser("ingest", aliases=["ingestao"], parents=[incremental, bloco, origem],
+                                 help="Ingestão e validação de schema dos datasets brutos.")
+    sub.add_argument("--origem", type=_origem, action="append", default=[], metavar="DATASET=CAMINHO",
+                     help="Arquivo, diretório ou glob de partições de um dataset (pode repetir).")
+    sub.set_defaults(executar=ingest)
+
+    sub = subcomandos.add_parser("correct", aliases=["correcao"], parents=[incremental, bloco, backend],
+                                 help="Correção automática dos datasets ingeridos.")
+    sub.set_defaults(executar=correct)
+
+    sub = subcomandos.add_parser("enrich", aliases=["enriquecimento"], parents=[incremental],
+                                 help="Enriquecimento dos datasets corrigidos.")
+    sub.set_defaults(executar=enrich)
+
+    sub = subcomandos.add_parser("validate", aliases=["validacao"], parents=[workers, backend],
+                                 help="Valida os datasets corrigidos com as suítes salvas (backend nativo).")
+    sub.add_argument("--checkpoints", action="store_true",
+                     help="Valida as quatro suítes em lotes paralelos (checkpoint_<suite>.json).")
+    sub.set_defaults(executar=validate)
+
+    sub = subcomandos.add_parser("alerts", aliases=["alertas"], parents=[backend],
+                                 help="Avalia as regras e tendências de alertas.")
+    sub.set_defaults(executar=alerts)
+
+    sub = subcomandos.add_parser("docs", aliases=["relatorios"], help="Resumo de qualidade e Data Docs.")
+    sub.add_argument("--completo", action="store_true",
+                     help="Reconstrói todos os Data Docs em vez de renderizar só as validações novas.")
+    sub.add_argument("--somente-resumo", action="store_true",
+                     help="Gera apenas o resumo estático, sem o Great Expectations.")
+    sub.set_defaults(executar=docs)
+
+    sub = subcomandos.add_parser("pipeline", parents=[incremental, bloco, origem, workers, backend],
+                                 help="Pipeline completo como um grafo de etapas paralelas.")
+    sub.add_argument("--continuar-em-erro", action="store_true",
+                     help="Continua as etapas independentes quando uma etapa falha.")
+    sub.set_defaults(executar=pipeline)
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if getattr(args, 'backend', None):
+        os.environ['DATAOPS_BACKEND'] = args.backend
+    os.chdir(DIRETORIO_SRC)
+    if DIRETORIO_SRC not in sys.path:
+        sys.path.insert(0, DIRETORIO_SRC)
+
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    return args.executar(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""
+Detecção de clientes quase duplicados com chaves de bloqueio.
+
+remover_duplicatas só encontra linhas idênticas; o mesmo cliente cadastrado
+duas vezes costuma diferir na caixa do email, na formatação do telefone ou nos
+acentos do nome. Comparar todos os pares é inviável, então cada cliente recebe
+três chaves de bloqueio e só clientes com alguma chave em comum são comparados:
+    email       email sem espaços e em minúsculas
+    telefone    últimos 8 dígitos do telefone
+    nome        código fonético do primeiro e do último nome + estado
+
+Dentro de cada bloco os candidatos são os vizinhos em uma janela de JANELA
+posições (ordenados pelo nome normalizado), o que limita o número de pares a
+O(n * JANELA) mesmo em blocos grandes (ex.: "joao silva|SP"). Cada par recebe
+uma pontuação vetorizada: similaridade do nome (MinHash dos bigramas da grafia
+e da fonética) e igualdade de email, telefone e data de nascimento, ponderadas
+por PESOS e normalizadas pelos campos preenchidos nos dois lados; datas de
+nascimento diferentes vetam o par. Pares com pontuação >=
+LIMIAR e evidência suficiente (MIN_EVIDENCIA) são ligados e os componentes
+conexos (union-find vetorizado) formam os clusters. Um registro sem data de
+nascimento pode ligar, por transitividade, duas pessoas com datas diferentes;
+nesses clusters as ligações dos registros sem data são desfeitas.
+
+Sobrevivência: em cada cluster sobrevive o registro mais completo, depois o de
+cadastro mais recente e, por fim, o de menor id_cliente; os campos vazios do
+sobrevivente são preenchidos com os valores dos demais registros, na mesma
+ordem de prioridade. O id do cluster é o id_cliente do sobrevivente.
+"""
+
+import logging
+import os
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import contar, instrumentar
+
+PESOS = {'nome': 0.4, 'email': 0.3, 'telefone': 0.2, 'data_nascimento': 0.1}
+LIMIAR = 0.75
+MIN_EVIDENCIA = 0.5
+JANELA = 10
+PERMUTACOES_MINHASH = 32
+PARES_POR_LOTE = 1_000_000
+SEMENTE_MINHASH = 20240101
+# valores de preenchimento da correção que equivalem a campo vazio
+VAZIOS = ('', 'email@naoinformado.com', 'cliente não informado')
+# campos que, preenchidos e diferentes, indicam pessoas distintas
+CONFLITOS = ('data_nascimento',)
+CAMPOS_COMPLETUDE = ('nome', 'email', 'telefone', 'data_nascimento', 'cidade', 'estado')
+
+# regras fonéticas simplificadas para nomes em português, aplicadas em ordem
+REGRAS_FONETICAS = (
+    (r'[^a-z ]', ''),
+    (r'ph', 'f'),
+    (r'th', 't'),
+    (r'lh', 'l'),
+    (r'nh', 'n'),
+    (r'[cs]h', 'x'),
+    (r'qu', 'k'),
+    (r'gu([ei])', r'G\1'),
+    (r'g([ei])', r'j\1'),
+    (r'c([ei])', r's\1'),
+    (r'[cqk]', 'k'),
+    (r'z', 's'),
+    (r'w', 'v'),
+    (r'y', 'i'),
+    (r'h', ''),
+    (r'([a-z])\1+', r'\1'),
+    (r'([^aeiou ])[aeiou]+\b', r'\1'),
+    (r'\s+', ' '),
+)
+VAZIOS_NOMES = tuple(unicodedata.normalize('NFKD', v).encode('ascii', 'ignore').decode('ascii') for v in VAZIOS)
+
+
+def _texto(serie):
+    return pd.Series(serie, copy=False).astype(object).where(pd.notna(serie), None)
+
+
+def _sem_acentos(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+def normalizar_nomes(serie):
+    """
+    Nome sem acentos, em minúsculas e com espaços simples; vazios viram None.
+    """
+    texto = _texto(serie)
+    codigos, unicos = pd.factorize(texto)
+    normalizados = pd.Series([' '.join(_sem_acentos(str(n)).lower().split()) for n in unicos], dtype=object)
+    normalizados = normalizados.where(~normalizados.isin(VAZIOS_NOMES), None)
+    resultado = normalizados.to_numpy(dtype=object)[codigos] if len(unicos) else np.full(len(texto), None)
+    resultado[codigos < 0] = None
+    return resultado
+
+
+def foneticas(nomes_normalizados):
+    """
+    Transcrição fonética simplificada (REGRAS_FONETICAS) de cada nome normalizado.
+    """
+    codigos, unicos = pd.factorize(pd.Series(nomes_normalizados, dtype=object))
+    fonetica = pd.Series(unicos, dtype=object)
+    for padrao, troca in REGRAS_FONETICAS:
+        fonetica = fonetica.str.replace(padrao, troca, regex=True)
+    fonetica = fonetica.str.lower().str.strip()
+    resultado = (fonetica.where(fonetica != '').to_numpy(dtype=object)[codigos] if len(unicos)
+                 else np.full(len(codigos), None, dtype=object))
+    resultado[codigos < 0] = None
+    return resultado
+
+
+def codigos_foneticos(foneticas_nomes):
+    """
+    Código de bloqueio: fonética do primeiro e do último nome (os do meio são ignorados).
+    """
+    partes = pd.Series(foneticas_nomes, dtype=object).str.split(' ')
+    return (partes.str[0] + ' ' + partes.str[-1].where(partes.str.len() > 1, '')).str.strip().to_numpy(dtype=object)
+
+
+def normalizar_emails(serie):
+    email = _texto(serie).str.strip().str.lower()
+    return email.where(~email.isin(VAZIOS) & email.str.contains('@', regex=False, na=False), None).to_numpy()
+
+
+def sufixos_telefone(serie, digitos=8):
+    numeros = _texto(serie).str.replace(r'\D', '', regex=True)
+    return numeros.where(numeros.str.len() >= digitos).str[-digitos:].to_numpy(dtype=object)
+
+
+def chaves_bloqueio(df):
+    """
+    Colunas normalizadas usadas na comparação e as três chaves de bloqueio de cada cliente.
+    """
+    nomes = normalizar_nomes(df['nome'])
+    estado = _texto(df['estado']).str.strip().str.upper().to_numpy(dtype=object) if 'estado' in df else None
+    fonetica = foneticas(nomes)
+    bloco_nome = pd.Series(codigos_foneticos(fonetica), dtype=object)
+    if estado is not None:
+        bloco_nome = bloco_nome + '|' + pd.Series(estado, dtype=object)
+    nascimento = (pd.to_datetime(df['data_nascimento'], errors='coerce', format='ISO8601').to_numpy()
+                  if 'data_nascimento' in df else np.full(len(df), np.datetime64('NaT')))
+    return pd.DataFrame({
+        'nome': nomes,
+        'fonetica': fonetica,
+        'email': normalizar_emails(df['email']),
+        'telefone': sufixos_telefone(df['telefone']),
+        'data_nascimento': nascimento,
+        'bloco_nome': bloco_nome.where(bloco_nome.str.len() > 2).to_numpy(dtype=object),
+    })
+
+
+def pares_candidatos(chaves, ordenacao=None, janela=JANELA):
+    """
+    Pares (i, j), i < j, de linhas com a mesma chave a até janela posições de
+    distância dentro do bloco ordenado por ordenacao.
+    """
+    chaves = pd.Series(chaves, dtype=object)
+    validas = np.flatnonzero(chaves.notna().to_numpy())
+    if len(validas) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    blocos = pd.factorize(chaves.iloc[validas])[0]
+    secundaria = (pd.factorize(pd.Series(ordenacao, dtype=object).iloc[validas], sort=True)[0]
+                  if ordenacao is not None else np.zeros(len(validas), dtype=np.int64))
+    ordem = np.lexsort((validas, secundaria, blocos))
+    linhas, blocos = validas[ordem], blocos[ordem]
+    pares = []
+    for distancia in range(1, janela + 1):
+        mesmo_bloco = blocos[:-distancia] == blocos[distancia:]
+        if not mesmo_bloco.any():
+            break
+        pares.append(np.column_stack([linhas[:-distancia][mesmo_bloco], linhas[distancia:][mesmo_bloco]]))
+    pares = np.concatenate(pares) if pares else np.empty((0, 2), dtype=np.int64)
+    return np.sort(pares, axis=1)
+
+
+def assinaturas_minhash(nomes, permutacoes=PERMUTACOES_MINHASH, semente=SEMENTE_MINHASH):
+    """
+    Assinatura MinHash dos bigramas de cada nome distinto. Retorna (índice do
+    nome distinto por linha, matriz de assinaturas); nomes vazios têm índice -1.
+    """
+    codigos, unicos = pd.factorize(pd.Series(nomes, dtype=object))
+    vocabulario, donos, bigramas = {}, [], []
+    for posicao, nome in enumerate(unicos):
+        texto = f' {nome} '
+        for i in range(len(texto) - 1):
+            bigramas.append(vocabulario.setdefault(texto[i:i + 2], len(vocabulario)))
+            donos.append(posicao)
+    assinaturas = np.zeros((len(unicos), permutacoes), dtype=np.uint32)
+    if not len(unicos):
+        return codigos, assinaturas
+    rng = np.random.default_rng(semente)
+    primo = np.uint64((1 << 31) - 1)
+    a = rng.integers(1, int(primo), size=permutacoes, dtype=np.uint64)
+    b = rng.integers(0, int(primo), size=permutacoes, dtype=np.uint64)
+    hashes = (np.asarray(bigramas, dtype=np.uint64)[:, None] * a + b) % primo
+    inicios = np.flatnonzero(np.r_[True, np.diff(donos) != 0])
+    assinaturas[:] = np.minimum.reduceat(hashes, inicios, axis=0).astype(np.uint32)
+    return codigos, assinaturas
+
+
+def _similaridade_minhash(valores, a, b):
+    """
+    (os dois lados preenchidos, Jaccard estimado dos bigramas) para cada par.
+    """
+    indices, assinaturas = assinaturas_minhash(valores)
+    ia, ib = indices[a], indices[b]
+    preenchidos = (ia >= 0) & (ib >= 0)
+    similaridade = np.zeros(len(ia))
+    for inicio in range(0, len(ia), PARES_POR_LOTE):
+        fatia = slice(inicio, inicio + PARES_POR_LOTE)
+        sa, sb = assinaturas[np.maximum(ia[fatia], 0)], assinaturas[np.maximum(ib[fatia], 0)]
+        similaridade[fatia] = np.where(preenchidos[fatia], (sa == sb).mean(axis=1), 0.0)
+    return preenchidos, similaridade
+
+
+def _iguais(valores, a, b):
+    """
+    (os dois lados preenchidos, valores iguais) para cada par.
+    """
+    codigos = pd.factorize(pd.Series(valores))[0]
+    preenchidos = (codigos[a] >= 0) & (codigos[b] >= 0)
+    return preenchidos, preenchidos & (codigos[a] == codigos[b])
+
+
+def pontuar_pares(normalizados, pares, pesos=PESOS):
+    """
+    Pontuação de cada par: média ponderada das similaridades dos campos
+    preenchidos nos dois lados, e o peso total desses campos (evidência).
+    A similaridade do nome é a média entre a grafia normalizada e a fonética,
+    para que "Thiago Souza" e "Tiago Sousa" fiquem próximos. Datas de nascimento
+    preenchidas e diferentes vetam o par (pontuação 0).
+    """
+    a, b = pares[:, 0], pares[:, 1]
+    preenchidos, grafia = _similaridade_minhash(normalizados['nome'], a, b)
+    _, som = _similaridade_minhash(normalizados['fonetica'], a, b)
+    soma = pesos['nome'] * (grafia + som) / 2
+    evidencia = pesos['nome'] * preenchidos
+    vetados = np.zeros(len(pares), dtype=bool)
+    for campo in ('email', 'telefone', 'data_nascimento'):
+        preenchidos, iguais = _iguais(normalizados[campo], a, b)
+        soma = soma + pesos[campo] * iguais
+        evidencia = evidencia + pesos[campo] * preenchidos
+        if campo in CONFLITOS:
+            vetados |= preenchidos & ~iguais
+    pontuacao = np.divide(soma, evidencia, out=np.zeros(len(pares)), where=evidencia > 0)
+    pontuacao[vetados] = 0.0
+    return pontuacao, evidencia
+
+
+def componentes_conexos(n, a, b):
+    """
+    Union-find vetorizado: propaga o menor rótulo pelas arestas (a, b) e comprime
+    os caminhos por saltos de ponteiro até estabilizar. Retorna o rótulo (raiz) de cada nó.
+    """
+    rotulos = np.arange(n)
+    if not len(a):
+        return rotulos
+    while True:
+        ra, rb = rotulos[a], rotulos[b]
+        menor = np.minimum(ra, rb)
+        novos = rotulos.copy()
+        np.minimum.at(novos, ra, menor)
+        np.minimum.at(novos, rb, menor)
+        while True:
+            saltos = novos[novos]
+            if np.array_equal(saltos, novos):
+                break
+            novos = saltos
+        if np.array_equal(novos, rotulos):
+            return rotulos
+        rotulos = novos
+
+
+def separar_conflitos(n, a, b, valores):
+    """
+    Componentes conexos sem conflito: em componentes que juntam valores
+    preenchidos diferentes (ligados por registros sem valor), as arestas dos
+    registros sem valor são removidas. As arestas restantes ligam apenas
+    registros com o mesmo valor (o par já foi vetado caso contrário).
+    """
+    raizes = componentes_conexos(n, a, b)
+    codigos = pd.factorize(pd.Series(valores))[0]
+    com_valor = codigos >= 0
+    distintos = pd.Series(codigos[com_valor]).groupby(raizes[com_valor]).nunique()
+    conflitantes = np.zeros(n, dtype=bool)
+    conflitantes[distintos.index[distintos.to_numpy() > 1]] = True
+    if not conflitantes.any():
+        return raizes, a, b
+    soltas = conflitantes[raizes] & ~com_valor
+    manter = ~(soltas[a] | soltas[b])
+    logging.info(f"{int(soltas.sum())} registros sem {getattr(valores, 'name', 'valor')} separados de clusters conflitantes.")
+    return componentes_conexos(n, a[manter], b[manter]), a[manter], b[manter]
+
+
+def _sem_vazios(df):
+    """
+    Cópia de df (object) com None nos campos vazios e nos valores de preenchimento da correção.
+    """
+    limpo = df.astype(object).where(df.notna(), None)
+    for coluna in limpo.columns:
+        if pd.api.types.infer_dtype(limpo[coluna], skipna=True) not in ('string', 'mixed'):
+            continue
+        texto = limpo[coluna].str.strip().str.lower()
+        limpo[coluna] = limpo[coluna].where(~texto.isin(VAZIOS), None)
+    return limpo
+
+
+def prioridade_sobrevivencia(df):
+    """
+    Ordem de sobrevivência: mais campos preenchidos, cadastro mais recente,
+    menor id_cliente. Retorna as posições das linhas nessa ordem.
+    """
+    completude = _sem_vazios(df[[c for c in CAMPOS_COMPLETUDE if c in df.columns]]).notna().sum(axis=1).to_numpy()
+    if 'data_cadastro' in df:
+        cadastro = pd.to_datetime(df['data_cadastro'], errors='coerce', format='ISO8601').fillna(pd.Timestamp.min)
+        recencia = np.unique(cadastro.to_numpy(dtype='datetime64[ns]'), return_inverse=True)[1]
+    else:
+        recencia = np.zeros(len(df), dtype=np.int64)
+    ids = pd.to_numeric(df['id_cliente'], errors='coerce').to_numpy(dtype='float64', na_value=np.inf)
+    return np.lexsort((ids, -recencia, -completude))
+
+
+def agrupar_clientes(df, limiar=LIMIAR, janela=JANELA, pesos=PESOS):
+    """
+    Retorna (cluster de cada linha = id_cliente do sobrevivente, posição da
+    linha sobrevivente de cada linha, número de pares comparados).
+    """
+    n = len(df)
+    normalizados = chaves_bloqueio(df)
+    pares = [pares_candidatos(normalizados['email'], normalizados['nome'], janela),
+             pares_candidatos(normalizados['telefone'], normalizados['nome'], janela),
+             pares_candidatos(normalizados['bloco_nome'], normalizados['nome'], janela)]
+    pares = np.concatenate(pares)
+    # o mesmo par pode vir de mais de uma chave de bloqueio
+    codigos = np.unique(pares[:, 0] * n + pares[:, 1])
+    pares = np.column_stack([codigos // n, codigos % n])
+    pontuacao, evidencia = pontuar_pares(normalizados, pares, pesos)
+    ligados = pares[(pontuacao >= limiar) & (evidencia >= MIN_EVIDENCIA)]
+    raizes, *_ = separar_conflitos(n, ligados[:, 0], ligados[:, 1], normalizados['data_nascimento'])
+
+    # o id do cluster é o id_cliente do registro sobrevivente
+    posicao = np.empty(n, dtype=np.int64)
+    posicao[prioridade_sobrevivencia(df)] = np.arange(n)
+    melhor = np.full(n, n, dtype=np.int64)
+    np.minimum.at(melhor, raizes, posicao)
+    sobrevivente_por_posicao = np.empty(n, dtype=np.int64)
+    sobrevivente_por_posicao[posicao] = np.arange(n)
+    sobreviventes = sobrevivente_por_posicao[melhor[raizes]]
+    clusters = df['id_cliente'].to_numpy()[sobreviventes]
+    logging.info(f"Deduplicação de clientes: {len(pares)} pares comparados, {len(ligados)} ligados, "
+                 f"{len(np.unique(raizes))} clusters para {n} registros.")
+    return clusters, sobreviventes, len(pares)
+
+
+def consolidar_clientes(df, limiar=LIMIAR, janela=JANELA, pesos=PESOS):
+    """
+    Retorna (clientes consolidados, mapa id_cliente -> cluster_id). Cada cluster
+    vira uma linha: o sobrevivente com os campos vazios preenchidos pelos demais
+    registros do cluster, em ordem de prioridade de sobrevivência.
+    """
+    df = df.reset_index(drop=True)
+    clusters, sobreviventes, _ = agrupar_clientes(df, limiar, janela, pesos)
+    mapa = pd.DataFrame({'id_cliente': df['id_cliente'].to_numpy(), 'cluster_id': clusters,
+                         'sobrevivente': sobreviventes == np.arange(len(df))})
+
+    # agrupa pela linha sobrevivente: ids repetidos em clusters diferentes não se misturam
+    ordem = prioridade_sobrevivencia(df)
+    ordenado, grupos = df.iloc[ordem].reset_index(drop=True), sobreviventes[ordem]
+    consolidado = _sem_vazios(ordenado).groupby(grupos, sort=False).first()
+    # campos vazios em todo o cluster ficam como estavam no sobrevivente ('' ou o valor de preenchimento)
+    sobrevivente = ordenado.astype(object)[~pd.Series(grupos).duplicated().to_numpy()].set_axis(consolidado.index)
+    consolidado = consolidado.fillna(sobrevivente).sort_index().reset_index(drop=True)[df.columns]
+    for coluna in df.columns:
+        try:
+            consolidado[coluna] = consolidado[coluna].astype(df[coluna].dtype)
+        except (TypeError, ValueError):
+            pass
+    return consolidado, mapa
+
+
+@instrumentar()
+def deduplicar_clientes(path_in, path_out, path_mapa, limiar=LIMIAR, janela=JANELA):
+    """
+    Consolida os clientes quase duplicados de path_in em path_out e grava o mapa
+    id_cliente -> cluster_id em path_mapa (para remapear as vendas).
+    """
+    from armazenamento import salvar_tabela
+    from carregador import carregar_tabela
+    from planos_tipos import PLANOS
+
+    df = carregar_tabela(path_in, dtypes=PLANOS['clientes'])
+    contar('linhas_entrada', len(df))
+    consolidado, mapa = consolidar_clientes(df, limiar, janela)
+    contar('removidas_duplicatas', len(df) - len(consolidado))
+    contar('linhas_saida', len(consolidado))
+    salvar_tabela(consolidado, path_out)
+    salvar_tabela(mapa, path_mapa)
+    logging.info(f"Clientes consolidados: {len(df)} -> {len(consolidado)}.")
+    return len(df) - len(consolidado)
+
+
+if __name__ == "__main__":
+    from armazenamento import caminho_processado
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    os.makedirs('../data/processed', exist_ok=True)
+    deduplicar_clientes(caminho_processado("clientes_corrigido"), caminho_processado("clientes_consolidado"),
+                        caminho_processado("clientes_clusters"))
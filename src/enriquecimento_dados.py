@@ -1,28 +1,15 @@
 import pandas as pd
 import logging
+import os
 from datetime import datetime
-
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-
-def geocodificar_cidade(cidade):
-    # Simulação: retorna latitude/longitude fictícia por cidade
-    cidades_fake = {
-        "São Paulo": (-23.5505, -46.6333),
-        "Rio de Janeiro": (-22.9068, -43.1729),
-        "Belo Horizonte": (-19.9167, -43.9345)
-    }
-    return cidades_fake.get(cidade, (0.0, 0.0))
-
-def categorizar_produto(nome):
-    # Simulação: categorização simples por palavra-chave
-    if "Smartphone" in nome:
-        return "Eletrônicos"
-    elif "Notebook" in nome:
-        return "Informática"
-    elif "Mouse" in nome or "Teclado" in nome:
-        return "Acessórios"
-    else:
-        return "Outros"
+from armazenamento import caminho_processado, salvar_tabela
+from carregador import carregar_tabela
+from categorizacao import categorizar_produto, categorizar_produtos
+from geocodificacao import geocodificar_cidade, geocodificar_lote
+from incremental import processar_incremental
+from instrumentacao import contar, instrumentar
+from motor_datas import calcular_idades, calcular_tempos_entrega
+from planos_tipos import PLANOS
 
 def calcular_idade(data_nascimento):
     try:
@@ -45,32 +32,74 @@ def calcular_tempo_entrega(data_envio, data_entrega_real):
 
 def flag_qualidade_clientes(df):
     # Exemplo: flag para email válido e nome preenchido
-    df['flag_email_valido'] = df['email'].str.contains(r'^[\w\.-]+@[\w\.-]+\.\w+$', na=False)
+    # object garante a semântica do módulo re (\w unicode) também em colunas string Arrow
+    df['flag_email_valido'] = df['email'].astype(object).str.contains(r'^[\w\.-]+@[\w\.-]+\.\w+$', na=False)
     df['flag_nome_preenchido'] = df['nome'].notnull() & (df['nome'] != "")
     return df
 
-def enriquecer_clientes(path_in, path_out):
-    df = pd.read_csv(path_in)
-    df[['latitude', 'longitude']] = df['cidade'].apply(lambda x: pd.Series(geocodificar_cidade(x)))
-    df['idade'] = df['data_nascimento'].apply(calcular_idade)
-    df = flag_qualidade_clientes(df)
-    df.to_csv(path_out, index=False)
+def _enriquecer_clientes(df):
+    df[['latitude', 'longitude']] = geocodificar_lote(df['cidade'], df['estado'])
+    df['idade'] = calcular_idades(df['data_nascimento'])
+    return flag_qualidade_clientes(df)
+
+def _enriquecer_produtos(df):
+    df['categoria_auto'] = categorizar_produtos(df['nome_produto'])
+    return df
+
+def _enriquecer_logistica(df):
+    df['tempo_entrega'] = calcular_tempos_entrega(df['data_envio'], df['data_entrega_real'])
+    return df
+
+@instrumentar()
+def enriquecer_clientes(path_in, path_out, incremental=False):
+    if incremental:
+        processar_incremental('enriquecer_clientes', path_in, path_out, 'id_cliente', ['id_cliente', 'email'],
+                              _enriquecer_clientes)
+    else:
+        df = carregar_tabela(path_in, dtypes=PLANOS['clientes'])
+        contar('linhas_entrada', len(df))
+        df = _enriquecer_clientes(df)
+        contar('linhas_saida', len(df))
+        salvar_tabela(df, path_out)
     logging.info("Enriquecimento de clientes concluído.")
 
-def enriquecer_produtos(path_in, path_out):
-    df = pd.read_csv(path_in)
-    df['categoria_auto'] = df['nome_produto'].apply(categorizar_produto)
-    df.to_csv(path_out, index=False)
+@instrumentar()
+def enriquecer_produtos(path_in, path_out, incremental=False):
+    if incremental:
+        processar_incremental('enriquecer_produtos', path_in, path_out, 'id_produto', ['id_produto', 'nome_produto'],
+                              _enriquecer_produtos)
+    else:
+        df = carregar_tabela(path_in, dtypes=PLANOS['produtos'])
+        contar('linhas_entrada', len(df))
+        df = _enriquecer_produtos(df)
+        contar('linhas_saida', len(df))
+        salvar_tabela(df, path_out)
     logging.info("Enriquecimento de produtos concluído.")
 
-def enriquecer_logistica(path_in, path_out):
-    df = pd.read_csv(path_in)
-    df['tempo_entrega'] = df.apply(lambda x: calcular_tempo_entrega(x['data_envio'], x['data_entrega_real']), axis=1)
-    df.to_csv(path_out, index=False)
+@instrumentar()
+def enriquecer_logistica(path_in, path_out, incremental=False):
+    if incremental:
+        processar_incremental('enriquecer_logistica', path_in, path_out, 'id_entrega', ['id_entrega'],
+                              _enriquecer_logistica)
+    else:
+        df = carregar_tabela(path_in, dtypes=PLANOS['logistica'])
+        contar('linhas_entrada', len(df))
+        df = _enriquecer_logistica(df)
+        contar('linhas_saida', len(df))
+        salvar_tabela(df, path_out)
     logging.info("Enriquecimento de logística concluído.")
 
+def executar_enriquecimento(incremental=False):
+    """
+    Enriquece clientes, produtos e logística já corrigidos.
+    """
+    enriquecer_clientes(caminho_processado("clientes_corrigido"), caminho_processado("clientes_enriquecido"), incremental=incremental)
+    enriquecer_produtos(caminho_processado("produtos_corrigido"), caminho_processado("produtos_enriquecido"), incremental=incremental)
+    enriquecer_logistica(caminho_processado("logistica_corrigido"), caminho_processado("logistica_enriquecido"), incremental=incremental)
+    logging.info("Enriquecimento de dados finalizado.")
+
 if __name__ == "__main__":
-    enriquecer_clientes("../data/processed/clientes_corrigido.csv", "../data/processed/clientes_enriquecido.csv")
-    enriquecer_produtos("../data/processed/produtos_corrigido.csv", "../data/processed/produtos_enriquecido.csv")
-    enriquecer_logistica("../data/processed/logistica_corrigido.csv", "../data/processed/logistica_enriquecido.csv")
-    logging.info("Enriquecimento de dados finalizado.")
\ No newline at end of file
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    executar_enriquecimento(incremental=os.environ.get("DATAOPS_INCREMENTAL") == "1")
\ No newline at end of file
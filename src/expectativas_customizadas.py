@@ -0,0 +1,106 @@
+"""
+Expectativas customizadas do Great Expectations.
+
+expect_column_values_to_be_in_key_index verifica integridade referencial contra
+um índice de chaves gravado por indice_chaves (array ordenado de hashes aberto
+com memory map) em vez de embutir a dimensão inteira na suíte como um
+value_set. A suíte guarda apenas o caminho do índice; a origem registrada ao
+lado dele é conferida a cada validação (abrir_indice).
+
+expect_column_values_to_be_close compara a coluna com o produto das colunas
+em other (nomes, ex.: ["quantidade", "valor_unitario"] para valor_total), com
+tolerância atol + rtol * |referência|, a mesma regra do backend nativo
+(validacao_nativa). O Great Expectations não tem essa expectativa no core e a
+condição de coluna padrão só enxerga a própria coluna, por isso a métrica é
+declarada com metric_partial, que dá acesso às demais colunas do lote.
+
+Importar este módulo registra as expectativas no Great Expectations.
+"""
+
+import numpy as np
+import pandas as pd
+from great_expectations.core.metric_domain_types import MetricDomainTypes
+from great_expectations.core.metric_function_types import MetricPartialFunctionTypes
+from great_expectations.execution_engine import PandasExecutionEngine
+from great_expectations.expectations.expectation import ColumnMapExpectation
+from great_expectations.expectations.metrics import ColumnMapMetricProvider, column_condition_partial
+from great_expectations.expectations.metrics.metric_provider import metric_partial
+
+from indice_chaves import abrir_indice
+
+
+class ColumnValuesInKeyIndex(ColumnMapMetricProvider):
+    condition_metric_name = "column_values.in_key_index"
+    condition_value_keys = ("indice",)
+
+    @column_condition_partial(engine=PandasExecutionEngine)
+    def _pandas(cls, column, indice, **kwargs):
+        return pd.Series(abrir_indice(indice).contem(column), index=column.index)
+
+
+class ExpectColumnValuesToBeInKeyIndex(ColumnMapExpectation):
+    """
+    Espera que os valores da coluna existam no índice de chaves informado
+    (caminho do .npy gerado por indice_chaves.indice_chaves).
+    """
+
+    map_metric = "column_values.in_key_index"
+    success_keys = ("indice", "mostly")
+    default_kwarg_values = {
+        "row_condition": None,
+        "condition_parser": None,
+        "mostly": 1.0,
+        "result_format": "BASIC",
+        "include_config": True,
+        "catch_exceptions": False,
+    }
+    args_keys = ("column", "indice")
+    library_metadata = {
+        "tags": ["integridade referencial"],
+        "contributors": [],
+    }
+
+
+class ColumnValuesCloseToProduct(ColumnMapMetricProvider):
+    condition_metric_name = "column_values.close_to_product"
+    condition_value_keys = ("other", "atol", "rtol")
+
+    @metric_partial(engine=PandasExecutionEngine, partial_fn_type=MetricPartialFunctionTypes.MAP_CONDITION_SERIES,
+                    domain_type=MetricDomainTypes.COLUMN)
+    def _pandas(cls, execution_engine, metric_domain_kwargs, metric_value_kwargs, metrics, runtime_configuration):
+        df, compute_domain_kwargs, accessor_domain_kwargs = execution_engine.get_compute_domain(
+            domain_kwargs=metric_domain_kwargs, domain_type=MetricDomainTypes.COLUMN)
+        coluna = accessor_domain_kwargs["column"]
+        df = df[df[coluna].notnull()]
+        outras = metric_value_kwargs["other"]
+        referencia = np.ones(len(df))
+        for outra in [outras] if isinstance(outras, str) else outras:
+            referencia = referencia * pd.to_numeric(df[outra], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        valores = pd.to_numeric(df[coluna], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        tolerancia = (metric_value_kwargs.get("atol") or 0.0) + (metric_value_kwargs.get("rtol") or 0.0) * np.abs(referencia)
+        return pd.Series(~(np.abs(valores - referencia) <= tolerancia), index=df.index), compute_domain_kwargs, accessor_domain_kwargs
+
+
+class ExpectColumnValuesToBeClose(ColumnMapExpectation):
+    """
+    Espera que os valores da coluna fiquem a atol + rtol * |referência| do
+    produto das colunas em other (nome ou lista de nomes).
+    """
+
+    map_metric = "column_values.close_to_product"
+    success_keys = ("other", "atol", "rtol", "mostly")
+    default_kwarg_values = {
+        "row_condition": None,
+        "condition_parser": None,
+        "atol": 0.0,
+        "rtol": 0.0,
+        "mostly": 1.0,
+        "result_format": "BASIC",
+        "include_config": True,
+        "catch_exceptions": False,
+    }
+    args_keys = ("column", "other")
+    library_metadata = {
+        "tags": ["consistência entre colunas"],
+        "contributors": [],
+    }
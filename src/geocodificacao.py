@@ -0,0 +1,203 @@
+"""
+Geocodificação offline de municípios a partir de um gazetteer local.
+
+O gazetteer é um CSV com as colunas cidade, estado, latitude e longitude
+(config/municipios.csv traz as capitais; em produção aponte DATAOPS_MUNICIPIOS
+para a lista completa do IBGE). Na primeira carga ele é compilado em uma tabela
+hash de endereçamento aberto gravada em ../data/cache/geocodificacao como
+arquivos .npy; as execuções seguintes abrem esses arquivos com memory map, sem
+reprocessar o CSV, e reconstroem o índice apenas se o gazetteer mudar.
+
+As chaves são o nome da cidade normalizado (sem acentos, casefold, espaços
+colapsados) mais a UF; cidades cujo nome é único no país também são indexadas
+sem UF. Consultas em lote resolvem só os pares (cidade, estado) distintos.
+"""
+
+import json
+import logging
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from normalizacao_texto import normalizar_nomes
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_MUNICIPIOS = os.environ.get('DATAOPS_MUNICIPIOS', os.path.join(RAIZ_PROJETO, 'config', 'municipios.csv'))
+DIRETORIO_CACHE = '../data/cache/geocodificacao'
+COORDENADA_PADRAO = (0.0, 0.0)
+ARRAYS = ('hashes', 'posicoes', 'coordenadas')
+
+
+def _chaves(cidades, estados):
+    cidades = normalizar_nomes(pd.Series(cidades))
+    estados = normalizar_nomes(pd.Series(estados)).str.upper()
+    return (cidades + '|' + estados).to_numpy(dtype=object)
+
+
+def _hash(chaves):
+    return pd.util.hash_array(np.asarray(chaves, dtype=object))
+
+
+class IndiceMunicipios:
+    """
+    Tabela hash de endereçamento aberto (sondagem linear) em arrays numpy.
+
+    hashes[slot] guarda o hash da chave e posicoes[slot] a linha em coordenadas
+    (-1 = slot vazio). A capacidade é uma potência de 2 com fator de carga <= 0.5,
+    então a consulta custa O(1) esperado e max_sondagens limita o pior caso.
+    """
+
+    def __init__(self, hashes, posicoes, coordenadas, max_sondagens):
+        self.hashes = hashes
+        self.posicoes = posicoes
+        self.coordenadas = coordenadas
+        self.max_sondagens = max_sondagens
+        self.mascara = np.uint64(len(hashes) - 1)
+
+    @classmethod
+    def construir(cls, gazetteer):
+        chaves_uf = _chaves(gazetteer['cidade'], gazetteer['estado'])
+        nomes = normalizar_nomes(gazetteer['cidade'])
+        unicos = ~nomes.duplicated(keep=False).to_numpy()
+        chaves_nome = (nomes[unicos] + '|').to_numpy(dtype=object)
+        chaves = np.concatenate([chaves_uf, chaves_nome])
+        linhas = np.concatenate([np.arange(len(gazetteer)), np.flatnonzero(unicos)])
+
+        capacidade = 1 << max(int(2 * len(chaves)) - 1, 1).bit_length()
+        hashes = np.zeros(capacidade, dtype=np.uint64)
+        posicoes = np.full(capacidade, -1, dtype=np.int64)
+        max_sondagens = 1
+        for h, linha in zip(_hash(chaves), linhas):
+            slot, sondagens = int(h) & (capacidade - 1), 1
+            while posicoes[slot] >= 0 and hashes[slot] != h:
+                slot, sondagens = (slot + 1) & (capacidade - 1), sondagens + 1
+            if posicoes[slot] < 0:
+                hashes[slot], posicoes[slot] = h, linha
+            max_sondagens = max(max_sondagens, sondagens)
+        coordenadas = gazetteer[['latitude', 'longitude']].to_numpy(dtype='float64')
+        return cls(hashes, posicoes, coordenadas, max_sondagens)
+
+    def buscar(self, chaves):
+        """
+        Retorna a linha do gazetteer de cada chave (-1 quando não encontrada).
+        """
+        h = _hash(chaves)
+        resultado = np.full(len(h), -1, dtype=np.int64)
+        slots = h & self.mascara
+        pendentes = np.arange(len(h))
+        for _ in range(self.max_sondagens):
+            if not len(pendentes):
+                break
+            posicoes = self.posicoes[slots[pendentes]]
+            achou = (posicoes >= 0) & (self.hashes[slots[pendentes]] == h[pendentes])
+            resultado[pendentes[achou]] = posicoes[achou]
+            continuar = (posicoes >= 0) & ~achou
+            pendentes = pendentes[continuar]
+            slots[pendentes] = (slots[pendentes] + np.uint64(1)) & self.mascara
+        return resultado
+
+    def salvar(self, diretorio, origem):
+        """
+        Grava o índice sem expor arquivos pela metade a estágios paralelos: cada
+        gravação é uma geração (<array>.<geração>.npy, escritos em temporários e
+        trocados com os.replace), e o meta.json que aponta para ela é trocado
+        por último. Arrays de outras gerações são removidos em seguida; quem já
+        os abriu com memory map continua lendo a versão antiga.
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        geracao = f"{os.getpid()}-{time.time_ns()}"
+        for nome in ARRAYS:
+            temporario = os.path.join(diretorio, f"{nome}.{geracao}.tmp")
+            with open(temporario, 'wb') as destino:
+                np.save(destino, getattr(self, nome))
+            os.replace(temporario, os.path.join(diretorio, f"{nome}.{geracao}.npy"))
+        temporario = os.path.join(diretorio, f"meta.{geracao}.tmp")
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'origem': origem, 'max_sondagens': self.max_sondagens, 'geracao': geracao}, arquivo)
+        os.replace(temporario, os.path.join(diretorio, 'meta.json'))
+        for nome in os.listdir(diretorio):
+            if nome.endswith('.npy') and not nome.endswith(f".{geracao}.npy"):
+                try:
+                    os.remove(os.path.join(diretorio, nome))
+                except OSError:
+                    pass
+
+    @classmethod
+    def abrir(cls, diretorio, origem):
+        """
+        Abre o índice gravado com memory map; retorna None se não existir, se
+        tiver sido construído a partir de outra versão do gazetteer ou se a
+        geração apontada pelo meta.json já tiver sido substituída.
+        """
+        try:
+            with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as arquivo:
+                meta = json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+        if meta.get('origem') != origem or 'geracao' not in meta:
+            return None
+        try:
+            arrays = [np.load(os.path.join(diretorio, f"{nome}.{meta['geracao']}.npy"), mmap_mode='r')
+                      for nome in ARRAYS]
+        except (OSError, ValueError):
+            return None
+        return cls(*arrays, meta['max_sondagens'])
+
+
+def _caminho_relativo(caminho):
+    # relativo à raiz do projeto, para o meta.json não embutir o diretório da máquina
+    try:
+        return os.path.relpath(os.path.abspath(caminho), RAIZ_PROJETO).replace(os.sep, '/')
+    except ValueError:
+        return os.path.abspath(caminho)
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return {'caminho': _caminho_relativo(caminho), 'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+@lru_cache(maxsize=None)
+def indice_municipios(caminho=ARQUIVO_MUNICIPIOS, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Índice do gazetteer, aberto do cache em disco ou reconstruído se necessário.
+    """
+    origem = _assinatura(caminho)
+    indice = IndiceMunicipios.abrir(diretorio_cache, origem)
+    if indice is None:
+        logging.info(f"Compilando índice de municípios a partir de {caminho}.")
+        indice = IndiceMunicipios.construir(pd.read_csv(caminho))
+        try:
+            indice.salvar(diretorio_cache, origem)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar o cache de geocodificação: {e}")
+    return indice
+
+
+def geocodificar_lote(cidades, estados=None):
+    """
+    Geocodifica colunas inteiras resolvendo apenas os pares distintos.
+    Retorna um DataFrame com latitude e longitude alinhado ao índice de cidades.
+    """
+    cidades = pd.Series(cidades)
+    estados = pd.Series(estados, index=cidades.index) if estados is not None else pd.Series('', index=cidades.index)
+    codigos, unicos = pd.MultiIndex.from_arrays([cidades.astype(object).fillna(''), estados.astype(object).fillna('')]).factorize()
+    indice = indice_municipios()
+    linhas = indice.buscar(_chaves(unicos.get_level_values(0), unicos.get_level_values(1)))
+    coordenadas = np.full((len(unicos), 2), COORDENADA_PADRAO, dtype='float64')
+    achou = linhas >= 0
+    coordenadas[achou] = indice.coordenadas[linhas[achou]]
+    resultado = coordenadas[codigos]
+    return pd.DataFrame(resultado, index=cidades.index, columns=['latitude', 'longitude'])
+
+
+@lru_cache(maxsize=4096)
+def geocodificar_cidade(cidade, estado=None):
+    """
+    Retorna (latitude, longitude) de uma cidade; (0.0, 0.0) quando não encontrada.
+    """
+    linha = geocodificar_lote([cidade], [estado or ''])
+    return tuple(float(v) for v in linha.iloc[0])
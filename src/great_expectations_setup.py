@@ -6,9 +6,9 @@ import os
 import subprocess
 import logging
 import pandas as pd
-import great_expectations as ge
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+from carregador import carregar_tabela
+from indice_chaves import caminho_indice, indice_chaves
 
 def init_ge_project(project_root="great_expectations"):
     """
@@ -60,17 +60,79 @@ def ensure_pandas_datasource(context, datasource_name="pandas_datasource"):
         logging.error(f"Falha ao criar datasource '{datasource_name}': {e}")
         return False
 
-def create_expectation_suite_for_clientes(context, path_to_csv, suite_name="clientes_suite"):
-    df = pd.read_csv(path_to_csv)
-    context.create_expectation_suite(expectation_suite_name=suite_name, overwrite_existing=True)
-    batch_request = {
-        "datasource_name": "pandas_datasource",
-        "data_connector_name": "default_runtime_data_connector_name",
-        "data_asset_name": "clientes_runtime",
-        "runtime_parameters": {"batch_data": df},
-        "batch_identifiers": {"default_identifier_name": "clientes_1"},
+def ensure_sql_datasource(context, datasource_name="sqlite_datasource", banco=None):
+    """
+    Garante uma datasource com SqlAlchemyExecutionEngine sobre o banco do
+    backend_sql (DATAOPS_BANCO_SQL), para validar as tabelas já carregadas
+    sem trazê-las para a memória. Os assets são as tabelas de
+    backend_sql.nome_tabela(caminho).
+    """
+    from backend_sql import ARQUIVO_BANCO
+
+    try:
+        if datasource_name in context.list_datasources():
+            logging.info(f"Datasource '{datasource_name}' já existe.")
+            return True
+    except Exception:
+        pass
+
+    datasource_config = {
+        "name": datasource_name,
+        "class_name": "Datasource",
+        "execution_engine": {
+            "class_name": "SqlAlchemyExecutionEngine",
+            "connection_string": f"sqlite:///{os.path.abspath(banco or ARQUIVO_BANCO)}",
+        },
+        "data_connectors": {
+            "default_runtime_data_connector_name": {
+                "class_name": "RuntimeDataConnector",
+                "batch_identifiers": ["default_identifier_name"],
+            },
+            "default_inferred_data_connector_name": {
+                "class_name": "InferredAssetSqlDataConnector",
+                "include_schema_name": False,
+            },
+        },
     }
-    validator = context.get_validator(batch_request=batch_request, expectation_suite_name=suite_name)
+
+    try:
+        context.add_datasource(**datasource_config)
+        logging.info(f"Datasource '{datasource_name}' criada com sucesso.")
+        return True
+    except Exception as e:
+        logging.error(f"Falha ao criar datasource '{datasource_name}': {e}")
+        return False
+
+def _nova_suite(context, suite_name):
+    """
+    Cria (ou substitui) uma suíte vazia: create_expectation_suite não existe mais
+    nos contextos locais do Great Expectations 0.18.
+    """
+    if hasattr(context, "add_or_update_expectation_suite"):
+        context.add_or_update_expectation_suite(expectation_suite_name=suite_name)
+    else:
+        context.create_expectation_suite(expectation_suite_name=suite_name, overwrite_existing=True)
+
+def obter_validator(context, df, nome, suite_name, datasource_name="pandas_datasource"):
+    """
+    Validator do Great Expectations para df (RuntimeBatchRequest sobre a
+    datasource de ensure_pandas_datasource; o 0.18 não aceita mais o dict).
+    """
+    from great_expectations.core.batch import RuntimeBatchRequest
+
+    batch_request = RuntimeBatchRequest(
+        datasource_name=datasource_name,
+        data_connector_name="default_runtime_data_connector_name",
+        data_asset_name=f"{nome}_runtime",
+        runtime_parameters={"batch_data": df},
+        batch_identifiers={"default_identifier_name": f"{nome}_1"},
+    )
+    return context.get_validator(batch_request=batch_request, expectation_suite_name=suite_name)
+
+def create_expectation_suite_for_clientes(context, path_to_csv, suite_name="clientes_suite"):
+    df = carregar_tabela(path_to_csv)
+    _nova_suite(context, suite_name)
+    validator = obter_validator(context, df, "clientes", suite_name)
     validator.expect_column_values_to_not_be_null("id_cliente")
     validator.expect_column_values_to_be_unique("id_cliente")
     validator.expect_column_values_to_not_be_null("nome")
@@ -81,16 +143,9 @@ def create_expectation_suite_for_clientes(context, path_to_csv, suite_name="clie
     logging.info(f"Expectation suite '{suite_name}' criada para clientes.")
 
 def create_expectation_suite_for_produtos(context, path_to_csv, suite_name="produtos_suite"):
-    df = pd.read_csv(path_to_csv)
-    context.create_expectation_suite(expectation_suite_name=suite_name, overwrite_existing=True)
-    batch_request = {
-        "datasource_name": "pandas_datasource",
-        "data_connector_name": "default_runtime_data_connector_name",
-        "data_asset_name": "produtos_runtime",
-        "runtime_parameters": {"batch_data": df},
-        "batch_identifiers": {"default_identifier_name": "produtos_1"},
-    }
-    validator = context.get_validator(batch_request=batch_request, expectation_suite_name=suite_name)
+    df = carregar_tabela(path_to_csv)
+    _nova_suite(context, suite_name)
+    validator = obter_validator(context, df, "produtos", suite_name)
     validator.expect_column_values_to_not_be_null("id_produto")
     validator.expect_column_values_to_be_unique("id_produto")
     validator.expect_column_values_to_not_be_null("nome_produto")
@@ -101,36 +156,55 @@ def create_expectation_suite_for_produtos(context, path_to_csv, suite_name="prod
     logging.info(f"Expectation suite '{suite_name}' criada para produtos.")
 
 def create_expectation_suite_for_vendas(context, path_to_csv, path_clientes_csv=None, path_produtos_csv=None, suite_name="vendas_suite"):
-    df = pd.read_csv(path_to_csv)
-    context.create_expectation_suite(expectation_suite_name=suite_name, overwrite_existing=True)
-    batch_request = {
-        "datasource_name": "pandas_datasource",
-        "data_connector_name": "default_runtime_data_connector_name",
-        "data_asset_name": "vendas_runtime",
-        "runtime_parameters": {"batch_data": df},
-        "batch_identifiers": {"default_identifier_name": "vendas_1"},
-    }
-    validator = context.get_validator(batch_request=batch_request, expectation_suite_name=suite_name)
+    import expectativas_customizadas  # noqa: F401  registra expect_column_values_to_be_in_key_index e _to_be_close
+
+    df = carregar_tabela(path_to_csv)
+    _nova_suite(context, suite_name)
+    validator = obter_validator(context, df, "vendas", suite_name)
     validator.expect_column_values_to_not_be_null("id_venda")
     validator.expect_column_values_to_be_unique("id_venda")
     validator.expect_column_values_to_be_between("quantidade", min_value=1)
     validator.expect_column_values_to_be_between("valor_unitario", min_value=0)
-    df["_calc_total"] = df["quantidade"] * df["valor_unitario"]
-    validator.expect_column_values_to_be_close("valor_total", df["_calc_total"], mostly=0.98, atol=1e-2)
+    # other guarda os nomes das colunas (a suíte é JSON); a referência é o produto delas
+    validator.expect_column_values_to_be_close("valor_total", ["quantidade", "valor_unitario"], mostly=0.98, atol=1e-2)
     validator.expect_column_values_to_be_between("data_venda", min_value="1900-01-01", max_value=pd.Timestamp("today").strftime("%Y-%m-%d"))
     validator.expect_column_values_to_be_in_set("status", ["Concluída", "Pendente", "Cancelada", "Processando"], mostly=0.99)
+    # Integridade referencial contra o índice de chaves em disco (a suíte guarda só o caminho)
     if path_clientes_csv:
-        clientes_df = pd.read_csv(path_clientes_csv)
-        clientes_set = set(clientes_df["id_cliente"].astype(str).tolist())
-        validator.expect_column_values_to_be_in_set("id_cliente", list(clientes_set), mostly=0.99)
+        indice_chaves(path_clientes_csv, "id_cliente")
+        validator.expect_column_values_to_be_in_key_index(
+            "id_cliente", indice=os.path.abspath(caminho_indice(path_clientes_csv, "id_cliente")), mostly=0.99)
     if path_produtos_csv:
-        produtos_df = pd.read_csv(path_produtos_csv)
-        produtos_set = set(produtos_df["id_produto"].astype(str).tolist())
-        validator.expect_column_values_to_be_in_set("id_produto", list(produtos_set), mostly=0.99)
+        indice_chaves(path_produtos_csv, "id_produto")
+        validator.expect_column_values_to_be_in_key_index(
+            "id_produto", indice=os.path.abspath(caminho_indice(path_produtos_csv, "id_produto")), mostly=0.99)
     validator.save_expectation_suite()
     logging.info(f"Expectation suite '{suite_name}' criada para vendas.")
 
+def create_expectation_suite_for_logistica(context, path_to_csv, path_vendas_csv=None, suite_name="logistica_suite"):
+    import expectativas_customizadas  # noqa: F401  registra expect_column_values_to_be_in_key_index
+
+    df = carregar_tabela(path_to_csv)
+    _nova_suite(context, suite_name)
+    validator = obter_validator(context, df, "logistica", suite_name)
+    validator.expect_column_values_to_not_be_null("id_entrega")
+    validator.expect_column_values_to_be_unique("id_entrega")
+    validator.expect_column_values_to_not_be_null("id_venda")
+    validator.expect_column_values_to_not_be_null("transportadora", mostly=0.95)
+    validator.expect_column_values_to_be_in_set("status_entrega", ["Entregue", "Em Trânsito", "Pendente", "Cancelada"], mostly=0.99)
+    if path_vendas_csv:
+        indice_chaves(path_vendas_csv, "id_venda")
+        validator.expect_column_values_to_be_in_key_index(
+            "id_venda", indice=os.path.abspath(caminho_indice(path_vendas_csv, "id_venda")), mostly=0.99)
+    validator.save_expectation_suite()
+    logging.info(f"Expectation suite '{suite_name}' criada para logística.")
+
 if __name__ == "__main__":
+    import great_expectations as ge
+
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
     ge_root = os.path.join(os.getcwd(), "great_expectations")
     context = ge.DataContext(ge_root)
     ensure_pandas_datasource(context, datasource_name="pandas_datasource")
@@ -140,4 +214,6 @@ if __name__ == "__main__":
     create_expectation_suite_for_clientes(context, path_clientes, suite_name="clientes_suite")
     create_expectation_suite_for_produtos(context, path_produtos, suite_name="produtos_suite")
     create_expectation_suite_for_vendas(context, path_vendas, path_clientes_csv=path_clientes, path_produtos_csv=path_produtos, suite_name="vendas_suite")
+    path_logistica = os.path.join("..", "data", "datasets", "logistica.csv")
+    create_expectation_suite_for_logistica(context, path_logistica, path_vendas_csv=path_vendas, suite_name="logistica_suite")
     logging.info("Configuração inicial de Great Expectations e Expectation Suites concluída.")
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Histórico das métricas de qualidade e alertas de tendência.
+
+Cada execução do sistema de alertas anexa o valor de cada métrica (uma por
+regra de config/regras_alertas.json) a ../data/quality/historico_metricas.sqlite:
+    metricas(run_ts, execucao, dataset, metrica, valor)
+        índice em (dataset, metrica, run_ts)
+    tendencias(dataset, metrica, ...)
+        estado incremental dos detectores de cada métrica
+
+Detectores (estado atualizado a cada valor, sem reler o histórico):
+    media_movel  média e desvio-padrão dos valores dos últimos janela_dias; os
+                 valores que saem da janela são subtraídos das somas (cada
+                 valor sai uma única vez, por uma consulta no índice)
+    ewma         média e variância com suavização exponencial (fator alfa)
+O valor novo é comparado com o estado anterior a ele. Uma regra com
+"tendencia" gera alerta quando o valor fica a pelo menos "desvios" desvios da
+média de algum detector, com no mínimo "min_amostras" valores no histórico:
+    "tendencia": {"desvios": 4, "janela_dias": 30, "alfa": 0.3,
+                  "min_amostras": 5, "direcao": "acima" | "abaixo" | "ambas"}
+Histórico constante (desvio zero) não gera alerta de tendência.
+
+DATAOPS_HISTORICO_METRICAS muda o arquivo (vazio desativa o histórico).
+"""
+
+import logging
+import math
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from instrumentacao import EXECUCAO
+
+ARQUIVO_HISTORICO = os.environ.get('DATAOPS_HISTORICO_METRICAS', '../data/quality/historico_metricas.sqlite')
+PADRAO_TENDENCIA = {'desvios': 4.0, 'janela_dias': 30, 'alfa': 0.3, 'min_amostras': 5, 'direcao': 'ambas'}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS metricas (
+    run_ts TEXT NOT NULL,
+    execucao TEXT,
+    dataset TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    valor REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metricas_dataset_metrica_ts ON metricas (dataset, metrica, run_ts);
+CREATE TABLE IF NOT EXISTS tendencias (
+    dataset TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    janela_dias REAL NOT NULL,
+    inicio_janela TEXT,
+    n INTEGER NOT NULL,
+    soma REAL NOT NULL,
+    soma_quadrados REAL NOT NULL,
+    alfa REAL NOT NULL,
+    n_ewma INTEGER NOT NULL,
+    ewma REAL,
+    variancia_ewma REAL,
+    ultimo_ts TEXT,
+    PRIMARY KEY (dataset, metrica)
+);
+"""
+
+
+def _agora():
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+
+class EstadoTendencia:
+    """
+    Estado dos detectores de uma métrica: somas da janela móvel e EWMA.
+    """
+
+    CAMPOS = ('janela_dias', 'inicio_janela', 'n', 'soma', 'soma_quadrados', 'alfa', 'n_ewma', 'ewma',
+              'variancia_ewma', 'ultimo_ts')
+
+    def __init__(self, janela_dias, alfa, **valores):
+        self.janela_dias = janela_dias
+        self.alfa = alfa
+        self.inicio_janela = None
+        self.n = self.n_ewma = 0
+        self.soma = self.soma_quadrados = 0.0
+        self.ewma = self.variancia_ewma = self.ultimo_ts = None
+        for campo, valor in valores.items():
+            setattr(self, campo, valor)
+
+    def media_movel(self):
+        if not self.n:
+            return None, None
+        media = self.soma / self.n
+        variancia = (self.soma_quadrados - self.n * media * media) / (self.n - 1) if self.n > 1 else 0.0
+        return media, math.sqrt(max(variancia, 0.0))
+
+    def media_ewma(self):
+        if not self.n_ewma:
+            return None, None
+        return self.ewma, math.sqrt(max(self.variancia_ewma, 0.0))
+
+    def remover(self, valores):
+        for valor in valores:
+            self.n -= 1
+            self.soma -= valor
+            self.soma_quadrados -= valor * valor
+        if not self.n:
+            self.soma = self.soma_quadrados = 0.0
+
+    def adicionar(self, valor, run_ts):
+        self.n += 1
+        self.soma += valor
+        self.soma_quadrados += valor * valor
+        self.inicio_janela = self.inicio_janela or run_ts
+        if self.n_ewma:
+            diferenca = valor - self.ewma
+            self.ewma += self.alfa * diferenca
+            self.variancia_ewma = (1 - self.alfa) * (self.variancia_ewma + self.alfa * diferenca * diferenca)
+        else:
+            self.ewma, self.variancia_ewma = valor, 0.0
+        self.n_ewma += 1
+        self.ultimo_ts = run_ts
+
+
+def desvios_da_media(valor, media, desvio):
+    if media is None or not desvio:
+        return None
+    return (valor - media) / desvio
+
+
+class HistoricoMetricas:
+    """
+    Armazena o histórico das métricas em SQLite e mantém o estado dos detectores.
+    """
+
+    def __init__(self, caminho=ARQUIVO_HISTORICO):
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        # autocommit: as transações são abertas explicitamente com BEGIN IMMEDIATE
+        self.conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.executescript(ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        self.conexao.close()
+
+    def _valores_entre(self, dataset, metrica, inicio, fim):
+        cursor = self.conexao.execute(
+            'SELECT valor FROM metricas WHERE dataset = ? AND metrica = ? AND run_ts >= ? AND run_ts < ?',
+            (dataset, metrica, inicio or '', fim))
+        return [valor for (valor,) in cursor]
+
+    def _estado(self, dataset, metrica, janela_dias, alfa):
+        linha = self.conexao.execute(
+            f"SELECT {', '.join(EstadoTendencia.CAMPOS)} FROM tendencias WHERE dataset = ? AND metrica = ?",
+            (dataset, metrica)).fetchone()
+        if linha is None:
+            return EstadoTendencia(janela_dias, alfa)
+        estado = EstadoTendencia(**dict(zip(EstadoTendencia.CAMPOS, linha)))
+        if estado.janela_dias != janela_dias or estado.alfa != alfa:
+            # configuração nova: o estado é refeito uma vez a partir do histórico
+            return self._reconstruir(dataset, metrica, janela_dias, alfa)
+        return estado
+
+    def _reconstruir(self, dataset, metrica, janela_dias, alfa):
+        estado = EstadoTendencia(janela_dias, alfa)
+        for valor, run_ts in self.conexao.execute(
+                'SELECT valor, run_ts FROM metricas WHERE dataset = ? AND metrica = ? ORDER BY run_ts',
+                (dataset, metrica)):
+            self._expirar(estado, dataset, metrica, run_ts)
+            estado.adicionar(valor, run_ts)
+        return estado
+
+    def _expirar(self, estado, dataset, metrica, run_ts):
+        limite = (datetime.fromisoformat(run_ts) - timedelta(days=estado.janela_dias)).isoformat(timespec='microseconds')
+        if estado.n and estado.inicio_janela < limite:
+            estado.remover(self._valores_entre(dataset, metrica, estado.inicio_janela, limite))
+            estado.inicio_janela = limite if estado.n else None
+
+    def _gravar_estado(self, dataset, metrica, estado):
+        self.conexao.execute(
+            f"INSERT OR REPLACE INTO tendencias (dataset, metrica, {', '.join(EstadoTendencia.CAMPOS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(EstadoTendencia.CAMPOS))})",
+            (dataset, metrica, *(getattr(estado, campo) for campo in EstadoTendencia.CAMPOS)))
+
+    def registrar(self, dataset, metricas, configuracoes=None, run_ts=None, execucao=EXECUCAO):
+        """
+        Anexa {metrica: valor} ao histórico e atualiza os detectores. Retorna,
+        para cada métrica, a avaliação feita com o estado anterior ao valor:
+        {metrica: {'valor', 'media_movel', 'desvio_movel', 'z_movel', 'ewma', 'desvio_ewma', 'z_ewma', 'n'}}.
+        configuracoes dá os parâmetros "tendencia" de cada métrica (PADRAO_TENDENCIA nas demais).
+        """
+        run_ts = run_ts or _agora()
+        avaliacoes = {}
+        self.conexao.execute('BEGIN IMMEDIATE')
+        try:
+            for metrica, valor in metricas.items():
+                if valor is None or math.isnan(valor):
+                    continue
+                config = {**PADRAO_TENDENCIA, **((configuracoes or {}).get(metrica) or {})}
+                estado = self._estado(dataset, metrica, config['janela_dias'], config['alfa'])
+                self._expirar(estado, dataset, metrica, run_ts)
+                media, desvio = estado.media_movel()
+                ewma, desvio_ewma = estado.media_ewma()
+                avaliacoes[metrica] = {
+                    'valor': valor, 'n': estado.n,
+                    'media_movel': media, 'desvio_movel': desvio, 'z_movel': desvios_da_media(valor, media, desvio),
+                    'ewma': ewma, 'desvio_ewma': desvio_ewma, 'z_ewma': desvios_da_media(valor, ewma, desvio_ewma),
+                }
+                self.conexao.execute('INSERT INTO metricas (run_ts, execucao, dataset, metrica, valor) '
+                                     'VALUES (?, ?, ?, ?, ?)', (run_ts, execucao, dataset, metrica, float(valor)))
+                estado.adicionar(float(valor), run_ts)
+                self._gravar_estado(dataset, metrica, estado)
+            self.conexao.execute('COMMIT')
+        except BaseException:
+            self.conexao.execute('ROLLBACK')
+            raise
+        return avaliacoes
+
+    def serie(self, dataset, metrica, desde=None):
+        """
+        [(run_ts, valor)] da métrica em ordem cronológica (a partir de desde).
+        """
+        return self.conexao.execute(
+            'SELECT run_ts, valor FROM metricas WHERE dataset = ? AND metrica = ? AND run_ts >= ? ORDER BY run_ts',
+            (dataset, metrica, desde or '')).fetchall()
+
+
+def _violacao(avaliacao, config):
+    for detector, z in (('média de', avaliacao['z_movel']), ('EWMA de', avaliacao['z_ewma'])):
+        if z is None or avaliacao['n'] < config['min_amostras']:
+            continue
+        if ((config['direcao'] in ('acima', 'ambas') and z >= config['desvios'])
+                or (config['direcao'] in ('abaixo', 'ambas') and z <= -config['desvios'])):
+            return detector, z
+    return None
+
+
+def alertas_tendencia(dataset, regras, avaliacoes):
+    """
+    Mensagens das regras com "tendencia" cujo valor se afastou da média recente.
+    """
+    alertas = []
+    for regra in regras:
+        if not regra.get('tendencia') or regra['nome'] not in avaliacoes:
+            continue
+        config = {**PADRAO_TENDENCIA, **regra['tendencia']}
+        violacao = _violacao(avaliacoes[regra['nome']], config)
+        if violacao is None:
+            continue
+        detector, z = violacao
+        avaliacao = avaliacoes[regra['nome']]
+        referencia = avaliacao['media_movel'] if detector == 'média de' else avaliacao['ewma']
+        janela = f"{config['janela_dias']:g} dias" if detector == 'média de' else f"alfa {config['alfa']:g}"
+        alertas.append(f"Alerta de tendência: {regra['nome']} em {dataset} = {avaliacao['valor']:.4g}, "
+                       f"{abs(z):.1f}σ {'acima' if z > 0 else 'abaixo'} da {detector} {janela} "
+                       f"({referencia:.4g}).")
+    return alertas
+
+
+def registrar_tendencias(dataset, regras, metricas, caminho=None):
+    """
+    Grava as métricas da execução no histórico e retorna os alertas de
+    tendência. Sem histórico configurado (ou com erro no SQLite) retorna [].
+    """
+    caminho = ARQUIVO_HISTORICO if caminho is None else caminho
+    if not caminho:
+        return []
+    configuracoes = {regra['nome']: regra.get('tendencia') for regra in regras}
+    try:
+        with HistoricoMetricas(caminho) as historico:
+            avaliacoes = historico.registrar(dataset, metricas, configuracoes)
+    except sqlite3.Error as e:
+        logging.warning(f"Não foi possível atualizar o histórico de métricas de {dataset}: {e}")
+        return []
+    return alertas_tendencia(dataset, regras, avaliacoes)
@@ -0,0 +1,410 @@
+"""
+Processamento incremental: impressões digitais das entradas e watermarks por etapa.
+
+Cada etapa guarda seu estado em ../data/quality/incremental/<etapa>.json, o que
+permite que etapas rodando em processos paralelos (orquestrador) não disputem o
+mesmo arquivo. O estado contém:
+    - a impressão digital (tamanho, mtime e sha256) de cada entrada, usada para
+      pular a etapa quando nada mudou desde a última execução bem-sucedida;
+    - o watermark da coluna escolhida (ex.: data_venda, data_cadastro, id), usado
+      para processar apenas as linhas novas e anexá-las à saída existente;
+    - o ponto de leitura da entrada (partes já lidas de uma tabela em partes, ou
+      o deslocamento em bytes do fim da última linha de um CSV), para que a
+      execução seguinte leia só o que foi acrescentado depois;
+    - a assinatura da saída gravada, e ao lado do estado (<etapa>.chaves/) os
+      hashes das chaves já presentes na saída, em partes .npy ordenadas.
+Para uma entrada em partições (processar_incremental_particoes) o ponto de
+leitura e o watermark ficam por partição, e as linhas novas de todas elas são
+anexadas à saída em uma única parte.
+A saída Parquet/Arrow cresce em partes (armazenamento.anexar_tabela), então o
+custo de uma execução acompanha o tamanho do delta. Quando a entrada não pode
+ser retomada (tabela ou CSV reescritos, CSV comprimido) ou a saída foi alterada
+por fora (ex.: execução completa), a etapa relê a entrada inteira com o filtro
+do watermark e reconstrói os hashes das chaves a partir da saída.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import (anexar_tabela, assinatura_tabela, compressao_do_caminho, formato_do_caminho,
+                           ler_em_blocos, partes_tabela)
+from chaves_hash import ConjuntoChavesHash, hash_chaves
+from instrumentacao import contar
+
+DIRETORIO_ESTADO = '../data/quality/incremental'
+TAMANHO_BLOCO_LEITURA = 500_000
+JANELA_CAUDA = 1 << 16
+MAX_PARTES_CHAVES = 32
+
+
+def _sha256(caminho, tamanho_bloco=1 << 20):
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for parte in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            digest.update(parte)
+    return digest.hexdigest()
+
+
+def impressao_digital(caminho, anterior=None):
+    """
+    Retorna {'tamanho', 'mtime_ns', 'sha256'} do arquivo. Se tamanho e mtime forem
+    iguais aos da impressão anterior, o hash é reaproveitado sem reler o arquivo.
+
+    Para uma tabela em partes a impressão guarda também a de cada parte
+    ('partes'), e o sha256 é o das partes em ordem: só as partes novas são lidas.
+    """
+    if os.path.isdir(caminho):
+        anteriores = (anterior or {}).get('partes', {})
+        partes = {os.path.basename(parte): impressao_digital(parte, anteriores.get(os.path.basename(parte)))
+                  for parte in partes_tabela(caminho)}
+        digest = hashlib.sha256()
+        for nome, impressao in partes.items():
+            digest.update(f"{nome}:{impressao['sha256']};".encode())
+        return {'tamanho': sum(p['tamanho'] for p in partes.values()),
+                'mtime_ns': max((p['mtime_ns'] for p in partes.values()), default=0),
+                'sha256': digest.hexdigest(), 'partes': partes}
+    info = os.stat(caminho)
+    atual = {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns}
+    if anterior and all(anterior.get(k) == v for k, v in atual.items()):
+        atual['sha256'] = anterior['sha256']
+    else:
+        atual['sha256'] = _sha256(caminho)
+    return atual
+
+
+class EstadoIncremental:
+    """
+    Estado persistente de uma etapa: impressões digitais das entradas e watermark.
+    """
+
+    def __init__(self, etapa, diretorio=DIRETORIO_ESTADO):
+        self.etapa = etapa
+        self.caminho = os.path.join(diretorio, f"{etapa}.json")
+        self.dados = {'entradas': {}, 'watermark': None}
+        if os.path.isfile(self.caminho):
+            with open(self.caminho, encoding='utf-8') as arquivo:
+                self.dados = json.load(arquivo)
+
+    def salvar(self):
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.dados, arquivo, indent=2)
+        os.replace(temporario, self.caminho)
+
+    def inalterado(self, entradas, saidas=()):
+        """
+        True se todas as saídas existem e nenhuma entrada mudou de conteúdo.
+        """
+        if not all(os.path.exists(saida) for saida in saidas):
+            return False
+        registradas = self.dados['entradas']
+        for entrada in entradas:
+            anterior = registradas.get(os.path.abspath(entrada))
+            if anterior is None or impressao_digital(entrada, anterior)['sha256'] != anterior['sha256']:
+                return False
+        return True
+
+    def registrar_entradas(self, entradas):
+        registradas = self.dados['entradas']
+        for entrada in entradas:
+            chave = os.path.abspath(entrada)
+            registradas[chave] = impressao_digital(entrada, registradas.get(chave))
+
+    @property
+    def _diretorio_chaves(self):
+        return os.path.splitext(self.caminho)[0] + '.chaves'
+
+    def descartar_chaves(self):
+        shutil.rmtree(self._diretorio_chaves, ignore_errors=True)
+
+    def registrar_chaves(self, hashes):
+        """
+        Grava os hashes das chaves anexadas à saída como uma parte nova.
+        """
+        hashes = np.unique(hashes)
+        if not len(hashes):
+            return
+        os.makedirs(self._diretorio_chaves, exist_ok=True)
+        numero = len(os.listdir(self._diretorio_chaves))
+        np.save(os.path.join(self._diretorio_chaves, f'parte-{numero:06d}.npy'), hashes)
+
+    def chaves(self):
+        """
+        Conjunto com os hashes das chaves gravadas; com mais de MAX_PARTES_CHAVES
+        partes elas são fundidas em uma só.
+        """
+        conjunto = ConjuntoChavesHash()
+        if not os.path.isdir(self._diretorio_chaves):
+            return conjunto
+        partes = sorted(os.path.join(self._diretorio_chaves, nome) for nome in os.listdir(self._diretorio_chaves))
+        for parte in partes:
+            conjunto.adicionar(np.load(parte))
+        if len(partes) > MAX_PARTES_CHAVES:
+            todas = np.concatenate([np.load(parte) for parte in partes])
+            self.descartar_chaves()
+            self.registrar_chaves(todas)
+        return conjunto
+
+    @property
+    def watermark(self):
+        return _decodificar_watermark(self.dados.get('watermark'))
+
+    @watermark.setter
+    def watermark(self, valor):
+        registro = _codificar_watermark(valor)
+        if registro is not None:
+            self.dados['watermark'] = registro
+
+
+def _codificar_watermark(valor):
+    if valor is None or pd.isnull(valor):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return {'tipo': 'data', 'valor': valor.isoformat()}
+    if isinstance(valor, str):
+        return {'tipo': 'texto', 'valor': valor}
+    return {'tipo': 'numero', 'valor': valor.item() if hasattr(valor, 'item') else valor}
+
+
+def _decodificar_watermark(registro):
+    if registro is None:
+        return None
+    if registro['tipo'] == 'data':
+        return pd.Timestamp(registro['valor'])
+    return registro['valor']
+
+
+def _valores_comparaveis(serie):
+    """
+    Converte a coluna de watermark para um tipo ordenável: números e datas são
+    mantidos; texto é interpretado como data (valores inválidos viram NaT).
+    """
+    if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return pd.to_datetime(serie, errors='coerce')
+
+
+def _fim_ultima_linha(caminho):
+    """
+    Posição logo após o último '\\n' do arquivo (0 se não houver nenhum).
+    """
+    with open(caminho, 'rb') as arquivo:
+        fim = arquivo.seek(0, os.SEEK_END)
+        while fim > 0:
+            inicio = max(0, fim - JANELA_CAUDA)
+            arquivo.seek(inicio)
+            posicao = arquivo.read(fim - inicio).rfind(b'\n')
+            if posicao >= 0:
+                return inicio + posicao + 1
+            fim = inicio
+    return 0
+
+
+def _hash_cauda(caminho, fim):
+    inicio = max(0, fim - JANELA_CAUDA)
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        return hashlib.sha256(arquivo.read(fim - inicio)).hexdigest()
+
+
+def _ler_csv_desde(caminho, deslocamento, tipos=None):
+    """
+    Blocos das linhas do CSV a partir do byte deslocamento (início de uma linha).
+    """
+    cabecalho = pd.read_csv(caminho, nrows=0, dtype=tipos)
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(deslocamento)
+        if not arquivo.read(1).strip():
+            yield cabecalho
+            return
+        arquivo.seek(deslocamento)
+        yield from pd.read_csv(arquivo, header=None, names=list(cabecalho.columns), dtype=tipos,
+                               chunksize=TAMANHO_BLOCO_LEITURA)
+
+
+def _blocos_novos(caminho, leitura, tipos=None):
+    """
+    Itera sobre os blocos de caminho ainda não lidos e devolve (blocos, leitura),
+    onde leitura é o ponto a registrar para a próxima execução. Sem ponto
+    anterior válido, os blocos cobrem a entrada inteira. tipos é o dtype= da
+    leitura de CSV (planos_tipos.tipos_leitura).
+    """
+    formato = formato_do_caminho(caminho)
+    if formato != 'csv':
+        # um arquivo único é registrado como a parte 0, que é o que ele vira
+        # quando a tabela passa a crescer em partes (armazenamento.anexar_tabela)
+        extensao = os.path.splitext(caminho)[1]
+        partes = ({os.path.basename(parte): parte for parte in partes_tabela(caminho)} if os.path.isdir(caminho)
+                  else {f'parte-000000{extensao}': caminho})
+        lidas = (leitura or {}).get('partes') or {}
+        atuais = {nome: impressao_digital(parte, lidas.get(nome)) for nome, parte in partes.items()}
+        # as partes já lidas precisam continuar iguais; senão a tabela foi reescrita
+        retomar = bool(lidas) and all(atuais.get(nome) == impressao for nome, impressao in lidas.items())
+        novas = [parte for nome, parte in partes.items() if not retomar or nome not in lidas]
+        blocos = (bloco for parte in novas for bloco in ler_em_blocos(parte, TAMANHO_BLOCO_LEITURA))
+        return blocos, {'partes': atuais}
+    if compressao_do_caminho(caminho):
+        return ler_em_blocos(caminho, TAMANHO_BLOCO_LEITURA, dtype=tipos), None
+    # uma última linha sem '\n' é lida agora e de novo na próxima execução (o
+    # filtro por chave descarta a repetição), pois ainda pode estar incompleta
+    fim = _fim_ultima_linha(caminho)
+    nova = {'bytes': fim, 'cauda': _hash_cauda(caminho, fim)}
+    inicio = (leitura or {}).get('bytes')
+    if inicio is None or inicio > fim or _hash_cauda(caminho, inicio) != leitura.get('cauda'):
+        return ler_em_blocos(caminho, TAMANHO_BLOCO_LEITURA, dtype=tipos), nova
+    return _ler_csv_desde(caminho, inicio, tipos), nova
+
+
+def _chaves_da_saida(estado, path_out, chaves, saida_conhecida):
+    """
+    Hashes das chaves já gravadas em path_out: os persistidos pelo estado quando
+    a saída é a mesma da última execução, senão reconstruídos lendo a saída.
+    """
+    if saida_conhecida:
+        return estado.chaves()
+    estado.descartar_chaves()
+    if not os.path.exists(path_out):
+        return ConjuntoChavesHash()
+    logging.info(f"Etapa '{estado.etapa}': reconstruindo as chaves a partir de {path_out}.")
+    for bloco in ler_em_blocos(path_out, TAMANHO_BLOCO_LEITURA, colunas=chaves):
+        estado.registrar_chaves(hash_chaves(bloco, chaves))
+    return estado.chaves()
+
+
+def _ler_delta(path_in, leitura, coluna, watermark, tipos=None):
+    """
+    Linhas de path_in ainda não lidas (ponto de leitura) com coluna >= watermark
+    ou nula. Retorna (delta, maior valor de coluna no delta, leitura a registrar).
+    """
+    blocos_entrada, leitura = _blocos_novos(path_in, leitura, tipos)
+    blocos, maximo = [], None
+    for bloco in blocos_entrada:
+        valores = _valores_comparaveis(bloco[coluna])
+        if watermark is not None:
+            limite = pd.Timestamp(watermark) if pd.api.types.is_datetime64_any_dtype(valores) else watermark
+            novos = (valores >= limite) | valores.isna()
+            bloco, valores = bloco[novos], valores[novos]
+        if len(valores.dropna()):
+            maximo = valores.max() if maximo is None else max(maximo, valores.max())
+        blocos.append(bloco)
+    if not blocos:
+        return pd.DataFrame(), maximo, leitura
+    delta = pd.concat(blocos, ignore_index=True) if len(blocos) > 1 else blocos[0].reset_index(drop=True)
+    return delta, maximo, leitura
+
+
+def _anexar_delta(estado, delta, path_out, chaves, saida_conhecida):
+    """
+    Anexa a path_out as linhas de delta cuja chave ainda não está na saída e
+    registra os hashes delas; retorna as linhas anexadas.
+    """
+    existentes = _chaves_da_saida(estado, path_out, chaves, saida_conhecida)
+    antes = len(delta)
+    hashes = hash_chaves(delta, chaves)
+    novos = existentes.filtrar_novos(hashes)
+    delta = delta[novos]
+    contar('removidas_duplicatas', antes - len(delta))
+    anexar_tabela(delta, path_out)
+    estado.registrar_chaves(hashes[novos])
+    return delta
+
+
+def processar_incremental(etapa, path_in, path_out, coluna, chaves, transformar, dependencias=(), tipos=None):
+    """
+    Processa apenas as linhas novas de path_in e as anexa a path_out.
+
+    São novas as linhas ainda não lidas de path_in (ponto de leitura do estado)
+    com coluna >= watermark (ou coluna nula) cuja chave ainda não está na saída;
+    o ">=" somado ao filtro por chave garante que linhas que chegam atrasadas com
+    o mesmo valor do watermark não sejam perdidas. A etapa é pulada quando path_in
+    e as dependências (ex.: dimensões das FKs) não mudaram. tipos é repassado
+    como dtype= à leitura de entradas CSV.
+    Retorna o número de linhas anexadas.
+    """
+    estado = EstadoIncremental(etapa)
+    entradas = [path_in, *dependencias]
+    if estado.inalterado(entradas, [path_out]):
+        logging.info(f"Etapa '{etapa}' sem alterações nas entradas; execução ignorada.")
+        return 0
+
+    saida_existe = os.path.exists(path_out)
+    saida_conhecida = saida_existe and estado.dados.get('saida') == assinatura_tabela(path_out)
+    watermark = estado.watermark if saida_existe else None
+    leitura = estado.dados.get('leitura') if saida_conhecida else None
+    delta, maximo, leitura = _ler_delta(path_in, leitura, coluna, watermark, tipos)
+
+    contar('linhas_entrada', len(delta))
+    if len(delta) or not saida_existe:
+        delta = _anexar_delta(estado, transformar(delta), path_out, chaves, saida_conhecida)
+    contar('linhas_saida', len(delta))
+    estado.watermark = maximo if maximo is not None else watermark
+    estado.dados['leitura'] = leitura
+    estado.dados['saida'] = assinatura_tabela(path_out)
+    estado.registrar_entradas(entradas)
+    estado.salvar()
+    logging.info(f"Etapa '{etapa}': {len(delta)} linhas novas anexadas (watermark {coluna} = {estado.watermark}).")
+    return len(delta)
+
+
+def processar_incremental_particoes(etapa, particoes, path_out, coluna, chaves, transformar, coluna_particao,
+                                    tipos=None):
+    """
+    processar_incremental para uma entrada em partições ({rótulo: caminho}): as
+    linhas novas de todas as partições são juntadas, recebem o rótulo da
+    partição na coluna categórica coluna_particao, passam uma vez por
+    transformar e são anexadas a path_out de uma só vez.
+
+    O estado da etapa guarda, por partição, o ponto de leitura e o watermark
+    (partições chegam fora de ordem); partições sem alteração não são lidas.
+    Retorna o número de linhas anexadas.
+    """
+    if not particoes:
+        raise FileNotFoundError(f"Etapa '{etapa}': nenhuma partição de entrada para {path_out}")
+    estado = EstadoIncremental(etapa)
+    if estado.inalterado(particoes.values(), [path_out]):
+        logging.info(f"Etapa '{etapa}' sem alterações nas entradas; execução ignorada.")
+        return 0
+
+    saida_existe = os.path.exists(path_out)
+    saida_conhecida = saida_existe and estado.dados.get('saida') == assinatura_tabela(path_out)
+    anteriores = estado.dados.get('particoes') or {}
+    registros, deltas, vazio = {}, {}, None
+    for rotulo, caminho in particoes.items():
+        registro = anteriores.get(rotulo, {})
+        if saida_conhecida and rotulo in anteriores and estado.inalterado([caminho]):
+            registros[rotulo] = registro
+            continue
+        watermark = _decodificar_watermark(registro.get('watermark')) if saida_existe else None
+        leitura = registro.get('leitura') if saida_conhecida else None
+        delta, maximo, leitura = _ler_delta(caminho, leitura, coluna, watermark, tipos)
+        if len(delta):
+            deltas[rotulo] = delta
+        elif vazio is None:
+            # o esquema lido (cabeçalho e tipos) serve de saída quando nenhuma partição tem linhas
+            vazio = delta.iloc[:0]
+        registros[rotulo] = {'leitura': leitura,
+                             'watermark': _codificar_watermark(maximo if maximo is not None else watermark)}
+
+    tamanhos = [len(delta) for delta in deltas.values()]
+    contar('particoes', len(deltas))
+    contar('linhas_entrada', sum(tamanhos))
+    anexadas = 0
+    if deltas or not saida_existe:
+        delta = pd.concat(deltas.values(), ignore_index=True) if deltas else vazio
+        delta[coluna_particao] = pd.Categorical.from_codes(np.repeat(np.arange(len(deltas)), tamanhos),
+                                                           categories=list(deltas))
+        anexadas = len(_anexar_delta(estado, transformar(delta), path_out, chaves, saida_conhecida))
+    contar('linhas_saida', anexadas)
+    estado.dados['particoes'] = registros
+    estado.dados['saida'] = assinatura_tabela(path_out)
+    estado.registrar_entradas(particoes.values())
+    estado.salvar()
+    logging.info(f"Etapa '{etapa}': {anexadas} linhas novas anexadas de {len(deltas)} partições.")
+    return anexadas
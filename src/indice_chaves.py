@@ -0,0 +1,180 @@
+"""
+Índice persistente de chaves de dimensão para validação de chaves estrangeiras.
+
+Para cada (arquivo, coluna) o índice guarda as chaves distintas em um array
+numpy ordenado, gravado em ../data/cache/chaves (ou no diretório de
+DATAOPS_CACHE_CHAVES) com um nome que inclui um hash do caminho absoluto da
+origem, para que clientes.csv e clientes.parquet (ou dois clientes.csv em
+diretórios diferentes) não compartilhem o arquivo. Colunas de ids inteiros são
+guardadas como as próprias chaves int64, sem risco de colisão; as demais como
+hashes uint64 (mesma normalização de chaves_hash: números como float64, demais
+como object). Quem consome o índice (correção de vendas/logística, expectativa
+de integridade referencial do Great Expectations) abre o .npy com memory map e
+testa pertinência com searchsorted, sem reler a dimensão. O índice só é
+reconstruído quando o arquivo de origem muda (tamanho ou mtime); abrir_indice
+confere a origem registrada ao lado do .npy antes de usá-lo.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import assinatura_tabela, ler_em_blocos
+from chaves_hash import hash_chaves
+
+DIRETORIO_INDICES = os.environ.get('DATAOPS_CACHE_CHAVES', '../data/cache/chaves')
+TAMANHO_BLOCO_LEITURA = 1_000_000
+
+
+def _assinatura(caminho):
+    return {'caminho': os.path.abspath(caminho), **assinatura_tabela(caminho)}
+
+
+def caminho_indice(caminho, coluna, diretorio=DIRETORIO_INDICES):
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    origem = hashlib.sha1(os.path.abspath(caminho).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(diretorio, f"{nome}.{coluna}.{origem}.npy")
+
+
+def _inteiros(serie):
+    """
+    (valores int64, máscara dos valores inteiros) de uma coluna; texto e
+    booleanos não são inteiros.
+    """
+    if pd.api.types.is_integer_dtype(serie):
+        return serie.to_numpy(dtype='int64', na_value=0), serie.notna().to_numpy()
+    if not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        return np.zeros(len(serie), dtype='int64'), np.zeros(len(serie), dtype=bool)
+    numeros = serie.to_numpy(dtype='float64', na_value=np.nan)
+    validos = np.isfinite(numeros) & (numeros == np.trunc(numeros)) & (np.abs(numeros) < 2.0 ** 63)
+    return np.where(validos, numeros, 0).astype('int64'), validos
+
+
+def _pertence(ordenado, valores):
+    if not len(ordenado):
+        return np.zeros(len(valores), dtype=bool)
+    posicoes = np.searchsorted(ordenado, valores)
+    posicoes[posicoes == len(ordenado)] = 0
+    return np.asarray(ordenado[posicoes] == valores)
+
+
+class IndiceChaves:
+    """
+    Chaves ordenadas e distintas de uma coluna: int64 (as próprias chaves) quando
+    todos os valores preenchidos são inteiros, senão hashes uint64. nulos indica
+    se a dimensão tem chave nula (que então casa com os nulos consultados, como no isin).
+    """
+
+    def __init__(self, chaves, nulos=False):
+        self.chaves = chaves
+        self.nulos = nulos
+
+    def __len__(self):
+        return len(self.chaves)
+
+    @property
+    def inteiro(self):
+        return self.chaves.dtype == np.int64
+
+    @classmethod
+    def construir(cls, caminho, coluna, chunksize=TAMANHO_BLOCO_LEITURA):
+        partes, nulos = [], False
+        for bloco in ler_em_blocos(caminho, chunksize, colunas=[coluna]):
+            valores, inteiros = _inteiros(bloco[coluna])
+            preenchidos = bloco[coluna].notna().to_numpy()
+            if not np.array_equal(inteiros, preenchidos):
+                return cls._construir_hashes(caminho, coluna, chunksize)
+            nulos = nulos or not preenchidos.all()
+            partes.append(np.unique(valores[inteiros]))
+        return cls(np.unique(np.concatenate(partes)) if partes else np.empty(0, dtype=np.int64), nulos)
+
+    @classmethod
+    def _construir_hashes(cls, caminho, coluna, chunksize):
+        partes = [np.unique(hash_chaves(bloco, [coluna]))
+                  for bloco in ler_em_blocos(caminho, chunksize, colunas=[coluna])]
+        return cls(np.unique(np.concatenate(partes)) if partes else np.empty(0, dtype=np.uint64))
+
+    def contem(self, serie):
+        """
+        Máscara booleana equivalente a serie.isin(chaves da dimensão).
+        """
+        if not self.inteiro:
+            return _pertence(self.chaves, hash_chaves(serie.to_frame('chave'), ['chave']))
+        valores, inteiros = _inteiros(serie)
+        resultado = np.zeros(len(serie), dtype=bool)
+        resultado[inteiros] = _pertence(self.chaves, valores[inteiros])
+        if self.nulos:
+            resultado |= serie.isna().to_numpy()
+        return resultado
+
+    def salvar(self, arquivo, origem, coluna):
+        """
+        Grava o .npy e seus metadados de forma atômica (etapas paralelas podem
+        construir o mesmo índice ao mesmo tempo).
+        """
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        temporario = f"{arquivo}.{os.getpid()}.tmp"
+        with open(temporario, 'wb') as destino:
+            np.save(destino, self.chaves)
+        os.replace(temporario, arquivo)
+        with open(temporario, 'w', encoding='utf-8') as destino:
+            json.dump({'origem': origem, 'coluna': coluna, 'chaves': len(self.chaves), 'nulos': self.nulos}, destino)
+        os.replace(temporario, arquivo + '.json')
+
+    @staticmethod
+    def metadados(arquivo):
+        try:
+            with open(arquivo + '.json', encoding='utf-8') as meta:
+                return json.load(meta)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def abrir(cls, arquivo, origem=None):
+        """
+        Abre o índice com memory map; retorna None se o índice não existir ou,
+        com origem informada, se tiver sido construído a partir de outra versão do arquivo.
+        """
+        meta = cls.metadados(arquivo)
+        if meta is None or (origem is not None and meta.get('origem') != origem):
+            return None
+        return cls(np.load(arquivo, mmap_mode='r'), meta.get('nulos', False))
+
+
+def indice_chaves(caminho, coluna, diretorio=DIRETORIO_INDICES):
+    """
+    Retorna o índice de chaves de caminho[coluna], reaproveitando o índice em
+    disco quando o arquivo não mudou e construindo-o caso contrário.
+    """
+    arquivo = caminho_indice(caminho, coluna, diretorio)
+    origem = _assinatura(caminho)
+    indice = IndiceChaves.abrir(arquivo, origem)
+    if indice is None:
+        logging.info(f"Construindo índice de chaves {coluna} de {caminho}.")
+        IndiceChaves.construir(caminho, coluna).salvar(arquivo, origem, coluna)
+        indice = IndiceChaves.abrir(arquivo)
+    return indice
+
+
+def abrir_indice(arquivo):
+    """
+    Abre um índice pelo caminho do .npy (como as suítes o guardam), conferindo
+    a origem registrada nos metadados: se a dimensão mudou desde a construção, o
+    índice é reconstruído; se ela não existe mais, ou o índice não tem origem
+    registrada, levanta ValueError em vez de validar contra chaves obsoletas.
+    """
+    meta = IndiceChaves.metadados(arquivo)
+    origem = (meta or {}).get('origem') or {}
+    caminho, coluna = origem.get('caminho'), (meta or {}).get('coluna')
+    if not caminho or not coluna:
+        raise ValueError(f"Índice de chaves {arquivo} sem origem registrada; recrie a suíte.")
+    if not os.path.exists(caminho):
+        raise ValueError(f"Origem {caminho} do índice de chaves {arquivo} não existe mais.")
+    if _assinatura(caminho) != origem:
+        logging.info(f"Origem {caminho} mudou desde a construção do índice {arquivo}; reconstruindo.")
+        IndiceChaves.construir(caminho, coluna).salvar(arquivo, _assinatura(caminho), coluna)
+    return IndiceChaves.abrir(arquivo)
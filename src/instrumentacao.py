@@ -0,0 +1,384 @@
+"""
+Instrumentação das etapas do pipeline.
+
+Cada etapa (carga, validação, correção, enriquecimento, alertas, checkpoints) é
+envolvida por etapa() ou pelo decorador instrumentar(); ao terminar, uma linha
+JSON é anexada a ../data/quality/metricas_etapas.jsonl, ao lado do auditoria.log:
+    execucao, etapa, pai, pid, inicio, status, erro
+    tempo_s          tempo de parede
+    cpu_s            CPU do processo (inclui processos filhos já encerrados, ex.: pools)
+    pico_memoria_mb  pico de memória residente durante a etapa
+    linhas_entrada, linhas_saida, removidas_duplicatas, removidas_fk
+                     contadores informados pelo código da etapa com contar()
+
+contar() soma no registro da etapa mais interna em andamento e não faz nada
+fora de uma etapa, então as funções de limpeza podem chamá-lo sem saber quem as
+executa. No Linux o pico de memória da etapa vem do /proc/self/status sem
+zerar nada (zerar o VmHWM também zeraria o ru_maxrss que o benchmark e outros
+medidores do processo leem): se o VmHWM subiu durante a etapa, o pico do
+processo foi atingido nela e é exato; senão vale o maior VmRSS amostrado por uma
+thread a cada DATAOPS_AMOSTRAGEM_MEMORIA_MS (padrão 10) enquanto há etapas em
+andamento. Nos demais sistemas é o ru_maxrss, o pico do processo desde o início.
+
+Perfis (opt-in) com DATAOPS_PERFIL:
+    cprofile     cProfile da etapa mais externa; grava .prof e um resumo .txt
+    amostragem   amostras da pilha a cada DATAOPS_PERFIL_INTERVALO_MS (padrão 10)
+                 em formato "folded" (flamegraph.pl, speedscope)
+Só as etapas que levam mais de DATAOPS_PERFIL_MIN_S segundos (padrão 5) têm o
+perfil gravado, em ../data/quality/perfis/.
+
+DATAOPS_METRICAS_ETAPAS muda o arquivo de saída (vazio desativa a gravação) e
+DATAOPS_EXECUCAO identifica a execução (o orquestrador repassa o mesmo valor a
+todas as etapas).
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+ARQUIVO_METRICAS = os.environ.get('DATAOPS_METRICAS_ETAPAS', '../data/quality/metricas_etapas.jsonl')
+DIRETORIO_PERFIS = '../data/quality/perfis'
+PERFIL = os.environ.get('DATAOPS_PERFIL', '').lower()
+PERFIL_MIN_S = float(os.environ.get('DATAOPS_PERFIL_MIN_S', '5'))
+PERFIL_INTERVALO_S = float(os.environ.get('DATAOPS_PERFIL_INTERVALO_MS', '10')) / 1000
+AMOSTRAGEM_MEMORIA_S = float(os.environ.get('DATAOPS_AMOSTRAGEM_MEMORIA_MS', '10')) / 1000
+EXECUCAO = os.environ.get('DATAOPS_EXECUCAO') or datetime.now().strftime('%Y%m%dT%H%M%S-') + uuid.uuid4().hex[:6]
+
+CONTADORES = ('linhas_entrada', 'linhas_saida', 'removidas_duplicatas', 'removidas_fk')
+
+_pilha = contextvars.ContextVar('instrumentacao_pilha', default=())
+_trava_arquivo = threading.Lock()
+
+
+def _ler_status_kb(campo):
+    try:
+        with open('/proc/self/status') as status:
+            for linha in status:
+                if linha.startswith(campo + ':'):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def pico_memoria_mb():
+    """
+    Pico de memória residente do processo desde o início.
+    """
+    pico = _ler_status_kb('VmHWM')
+    if pico is not None:
+        return pico / 1024
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / 2**20 if sys.platform == 'darwin' else pico / 1024
+
+
+def memoria_atual_mb():
+    atual = _ler_status_kb('VmRSS')
+    return atual / 1024 if atual is not None else None
+
+
+class _AmostradorMemoria(threading.Thread):
+    """
+    Lê o VmRSS periodicamente enquanto há etapas em andamento (em qualquer
+    thread) e guarda o maior valor em cada uma; sem etapas, fica parada.
+    """
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True, name='amostrador-memoria')
+        self.intervalo = intervalo
+        self.abertas = set()
+        self._condicao = threading.Condition()
+
+    def abrir(self, registro):
+        with self._condicao:
+            self.abertas.add(registro)
+            self._condicao.notify()
+
+    def fechar(self, registro):
+        with self._condicao:
+            self.abertas.discard(registro)
+
+    def run(self):
+        while True:
+            with self._condicao:
+                while not self.abertas:
+                    self._condicao.wait()
+                abertas = list(self.abertas)
+            atual = memoria_atual_mb()
+            if atual is not None:
+                for registro in abertas:
+                    registro.observar_memoria(atual)
+            time.sleep(self.intervalo)
+
+
+_amostrador_memoria = None
+_trava_amostrador = threading.Lock()
+
+
+def _amostrador():
+    global _amostrador_memoria
+    if memoria_atual_mb() is None or AMOSTRAGEM_MEMORIA_S <= 0:
+        return None
+    with _trava_amostrador:
+        # após um fork a thread do processo pai não existe no filho
+        if _amostrador_memoria is None or not _amostrador_memoria.is_alive():
+            _amostrador_memoria = _AmostradorMemoria(AMOSTRAGEM_MEMORIA_S)
+            _amostrador_memoria.start()
+        return _amostrador_memoria
+
+
+def tempo_cpu():
+    tempos = os.times()
+    return tempos.user + tempos.system + tempos.children_user + tempos.children_system
+
+
+class RegistroEtapa:
+    def __init__(self, nome, pai=None):
+        self.nome = nome
+        self.pai = pai
+        self.contadores = {}
+        self.pico_observado = 0.0
+
+    def contar(self, contador, quantidade):
+        self.contadores[contador] = self.contadores.get(contador, 0) + int(quantidade)
+
+    def observar_memoria(self, atual_mb):
+        if atual_mb is not None and atual_mb > self.pico_observado:
+            self.pico_observado = atual_mb
+
+    def pico_memoria(self, pico_antes, pico_depois):
+        """
+        Pico da etapa: o do processo se ele subiu durante a etapa, senão o maior
+        VmRSS observado (sem /proc, o pico do processo).
+        """
+        if pico_depois is None:
+            return None
+        if pico_antes is None or pico_depois > pico_antes or not self.pico_observado:
+            return pico_depois
+        return self.pico_observado
+
+
+def contar(contador, quantidade):
+    """
+    Soma quantidade ao contador da etapa em andamento (sem etapa, não faz nada).
+    """
+    pilha = _pilha.get()
+    if pilha:
+        pilha[-1].contar(contador, quantidade)
+
+
+class _Amostrador(threading.Thread):
+    """
+    Amostra periodicamente a pilha de chamadas de uma thread e conta as pilhas distintas.
+    """
+
+    def __init__(self, alvo, intervalo):
+        super().__init__(daemon=True)
+        self.alvo = alvo
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.alvo)
+            funcoes = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                funcoes.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                quadro = quadro.f_back
+            if funcoes:
+                self.pilhas[';'.join(reversed(funcoes))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def gravar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            for pilha, amostras in self.pilhas.most_common():
+                arquivo.write(f"{pilha} {amostras}\n")
+
+
+def _iniciar_perfil():
+    if PERFIL == 'cprofile':
+        import cProfile
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:  # outro profiler já está ativo no processo
+            return None
+        return perfil
+    if PERFIL == 'amostragem':
+        amostrador = _Amostrador(threading.get_ident(), PERFIL_INTERVALO_S)
+        amostrador.start()
+        return amostrador
+    return None
+
+
+def _finalizar_perfil(perfil, nome, duracao):
+    if perfil is None:
+        return None
+    if isinstance(perfil, _Amostrador):
+        perfil.parar()
+    else:
+        perfil.disable()
+    if duracao < PERFIL_MIN_S:
+        return None
+    os.makedirs(DIRETORIO_PERFIS, exist_ok=True)
+    base = os.path.join(DIRETORIO_PERFIS, f"{nome}-{EXECUCAO}-{os.getpid()}")
+    if isinstance(perfil, _Amostrador):
+        perfil.gravar(base + '.folded')
+        return base + '.folded'
+    import pstats
+    perfil.dump_stats(base + '.prof')
+    with open(base + '.txt', 'w', encoding='utf-8') as resumo:
+        pstats.Stats(perfil, stream=resumo).sort_stats('cumulative').print_stats(30)
+    return base + '.prof'
+
+
+def gravar_registro(registro, arquivo=None):
+    arquivo = ARQUIVO_METRICAS if arquivo is None else arquivo
+    if not arquivo:
+        return
+    try:
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+        linha = json.dumps(registro, ensure_ascii=False, default=str) + '\n'
+        # uma única escrita em modo append por linha: processos paralelos não intercalam registros
+        with _trava_arquivo, open(arquivo, 'a', encoding='utf-8') as saida:
+            saida.write(linha)
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar as métricas da etapa {registro.get('etapa')}: {e}")
+
+
+@contextmanager
+def etapa(nome):
+    """
+    Mede o bloco como a etapa nome e grava o registro ao sair (também em caso de erro).
+    """
+    pilha = _pilha.get()
+    pai = pilha[-1] if pilha else None
+    registro = RegistroEtapa(nome, pai.nome if pai else None)
+    token = _pilha.set(pilha + (registro,))
+    amostrador = _amostrador()
+    pico_antes = pico_memoria_mb()
+    registro.observar_memoria(memoria_atual_mb())
+    if amostrador is not None:
+        amostrador.abrir(registro)
+    perfil = _iniciar_perfil() if pai is None else None
+    inicio = datetime.now(timezone.utc)
+    cpu, contador = tempo_cpu(), time.perf_counter()
+    status, erro = 'ok', None
+    try:
+        yield registro
+    except BaseException as e:
+        status, erro = 'erro', repr(e)
+        raise
+    finally:
+        duracao = time.perf_counter() - contador
+        cpu = tempo_cpu() - cpu
+        _pilha.reset(token)
+        if amostrador is not None:
+            amostrador.fechar(registro)
+        registro.observar_memoria(memoria_atual_mb())
+        pico = registro.pico_memoria(pico_antes, pico_memoria_mb())
+        arquivo_perfil = _finalizar_perfil(perfil, nome, duracao)
+        gravar_registro({
+            'execucao': EXECUCAO,
+            'etapa': nome,
+            'pai': registro.pai,
+            'pid': os.getpid(),
+            'inicio': inicio.isoformat(timespec='milliseconds'),
+            'status': status,
+            'erro': erro,
+            'tempo_s': round(duracao, 6),
+            'cpu_s': round(cpu, 6),
+            'pico_memoria_mb': round(pico, 1) if pico else None,
+            **{contador: registro.contadores.get(contador) for contador in CONTADORES},
+            **{c: v for c, v in registro.contadores.items() if c not in CONTADORES},
+            'perfil': arquivo_perfil,
+        })
+
+
+def instrumentar(nome=None):
+    """
+    Decorador: cada chamada da função é medida como uma etapa (nome padrão: o nome da função).
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with etapa(nome or funcao.__name__):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def ler_registros(arquivo=None, execucao=None):
+    arquivo = ARQUIVO_METRICAS if arquivo is None else arquivo
+    if not arquivo or not os.path.exists(arquivo):
+        return []
+    with open(arquivo, encoding='utf-8') as entrada:
+        registros = [json.loads(linha) for linha in entrada if linha.strip()]
+    return [r for r in registros if execucao is None or r['execucao'] == execucao]
+
+
+def ler_ultima_execucao(arquivo=None, bloco=1 << 16):
+    """
+    Registros da execução mais recente, lendo o arquivo de trás para frente só
+    até o início dessa execução (o custo não cresce com o histórico).
+    """
+    arquivo = ARQUIVO_METRICAS if arquivo is None else arquivo
+    if not arquivo or not os.path.exists(arquivo):
+        return []
+    registros, execucao, resto = [], None, b''
+    with open(arquivo, 'rb') as entrada:
+        posicao = entrada.seek(0, os.SEEK_END)
+        while posicao > 0:
+            passo = min(bloco, posicao)
+            posicao -= passo
+            entrada.seek(posicao)
+            linhas = (entrada.read(passo) + resto).split(b'\n')
+            # a primeira linha pode estar incompleta: fica para a próxima leitura
+            resto = linhas.pop(0) if posicao > 0 else b''
+            for linha in reversed(linhas):
+                if not linha.strip():
+                    continue
+                registro = json.loads(linha)
+                execucao = execucao or registro['execucao']
+                if registro['execucao'] != execucao:
+                    return registros[::-1]
+                registros.append(registro)
+    return registros[::-1]
+
+
+def etapas_mais_lentas(registros, n=10):
+    return sorted(registros, key=lambda r: r['tempo_s'], reverse=True)[:n]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resumo das etapas mais lentas registradas em metricas_etapas.jsonl.")
+    parser.add_argument("--execucao", default=None, help="Filtra uma execução (padrão: a mais recente).")
+    parser.add_argument("-n", type=int, default=10)
+    args = parser.parse_args()
+    registros = ler_registros()
+    execucao = args.execucao or (registros[-1]['execucao'] if registros else None)
+    for r in etapas_mais_lentas(ler_registros(execucao=execucao), args.n):
+        print(f"{r['etapa']:<28} {r['tempo_s']:9.2f}s  cpu {r['cpu_s']:9.2f}s  pico {r['pico_memoria_mb'] or 0:8.1f} MB  "
+              f"entrada {r['linhas_entrada'] or 0:>11,}  saída {r['linhas_saida'] or 0:>11,}  "
+              f"dup {r['removidas_duplicatas'] or 0:>9,}  fk {r['removidas_fk'] or 0:>9,}")
@@ -0,0 +1,62 @@
+"""
+Motor de limpeza vetorizado usado pela correção automática.
+
+Cada função recebe uma coluna inteira (pd.Series) e devolve a coluna corrigida,
+reproduzindo exatamente o resultado das funções escalares de correcao_automatica
+aplicadas com Series.apply, mas sem uma chamada Python por célula.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _texto_nao_nulo(serie):
+    """
+    Retorna a máscara de valores preenchidos e esses valores convertidos com str().
+    """
+    preenchidos = serie.notna().to_numpy()
+    # object garante a semântica do módulo re (\D com dígitos unicode) em qualquer backend de string
+    return preenchidos, serie[preenchidos].astype(str).astype(object)
+
+
+def _montar_coluna(serie, preenchidos, valores):
+    """
+    Monta a coluna final com "" nas posições nulas, como as funções escalares.
+    """
+    resultado = np.full(len(serie), "", dtype=object)
+    resultado[preenchidos] = valores.to_numpy(dtype=object)
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+def padronizar_emails(serie):
+    """
+    Versão vetorizada de padronizar_email: strip + lower, nulos viram "".
+    """
+    preenchidos, valores = _texto_nao_nulo(serie)
+    return _montar_coluna(serie, preenchidos, valores.str.strip().str.lower())
+
+
+def padronizar_telefones(serie):
+    """
+    Versão vetorizada de padronizar_telefone: mantém apenas dígitos, completa com
+    zeros à esquerda até 11 posições ou trunca em 11; nulos viram "".
+    """
+    preenchidos, valores = _texto_nao_nulo(serie)
+    digitos = valores.str.replace(r'\D', '', regex=True)
+    return _montar_coluna(serie, preenchidos, digitos.str.zfill(11).str.slice(0, 11))
+
+
+def limitar_minimo(serie, minimo, tipo=float):
+    """
+    Equivalente vetorizado de ``serie.apply(lambda x: max(tipo(x), minimo))``.
+
+    Usa máscara em vez de clip para preservar -0.0 e NaN exatamente como max().
+    """
+    valores = serie.astype('float64' if tipo is float else 'int64').to_numpy()
+    abaixo = valores < minimo
+    if tipo is float and len(valores) and abaixo.all():
+        # max(float(x), 0) devolve o int 0 em todas as linhas e o apply infere int64
+        return pd.Series(np.full(len(valores), minimo), index=serie.index, name=serie.name)
+    corrigidos = np.where(abaixo, minimo, valores).astype(valores.dtype)
+    return pd.Series(corrigidos, index=serie.index, name=serie.name)
+
@@ -0,0 +1,145 @@
+"""
+Motor de datas compartilhado pela ingestão, correção e enriquecimento.
+
+As colunas de data têm poucos valores distintos (milhares de dias para milhões
+de linhas), então cada coluna é fatorada e só os valores distintos são
+interpretados; o resultado volta para as linhas por índice. Para os valores
+distintos:
+    1. o formato é o informado ou o primeiro de FORMATOS_CANDIDATOS que
+       interpreta uma amostra inteira, e a conversão é feita de uma vez com ele;
+    2. no modo tolerante (padrão), os valores que o formato não cobre passam
+       por pd.to_datetime escalar, como faziam as funções originais, com
+       memória (lru_cache) entre colunas, blocos e chamadas.
+No modo estrito (formato obrigatório) o que o formato não cobre vira NaT, como
+em pd.to_datetime(..., format=formato, errors='coerce').
+
+converter_datas devolve uma coluna datetime64; formatar_datas, calcular_idades
+e calcular_tempos_entrega reproduzem exatamente padronizar_data (correção),
+calcular_idade e calcular_tempo_entrega (enriquecimento) aplicadas por linha.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# só formatos em que a conversão direta concorda com o pd.to_datetime escalar
+FORMATOS_CANDIDATOS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y/%m/%d')
+AMOSTRA_INFERENCIA = 1000
+UNIDADE = 'datetime64[us]'
+
+
+@lru_cache(maxsize=65536)
+def _converter_valor(valor):
+    try:
+        data = pd.to_datetime(valor, errors='coerce')
+    except Exception:
+        return pd.NaT
+    if not isinstance(data, pd.Timestamp):
+        return pd.NaT
+    # o horário local é mantido: a coluna tipada não tem fuso; números viram
+    # instantes em nanossegundos, truncados para a unidade da coluna
+    data = data.tz_localize(None) if data.tzinfo is not None else data
+    return data.floor('us') if data.nanosecond else data
+
+
+def inferir_formato(valores, candidatos=FORMATOS_CANDIDATOS, amostra=AMOSTRA_INFERENCIA):
+    """
+    Primeiro formato candidato que interpreta todos os textos de uma amostra de
+    valores distintos; None se nenhum serve.
+    """
+    textos = pd.Series(valores, dtype=object)
+    textos = textos[textos.map(type) == str].head(amostra)
+    if textos.empty:
+        return None
+    for formato in candidatos:
+        if pd.to_datetime(textos, format=formato, errors='coerce').notna().all():
+            return formato
+    return None
+
+
+def _converter_unicos(unicos, formato=None, estrito=False):
+    """
+    Converte os valores distintos (object) para um DatetimeIndex sem fuso.
+    """
+    if formato is None:
+        formato = inferir_formato(unicos)
+        if formato is None and estrito:
+            raise ValueError("Modo estrito exige um formato (nenhum candidato interpreta a coluna).")
+    datas = pd.Series(pd.NaT, index=range(len(unicos)), dtype=UNIDADE)
+    pendentes = np.ones(len(unicos), dtype=bool)
+    if formato is not None:
+        textos = np.fromiter((type(v) == str for v in unicos), dtype=bool, count=len(unicos))
+        if textos.any():
+            convertidas = pd.to_datetime(pd.Series(unicos[textos], dtype=object), format=formato, errors='coerce')
+            if getattr(convertidas.dt, 'tz', None) is not None:
+                convertidas = convertidas.dt.tz_localize(None)
+            datas[textos] = convertidas.astype(UNIDADE).to_numpy()
+            pendentes = ~textos | datas.isna().to_numpy()
+        if estrito:
+            pendentes[:] = False
+    for posicao in np.flatnonzero(pendentes):
+        datas.iat[posicao] = _converter_valor(unicos[posicao])
+    return pd.DatetimeIndex(datas)
+
+
+def _fatorar(serie):
+    serie = pd.Series(serie, copy=False)
+    codigos, unicos = pd.factorize(serie)
+    return serie, codigos, np.asarray(unicos, dtype=object)
+
+
+def converter_datas(serie, formato=None, estrito=False):
+    """
+    Coluna datetime64 (sem fuso) a partir de texto, datas ou valores mistos;
+    o que não é data vira NaT. Colunas já datetime são devolvidas como estão.
+    """
+    serie = pd.Series(serie, copy=False)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    serie, codigos, unicos = _fatorar(serie)
+    datas = _converter_unicos(unicos, formato, estrito)
+    valores = np.full(len(serie), np.datetime64('NaT'), dtype=UNIDADE)
+    validos = codigos >= 0
+    valores[validos] = datas.to_numpy(dtype=UNIDADE)[codigos[validos]]
+    return pd.Series(valores, index=serie.index, name=serie.name)
+
+
+def formatar_datas(serie, formato_saida='%Y-%m-%d', formato=None):
+    """
+    Versão vetorizada de padronizar_data: data formatada como texto, "" quando
+    o valor não é uma data.
+    """
+    serie, codigos, unicos = _fatorar(serie)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        datas = pd.DatetimeIndex(pd.Series(unicos, dtype=serie.dtype))
+    else:
+        datas = _converter_unicos(unicos, formato)
+    textos = np.asarray(datas.strftime(formato_saida).fillna(''), dtype=object)
+    resultado = np.full(len(serie), '', dtype=object)
+    validos = codigos >= 0
+    resultado[validos] = textos[codigos[validos]]
+    return pd.Series(resultado, index=serie.index, name=serie.name, dtype='str')
+
+
+def calcular_idades(serie, hoje=None):
+    """
+    Versão vetorizada de calcular_idade: anos completos até hoje; datas
+    inválidas ou futuras dão 0.
+    """
+    hoje = hoje or datetime.now()
+    datas = converter_datas(serie)
+    ainda_nao = (datas.dt.month > hoje.month) | ((datas.dt.month == hoje.month) & (datas.dt.day > hoje.day))
+    idades = hoje.year - datas.dt.year - ainda_nao.astype('int64')
+    return idades.fillna(0).clip(lower=0).astype('int64')
+
+
+def calcular_tempos_entrega(envio, entrega):
+    """
+    Versão vetorizada de calcular_tempo_entrega: dias entre envio e entrega,
+    nulo quando alguma das datas é inválida (float nesse caso, como o apply).
+    """
+    dias = (converter_datas(entrega) - converter_datas(envio)).dt.days
+    return dias.astype('int64') if dias.notna().all() else dias.astype('float64')
+
@@ -0,0 +1,16 @@
+"""
+Normalização de texto compartilhada pelos módulos que comparam nomes
+(geocodificação de municípios, categorização de produtos).
+"""
+
+
+def normalizar_nomes(serie):
+    """
+    Remove acentos, aplica casefold e colapsa espaços de uma coluna de texto.
+    """
+    texto = serie.astype(object).where(serie.notna(), '').astype(str).astype(object)
+    return (texto.str.casefold()
+                 .str.normalize('NFKD')
+                 .str.replace('[\u0300-\u036f]', '', regex=True)
+                 .str.replace(r'\s+', ' ', regex=True)
+                 .str.strip())
@@ -0,0 +1,245 @@
+"""
+Orquestrador de etapas com dependências (DAG) executadas em paralelo.
+
+Cada etapa declara as etapas de que depende; as que estão prontas rodam ao mesmo
+tempo em um pool de processos, de modo que o tempo total se aproxima do caminho
+crítico do grafo em vez da soma de todas as etapas.
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+class Etapa:
+    """
+    Nó do grafo: uma função de módulo (precisa ser serializável pelo pickle),
+    seus argumentos e os nomes das etapas das quais depende.
+    """
+
+    def __init__(self, nome, funcao, args=(), kwargs=None, dependencias=()):
+        self.nome = nome
+        self.funcao = funcao
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.dependencias = tuple(dependencias)
+
+    def __repr__(self):
+        return f"Etapa({self.nome!r}, dependencias={list(self.dependencias)})"
+
+
+def ordenar_etapas(etapas):
+    """
+    Retorna as etapas em ordem topológica; falha se houver dependência
+    desconhecida ou ciclo.
+    """
+    por_nome = {etapa.nome: etapa for etapa in etapas}
+    if len(por_nome) != len(etapas):
+        raise ValueError("Nomes de etapas duplicados no grafo.")
+    pendentes = {}
+    for etapa in etapas:
+        desconhecidas = [d for d in etapa.dependencias if d not in por_nome]
+        if desconhecidas:
+            raise ValueError(f"Etapa '{etapa.nome}' depende de etapas inexistentes: {desconhecidas}")
+        pendentes[etapa.nome] = set(etapa.dependencias)
+    ordem = []
+    prontas = [nome for nome, deps in pendentes.items() if not deps]
+    while prontas:
+        nome = prontas.pop(0)
+        ordem.append(por_nome[nome])
+        for outro, deps in pendentes.items():
+            if nome in deps:
+                deps.remove(nome)
+                if not deps:
+                    prontas.append(outro)
+    if len(ordem) != len(etapas):
+        ciclo = sorted(nome for nome, deps in pendentes.items() if deps)
+        raise ValueError(f"Ciclo de dependências entre as etapas: {ciclo}")
+    return ordem
+
+
+def _executar_etapa(funcao, args, kwargs):
+    inicio = time.time()
+    contador = time.perf_counter()
+    retorno = funcao(*args, **kwargs)
+    return retorno, inicio, time.perf_counter() - contador
+
+
+def _descendentes(etapas, nome):
+    filhos = {}
+    for etapa in etapas:
+        for dep in etapa.dependencias:
+            filhos.setdefault(dep, []).append(etapa.nome)
+    encontrados, fila = set(), [nome]
+    while fila:
+        for filho in filhos.get(fila.pop(), []):
+            if filho not in encontrados:
+                encontrados.add(filho)
+                fila.append(filho)
+    return encontrados
+
+
+def executar_dag(etapas, max_workers=None, fail_fast=True):
+    """
+    Executa o grafo de etapas em um ProcessPoolExecutor.
+
+    fail_fast=True cancela o que ainda não começou na primeira falha; com
+    fail_fast=False as demais etapas continuam e apenas as descendentes da etapa
+    que falhou são ignoradas. Retorna {nome: resultado} com status ('ok', 'erro',
+    'ignorada' ou 'cancelada'), inicio, duracao, retorno e erro.
+    """
+    ordem = ordenar_etapas(etapas)
+    # todas as etapas gravam suas métricas (instrumentacao) com o mesmo id de execução
+    from instrumentacao import EXECUCAO
+    os.environ.setdefault('DATAOPS_EXECUCAO', EXECUCAO)
+    resultados = {etapa.nome: {'status': 'pendente', 'inicio': None, 'duracao': None,
+                               'retorno': None, 'erro': None} for etapa in ordem}
+    faltando = {etapa.nome: set(etapa.dependencias) for etapa in ordem}
+    inicio_total = time.perf_counter()
+    abortar = False
+
+    # os processos do pool (inclusive com spawn) registram no mesmo console e log de auditoria
+    from configuracao_logs import configurar_logs
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=configurar_logs) as executor:
+        em_execucao = {}
+
+        def submeter_prontas():
+            for etapa in ordem:
+                if resultados[etapa.nome]['status'] == 'pendente' and not faltando[etapa.nome]:
+                    resultados[etapa.nome]['status'] = 'executando'
+                    futuro = executor.submit(_executar_etapa, etapa.funcao, etapa.args, etapa.kwargs)
+                    em_execucao[futuro] = etapa.nome
+
+        submeter_prontas()
+        while em_execucao:
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                nome = em_execucao.pop(futuro)
+                try:
+                    retorno, inicio, duracao = futuro.result()
+                except Exception as e:
+                    resultados[nome].update(status='erro', erro=repr(e))
+                    logging.error(f"Etapa '{nome}' falhou: {e!r}")
+                    for descendente in _descendentes(ordem, nome):
+                        if resultados[descendente]['status'] == 'pendente':
+                            resultados[descendente]['status'] = 'ignorada'
+                    abortar = abortar or fail_fast
+                    continue
+                resultados[nome].update(status='ok', inicio=inicio, duracao=duracao, retorno=retorno)
+                logging.info(f"Etapa '{nome}' concluída em {duracao:.2f}s.")
+                for pendentes in faltando.values():
+                    pendentes.discard(nome)
+            if abortar:
+                for futuro, nome in list(em_execucao.items()):
+                    if futuro.cancel():
+                        resultados[nome]['status'] = 'cancelada'
+                        em_execucao.pop(futuro)
+                for resultado in resultados.values():
+                    if resultado['status'] == 'pendente':
+                        resultado['status'] = 'cancelada'
+            else:
+                submeter_prontas()
+
+    tempo_total = time.perf_counter() - inicio_total
+    relatorio_execucao(ordem, resultados, tempo_total)
+    return resultados
+
+
+def caminho_critico(etapas, resultados):
+    """
+    Soma das durações ao longo do caminho mais longo do grafo (limite inferior
+    do tempo total com paralelismo ilimitado).
+    """
+    termino = {}
+    for etapa in ordenar_etapas(etapas):
+        duracao = resultados[etapa.nome]['duracao'] or 0.0
+        termino[etapa.nome] = duracao + max((termino[d] for d in etapa.dependencias), default=0.0)
+    return max(termino.values(), default=0.0)
+
+
+def relatorio_execucao(etapas, resultados, tempo_total):
+    logging.info("--- Tempo por etapa ---")
+    for etapa in etapas:
+        resultado = resultados[etapa.nome]
+        duracao = f"{resultado['duracao']:.2f}s" if resultado['duracao'] is not None else "-"
+        logging.info(f"{etapa.nome:<24} {resultado['status']:<10} {duracao}")
+    soma = sum(r['duracao'] or 0.0 for r in resultados.values())
+    logging.info(f"Tempo total: {tempo_total:.2f}s | caminho crítico: {caminho_critico(etapas, resultados):.2f}s "
+                 f"| soma das etapas: {soma:.2f}s")
+
+
+def pipeline_completo(diretorio_origem='../notebooks/datasets', chunksize=None, incremental=False):
+    """
+    Grafo padrão: ingestão -> correção -> enriquecimento, deduplicação de clientes e alertas.
+    """
+    from armazenamento import caminho_processado as p
+    from correcao_automatica import corrigir_clientes, corrigir_produtos, corrigir_vendas, corrigir_logistica
+    from deduplicacao_clientes import deduplicar_clientes
+    from enriquecimento_dados import enriquecer_clientes, enriquecer_produtos, enriquecer_logistica
+    from pipeline_ingestao import executar_ingestao
+    from sistema_alertas import verificar_alertas_clientes, verificar_alertas_produtos, verificar_alertas_vendas
+
+    bloco = {'chunksize': chunksize, 'incremental': incremental}
+    inc = {'incremental': incremental}
+    return [
+        Etapa('ingestao', executar_ingestao, (diretorio_origem,), bloco),
+        Etapa('corrigir_clientes', corrigir_clientes, (p('clientes'), p('clientes_corrigido')), bloco, ['ingestao']),
+        Etapa('corrigir_produtos', corrigir_produtos, (p('produtos'), p('produtos_corrigido')), bloco, ['ingestao']),
+        Etapa('corrigir_vendas', corrigir_vendas,
+              (p('vendas'), p('vendas_corrigido'), p('clientes_corrigido'), p('produtos_corrigido')), bloco,
+              ['corrigir_clientes', 'corrigir_produtos']),
+        Etapa('corrigir_logistica', corrigir_logistica,
+              (p('logistica'), p('logistica_corrigido'), p('vendas_corrigido')), bloco, ['corrigir_vendas']),
+        Etapa('enriquecer_clientes', enriquecer_clientes, (p('clientes_corrigido'), p('clientes_enriquecido')), inc,
+              dependencias=['corrigir_clientes']),
+        Etapa('enriquecer_produtos', enriquecer_produtos, (p('produtos_corrigido'), p('produtos_enriquecido')), inc,
+              dependencias=['corrigir_produtos']),
+        Etapa('enriquecer_logistica', enriquecer_logistica, (p('logistica_corrigido'), p('logistica_enriquecido')), inc,
+              dependencias=['corrigir_logistica']),
+        Etapa('deduplicar_clientes', deduplicar_clientes,
+              (p('clientes_corrigido'), p('clientes_consolidado'), p('clientes_clusters')),
+              dependencias=['corrigir_clientes']),
+        Etapa('alertas_clientes', verificar_alertas_clientes, (p('clientes_corrigido'),),
+              dependencias=['corrigir_clientes']),
+        Etapa('alertas_produtos', verificar_alertas_produtos, (p('produtos_corrigido'),),
+              dependencias=['corrigir_produtos']),
+        Etapa('alertas_vendas', verificar_alertas_vendas, (p('vendas_corrigido'),),
+              dependencias=['corrigir_vendas']),
+    ]
+
+
+def executar_pipeline(max_workers=None, fail_fast=True, chunksize=None, incremental=False,
+                      diretorio_origem='../notebooks/datasets'):
+    """
+    Executa o grafo padrão e exibe os alertas das etapas de alertas.
+    """
+    resultados = executar_dag(pipeline_completo(diretorio_origem, chunksize=chunksize, incremental=incremental),
+                              max_workers=max_workers, fail_fast=fail_fast)
+
+    from sistema_alertas import dashboard_alertas
+    alertas = []
+    for nome in ('alertas_clientes', 'alertas_produtos', 'alertas_vendas'):
+        alertas += resultados[nome]['retorno'] or []
+    dashboard_alertas(alertas)
+    return resultados
+
+
+if __name__ == "__main__":
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    parser = argparse.ArgumentParser(description="Executa o pipeline DataOps como um grafo de etapas paralelas.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Número de processos do pool.")
+    parser.add_argument("--continuar-em-erro", action="store_true",
+                        help="Continua as etapas independentes quando uma etapa falha.")
+    parser.add_argument("--tamanho-bloco", type=int, default=None, help="Ativa a correção em blocos de N linhas.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Processa apenas as linhas novas e pula etapas cujas entradas não mudaram.")
+    args = parser.parse_args()
+
+    resultados = executar_pipeline(args.workers, fail_fast=not args.continuar_em_erro,
+                                   chunksize=args.tamanho_bloco, incremental=args.incremental)
+    if any(r['status'] != 'ok' for r in resultados.values()):
+        raise SystemExit(1)
@@ -1,50 +1,145 @@
 import pandas as pd
+import numpy as np
+import glob
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
+from armazenamento import DIRETORIO_PROCESSADO, caminho_processado, formato_do_caminho, ler_tabela, salvar_tabela
+from carregador import carregar_tabela
+from incremental import processar_incremental, processar_incremental_particoes
+from instrumentacao import contar, etapa, instrumentar
+from motor_datas import converter_datas
+from planos_tipos import PLANOS, aplicar_plano, tipos_leitura
+from validacao_schema import ValidadorSchema, ler_validando, validar_dataframe
 
-os.makedirs('../data/quality', exist_ok=True)
-os.makedirs('../data/processed', exist_ok=True)
-
-# Configuração do logger de auditoria
-logging.basicConfig(
-    filename='../data/quality/auditoria.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-def carregar_dados(caminho, nome):
+def carregar_dados(caminho, nome, schema=None, chunksize=None):
+    """
+    Carrega um CSV já tipado pelo plano do dataset (planos_tipos; a conversão
+    não perde valores, então a validação ainda enxerga os inválidos). Com schema
+    e chunksize o arquivo é lido em blocos, com os tipos de leitura do plano, e
+    validado durante a leitura, sem uma segunda passada sobre o DataFrame.
+    """
+    tipos = tipos_leitura(PLANOS.get(nome)) or None
     try:
-        df = pd.read_csv(caminho)
+        with etapa(f'carregar_{nome}'):
+            if schema is not None and chunksize:
+                validador = ValidadorSchema(schema)
+                df = pd.concat(ler_validando(caminho, validador, chunksize, tipos), ignore_index=True)
+                registrar_validacao(validador.erros(), nome)
+            else:
+                df = carregar_tabela(caminho, dtypes=PLANOS.get(nome))
+            contar('linhas_entrada', len(df))
+            contar('linhas_saida', len(df))
         logging.info(f'Dataset {nome} carregado com sucesso. Registros: {len(df)}')
         return df
     except Exception as e:
         logging.error(f'Erro ao carregar {nome}: {e}')
         return pd.DataFrame()
 
-def validar_schema(df, schema, nome):
-    erros = []
-    for coluna, tipo in schema.items():
-        if coluna not in df.columns:
-            erros.append(f'Coluna ausente: {coluna}')
-        elif not df[coluna].map(lambda x: isinstance(x, tipo) or pd.isnull(x)).all():
-            erros.append(f'Tipo incorreto na coluna: {coluna}')
+def registrar_validacao(erros, nome):
     if erros:
         logging.warning(f'Erros de schema em {nome}: {erros}')
     else:
         logging.info(f'Schema validado para {nome}')
+
+def validar_schema(df, schema, nome):
+    with etapa(f'validar_schema_{nome}'):
+        contar('linhas_entrada', len(df))
+        erros = validar_dataframe(df, schema)
+        contar('colunas_com_erro', len(erros))
+    registrar_validacao(erros, nome)
     return erros
 
+# Origens particionadas: um diretório ou glob por dataset (ex.: vendas/2024-01-01.csv.gz),
+# lido por um pool de threads limitado; cada linha guarda a partição de origem.
+LEITORES_PARTICOES = int(os.environ.get('DATAOPS_LEITORES_INGESTAO', '8'))
+COLUNA_PARTICAO = 'particao'
+
+def resolver_origem(diretorio_origem, nome, origens=None):
+    """
+    Origem de um dataset: a informada em origens (arquivo, diretório ou glob), o
+    diretório <diretorio_origem>/<nome>/ com as partições ou o arquivo <nome>.csv.
+    """
+    if origens and nome in origens:
+        return origens[nome]
+    diretorio = os.path.join(diretorio_origem, nome)
+    return diretorio if os.path.isdir(diretorio) else os.path.join(diretorio_origem, f'{nome}.csv')
+
+def particionada(origem):
+    return os.path.isdir(origem) or any(c in origem for c in '*?[')
+
+def _suportado(caminho):
+    try:
+        formato_do_caminho(caminho)
+        return True
+    except ValueError:
+        return False
+
+def listar_particoes(origem):
+    """
+    Arquivos de uma origem, em ordem: os do diretório (sem subdiretórios) ou os
+    que casam com o glob (** percorre subdiretórios).
+    """
+    if os.path.isdir(origem):
+        caminhos = [os.path.join(origem, arquivo) for arquivo in os.listdir(origem) if not arquivo.startswith('.')]
+    elif particionada(origem):
+        caminhos = glob.glob(origem, recursive=True)
+    else:
+        return [origem]
+    return sorted(c for c in caminhos if os.path.isfile(c) and _suportado(c))
+
+def rotulos_particoes(origem, particoes):
+    """
+    Rótulo de cada partição: o caminho relativo à raiz da origem.
+    """
+    raiz = origem if os.path.isdir(origem) else os.path.commonpath([os.path.dirname(c) or '.' for c in particoes])
+    return [os.path.relpath(c, raiz) for c in particoes]
+
+def _ler_particao(caminho, schema, tipos=None):
+    df = ler_tabela(caminho, dtype=tipos)
+    return df, (validar_dataframe(df, schema) if schema is not None else [])
+
+def carregar_particoes(origem, nome, schema=None, max_workers=LEITORES_PARTICOES):
+    """
+    Lê as partições da origem em paralelo (threads: leitura e descompressão são
+    limitadas por I/O), valida cada uma com o schema e junta tudo em um único
+    concat, com a partição de cada linha na coluna COLUNA_PARTICAO (categórica).
+    """
+    particoes = listar_particoes(origem)
+    if not particoes:
+        raise FileNotFoundError(f'Nenhuma partição de {nome} encontrada em {origem}')
+    rotulos = rotulos_particoes(origem, particoes)
+    with etapa(f'carregar_{nome}'):
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(particoes)))) as pool:
+            tipos = tipos_leitura(PLANOS.get(nome)) or None
+            lidas = list(pool.map(lambda caminho: _ler_particao(caminho, schema, tipos), particoes))
+        erros = 0
+        for rotulo, (_, erros_particao) in zip(rotulos, lidas):
+            registrar_validacao(erros_particao, f'{nome}[{rotulo}]')
+            erros += len(erros_particao)
+        tamanhos = [len(parte) for parte, _ in lidas]
+        df = pd.concat([parte for parte, _ in lidas], ignore_index=True)
+        del lidas
+        df[COLUNA_PARTICAO] = pd.Categorical.from_codes(np.repeat(np.arange(len(rotulos)), tamanhos),
+                                                        categories=rotulos)
+        contar('particoes', len(particoes))
+        contar('colunas_com_erro', erros)
+        contar('linhas_entrada', len(df))
+        contar('linhas_saida', len(df))
+    logging.info(f'Dataset {nome} carregado de {len(particoes)} partições. Registros: {len(df)}')
+    return df
+
 # Schemas esperados (exemplo simplificado)
 schema_clientes = {
     'id_cliente': int,
     'nome': str,
     'email': str,
     'telefone': str,
-    'data_nascimento': str,
+    'data_nascimento': 'data',
     'cidade': str,
     'estado': str,
-    'data_cadastro': str
+    'data_cadastro': 'data'
 }
 
 schema_produtos = {
@@ -53,38 +148,123 @@ schema_produtos = {
     'categoria': str,
     'preco': float,
     'estoque': int,
-    'data_criacao': str,
-    'ativo': str
+    'data_criacao': 'data',
+    'ativo': bool
 }
 
-# Carregar datasets
-clientes = carregar_dados('../notebooks/datasets/clientes.csv', 'clientes')
-produtos = carregar_dados('../notebooks/datasets/produtos.csv', 'produtos')
-vendas = carregar_dados('../notebooks/datasets/vendas.csv', 'vendas')
-logistica = carregar_dados('../notebooks/datasets/logistica.csv', 'logistica')
+schema_vendas = {
+    'id_venda': int,
+    'id_cliente': int,
+    'id_produto': int,
+    'quantidade': int,
+    'valor_unitario': float,
+    'valor_total': float,
+    'data_venda': 'data',
+    'status': str
+}
 
-# Validar schemas
-validar_schema(clientes, schema_clientes, 'clientes')
-validar_schema(produtos, schema_produtos, 'produtos')
-# Adicione validação para vendas e logística conforme necessário
+schema_logistica = {
+    'id_entrega': int,
+    'id_venda': int,
+    'transportadora': str,
+    'data_envio': 'data',
+    'data_entrega_prevista': 'data',
+    'data_entrega_real': 'data',
+    'status_entrega': str
+}
 
 # Tratamento de erros de formato (exemplo para datas)
 def padronizar_data(df, coluna, formato='%Y-%m-%d'):
     try:
-        df[coluna] = pd.to_datetime(df[coluna], format=formato, errors='coerce')
+        df[coluna] = converter_datas(df[coluna], formato=formato, estrito=True)
         logging.info(f'Datas padronizadas na coluna {coluna}')
     except Exception as e:
         logging.error(f'Erro ao padronizar datas em {coluna}: {e}')
     return df
 
-clientes = padronizar_data(clientes, 'data_nascimento')
-clientes = padronizar_data(clientes, 'data_cadastro')
-produtos = padronizar_data(produtos, 'data_criacao')
+# Colunas de data padronizadas, coluna de watermark e chaves de cada dataset.
+# O watermark usa os ids (crescentes) em vez das datas: uma data futura digitada
+# errado (ex.: vendas 1005 em 2024-12-31) avançaria o watermark além das linhas novas.
+DATASETS = {
+    'clientes': {'datas': ['data_nascimento', 'data_cadastro'], 'watermark': 'id_cliente',
+                 'chaves': ['id_cliente', 'email']},
+    'produtos': {'datas': ['data_criacao'], 'watermark': 'id_produto', 'chaves': ['id_produto', 'nome_produto']},
+    'vendas': {'datas': [], 'watermark': 'id_venda', 'chaves': ['id_venda']},
+    'logistica': {'datas': [], 'watermark': 'id_entrega', 'chaves': ['id_entrega']},
+}
+
+SCHEMAS = {
+    'clientes': schema_clientes,
+    'produtos': schema_produtos,
+    'vendas': schema_vendas,
+    'logistica': schema_logistica,
+}
+
+def preparar_dataset(df, nome, validar=True):
+    """
+    Valida o schema (quando definido), padroniza as colunas de data e aplica o
+    plano de tipos compacto do dataset (depois da validação, que vê os valores originais).
+    """
+    if validar and nome in SCHEMAS:
+        validar_schema(df, SCHEMAS[nome], nome)
+    for coluna in DATASETS[nome]['datas']:
+        df = padronizar_data(df, coluna)
+    return aplicar_plano(df, PLANOS.get(nome))
+
+@instrumentar('ingestao')
+def executar_ingestao(diretorio_origem='../notebooks/datasets', incremental=False, chunksize=None,
+                      diretorio_destino=DIRETORIO_PROCESSADO, origens=None):
+    """
+    Carrega os datasets brutos, valida os schemas, padroniza as datas e grava os
+    arquivos processados usados pelas etapas seguintes.
+
+    A origem de cada dataset vem de resolver_origem: um arquivo ou, para dados
+    particionados, um diretório ou glob (origens={'vendas': '../landing/vendas/*.csv.gz'}).
+    Com incremental=True cada dataset (ou partição) é pulado se o arquivo de origem
+    não mudou e, caso contrário, apenas as linhas acima do watermark são processadas
+    e anexadas; as linhas novas de todas as partições entram em uma única parte.
+    Com chunksize o schema de origens de arquivo único é validado bloco a bloco
+    durante a leitura; partições são lidas e validadas inteiras.
+    """
+    for nome, config in DATASETS.items():
+        origem = resolver_origem(diretorio_origem, nome, origens)
+        destino = caminho_processado(nome, diretorio=diretorio_destino)
+        if incremental and particionada(origem):
+            particoes = listar_particoes(origem)
+            particoes = dict(zip(rotulos_particoes(origem, particoes), particoes))
+            processar_incremental_particoes(f'ingestao_{nome}', particoes, destino, config['watermark'],
+                                            config['chaves'], lambda df, nome=nome: preparar_dataset(df, nome),
+                                            COLUNA_PARTICAO,
+                                            tipos=tipos_leitura(PLANOS.get(nome)) or None)
+        elif incremental:
+            processar_incremental(f'ingestao_{nome}', origem, destino, config['watermark'],
+                                  config['chaves'], lambda df, nome=nome: preparar_dataset(df, nome),
+                                  tipos=tipos_leitura(PLANOS.get(nome)) or None)
+        elif particionada(origem):
+            df = carregar_particoes(origem, nome, SCHEMAS.get(nome))
+            contar('linhas_entrada', len(df))
+            df = preparar_dataset(df, nome, validar=False)
+            contar('linhas_saida', len(df))
+            salvar_tabela(df, destino)
+        else:
+            df = carregar_dados(origem, nome, SCHEMAS.get(nome), chunksize)
+            contar('linhas_entrada', len(df))
+            df = preparar_dataset(df, nome, validar=not chunksize)
+            contar('linhas_saida', len(df))
+            salvar_tabela(df, destino)
+
+    logging.info('Pipeline de ingestão finalizado com sucesso.')
+
+if __name__ == "__main__":
+    import argparse
 
-# Salvar dados processados
-clientes.to_csv('../data/processed/clientes.csv', index=False)
-produtos.to_csv('../data/processed/produtos.csv', index=False)
-vendas.to_csv('../data/processed/vendas.csv', index=False)
-logistica.to_csv('../data/processed/logistica.csv', index=False)
+    from configuracao_logs import configurar_logs
 
-logging.info('Pipeline de ingestão finalizado com sucesso.')
+    configurar_logs()
+    parser = argparse.ArgumentParser(description="Ingestão dos datasets brutos.")
+    parser.add_argument("--origem", action="append", default=[], metavar="DATASET=CAMINHO",
+                        help="Arquivo, diretório ou glob de partições de um dataset (pode repetir).")
+    args = parser.parse_args()
+    executar_ingestao(incremental=os.environ.get("DATAOPS_INCREMENTAL") == "1",
+                      chunksize=int(os.environ.get("DATAOPS_TAMANHO_BLOCO", "0")) or None,
+                      origens=dict(origem.split('=', 1) for origem in args.origem))
@@ -0,0 +1,188 @@
+"""
+Planos de tipos compactos por dataset.
+
+Complementam os schemas de validação de pipeline_ingestao (schema_clientes etc.):
+o schema diz o que é válido, o plano diz como cada coluna fica em memória.
+    'category'       colunas de baixa cardinalidade (estado, status, transportadora...)
+    'Int32'          ids e quantidades como inteiros anuláveis de 32 bits
+    'boolean'        booleano anulável (ativo)
+    'data'           datas ISO convertidas para datetime64
+    TEXTO            texto livre em string Arrow (string[pyarrow], ou 'string' sem pyarrow)
+
+aplicar_plano nunca perde informação: se a conversão de uma coluna transformaria
+um valor preenchido em nulo (id não numérico, data em outro formato, número
+fracionário em coluna inteira), a coluna fica como está e um aviso é registrado,
+para que a validação de schema continue enxergando o valor original.
+
+tipos_leitura traduz o plano para o dtype= do read_csv, para que as colunas de
+texto e categóricas já sejam montadas compactas durante a leitura (o maior
+ganho de memória): categorias e texto Arrow como no plano, datas como texto
+(convertidas depois por aplicar_plano). Inteiros e booleanos ficam para
+aplicar_plano, que sabe desistir sem perder valores; um dtype= desses tipos no
+read_csv falharia na primeira célula inválida.
+"""
+
+import importlib.util
+import logging
+
+import numpy as np
+import pandas as pd
+
+from motor_datas import converter_datas
+
+TEXTO = 'string[pyarrow]' if importlib.util.find_spec('pyarrow') else 'string'
+
+PLANOS = {
+    'clientes': {
+        'id_cliente': 'Int32',
+        'nome': TEXTO,
+        'email': TEXTO,
+        'telefone': TEXTO,
+        'data_nascimento': 'data',
+        'cidade': 'category',
+        'estado': 'category',
+        'data_cadastro': 'data',
+    },
+    'produtos': {
+        'id_produto': 'Int32',
+        'nome_produto': TEXTO,
+        'categoria': 'category',
+        'estoque': 'Int32',
+        'data_criacao': 'data',
+        'ativo': 'boolean',
+    },
+    'vendas': {
+        'id_venda': 'Int32',
+        'id_cliente': 'Int32',
+        'id_produto': 'Int32',
+        'quantidade': 'Int32',
+        'data_venda': 'data',
+        'status': 'category',
+    },
+    'logistica': {
+        'id_entrega': 'Int32',
+        'id_venda': 'Int32',
+        'transportadora': 'category',
+        'data_envio': 'data',
+        'data_entrega_prevista': 'data',
+        'data_entrega_real': 'data',
+        'status_entrega': 'category',
+    },
+}
+
+LEITURA = {TEXTO: TEXTO, 'category': 'category', 'data': 'str'}
+
+BOOLEANOS = {'true': True, 'false': False, '1': True, '0': False}
+
+
+def _inteiro(serie, tipo):
+    if pd.api.types.is_bool_dtype(serie):
+        return None
+    numeros = pd.to_numeric(serie, errors='coerce')
+    valores = numeros.to_numpy(dtype='float64', na_value=np.nan)
+    preenchidos = ~np.isnan(valores)
+    info = np.iinfo(tipo.lower())
+    if (numeros.isna().sum() != serie.isna().sum()
+            or not np.all(valores[preenchidos] == np.trunc(valores[preenchidos]))
+            or not np.all((valores[preenchidos] >= info.min) & (valores[preenchidos] <= info.max))):
+        return None
+    return numeros.astype(tipo)
+
+
+def _booleano(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.astype('boolean')
+    texto = serie.astype(object).where(serie.notna()).astype(str).str.strip().str.lower()
+    convertido = texto.map(BOOLEANOS).astype('boolean')
+    return convertido if convertido.isna().sum() == serie.isna().sum() else None
+
+
+def _data(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    datas = converter_datas(serie, formato='ISO8601', estrito=True)
+    return datas if datas.isna().sum() == serie.isna().sum() else None
+
+
+def tipos_leitura(plano):
+    """
+    dtype= para pd.read_csv com as colunas do plano que podem ser tipadas na leitura.
+    """
+    return {coluna: LEITURA[tipo] for coluna, tipo in (plano or {}).items() if tipo in LEITURA}
+
+
+def converter_coluna(serie, tipo):
+    """
+    Converte uma coluna para o tipo do plano; retorna None se a conversão perderia valores.
+    """
+    if tipo == 'data':
+        return _data(serie)
+    if tipo == 'boolean':
+        return _booleano(serie)
+    if tipo in ('Int8', 'Int16', 'Int32', 'Int64'):
+        return serie if str(serie.dtype) == tipo else _inteiro(serie, tipo)
+    if str(serie.dtype) == str(pd.api.types.pandas_dtype(tipo)):
+        return serie
+    return serie.astype(tipo)
+
+
+def aplicar_plano(df, plano):
+    """
+    Aplica o plano às colunas presentes em df (as demais não são alteradas).
+    """
+    for coluna, tipo in (plano or {}).items():
+        if coluna not in df.columns:
+            continue
+        try:
+            convertida = converter_coluna(df[coluna], tipo)
+        except (TypeError, ValueError) as e:
+            logging.warning(f"Plano de tipos: coluna {coluna} mantida como {df[coluna].dtype} ({e})")
+            continue
+        if convertida is None:
+            logging.warning(f"Plano de tipos: coluna {coluna} mantida como {df[coluna].dtype} "
+                            f"(a conversão para {tipo} perderia valores)")
+            continue
+        df[coluna] = convertida
+    return df
+
+
+def memoria_por_coluna(df):
+    return df.memory_usage(deep=True, index=False)
+
+
+def relatorio_memoria(antes, depois, nome=''):
+    """
+    Compara o uso de memória por coluna antes e depois do plano, registra o
+    total no log e retorna o DataFrame do relatório.
+    """
+    relatorio = pd.DataFrame({
+        'tipo_antes': antes.dtypes.astype(str),
+        'tipo_depois': depois.dtypes.astype(str),
+        'bytes_antes': memoria_por_coluna(antes),
+        'bytes_depois': memoria_por_coluna(depois),
+    })
+    relatorio['reducao'] = relatorio['bytes_antes'] / relatorio['bytes_depois'].where(relatorio['bytes_depois'] > 0)
+    total_antes, total_depois = int(relatorio['bytes_antes'].sum()), int(relatorio['bytes_depois'].sum())
+    logging.info(f"Memória {nome}: {total_antes / 2**20:.2f} MB -> {total_depois / 2**20:.2f} MB "
+                 f"({total_antes / max(total_depois, 1):.1f}x)")
+    return relatorio
+
+
+def medir_plano(caminho, nome):
+    """
+    Lê o CSV sem plano (como pd.read_csv puro) e com o plano do dataset e
+    retorna o relatório de memória.
+    """
+    antes = pd.read_csv(caminho)
+    return relatorio_memoria(antes, aplicar_plano(antes.copy(), PLANOS[nome]), nome)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    diretorio = sys.argv[1] if len(sys.argv) > 1 else '../notebooks/datasets'
+    for dataset in PLANOS:
+        print(f"\n--- {dataset} ---")
+        print(medir_plano(os.path.join(diretorio, f'{dataset}.csv'), dataset).to_string())
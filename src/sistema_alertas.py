@@ -1,34 +1,35 @@
 import logging
-import pandas as pd
+from agregador_metricas import avaliar_regras, calcular_metricas, carregar_regras
+from armazenamento import caminho_processado
+from backend_sql import BACKEND, calcular_metricas_sql
+from historico_metricas import registrar_tendencias
+from instrumentacao import etapa
+from planos_tipos import PLANOS
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+def verificar_alertas(dataset, path, regras=None):
+    """
+    Avalia as regras configuradas para o dataset com uma única leitura do arquivo
+    e, para as regras com "tendencia", compara as métricas com o histórico.
+    """
+    regras = (regras or carregar_regras()).get(dataset, [])
+    if not regras:
+        return []
+    with etapa(f'alertas_{dataset}'):
+        if BACKEND == 'sqlite':
+            metricas = calcular_metricas_sql(path, regras)
+        else:
+            metricas = calcular_metricas(path, regras, plano=PLANOS.get(dataset))
+        logging.info(f"Métricas de {dataset}: {metricas}")
+        return avaliar_regras(regras, metricas) + registrar_tendencias(dataset, regras, metricas)
 
 def verificar_alertas_clientes(path):
-    df = pd.read_csv(path)
-    alertas = []
-    if df['email'].str.contains(r'^[\w\.-]+@[\w\.-]+\.\w+$', na=False).mean() < 0.98:
-        alertas.append("Alerta: Mais de 2% dos emails de clientes são inválidos!")
-    if df['nome'].isnull().mean() > 0.02:
-        alertas.append("Alerta: Mais de 2% dos clientes sem nome informado!")
-    return alertas
+    return verificar_alertas('clientes', path)
 
 def verificar_alertas_produtos(path):
-    df = pd.read_csv(path)
-    alertas = []
-    if (df['preco'] < 0).mean() > 0.01:
-        alertas.append("Alerta: Existem produtos com preço negativo!")
-    if df['categoria'].isnull().mean() > 0.02:
-        alertas.append("Alerta: Mais de 2% dos produtos sem categoria!")
-    return alertas
+    return verificar_alertas('produtos', path)
 
 def verificar_alertas_vendas(path):
-    df = pd.read_csv(path)
-    alertas = []
-    if (df['quantidade'] < 1).mean() > 0.01:
-        alertas.append("Alerta: Existem vendas com quantidade negativa ou zero!")
-    if (df['valor_total'] < 0).mean() > 0.01:
-        alertas.append("Alerta: Existem vendas com valor total negativo!")
-    return alertas
+    return verificar_alertas('vendas', path)
 
 def dashboard_alertas(alertas):
     print("\n--- Dashboard de Alertas Ativos ---")
@@ -38,10 +39,20 @@ def dashboard_alertas(alertas):
         for alerta in alertas:
             print(alerta)
 
-if __name__ == "__main__":
+def executar_alertas():
+    """
+    Avalia as regras de clientes, produtos e vendas corrigidos e exibe os alertas.
+    """
     alertas = []
-    alertas += verificar_alertas_clientes("../data/processed/clientes_corrigido.csv")
-    alertas += verificar_alertas_produtos("../data/processed/produtos_corrigido.csv")
-    alertas += verificar_alertas_vendas("../data/processed/vendas_corrigido.csv")
+    alertas += verificar_alertas_clientes(caminho_processado("clientes_corrigido"))
+    alertas += verificar_alertas_produtos(caminho_processado("produtos_corrigido"))
+    alertas += verificar_alertas_vendas(caminho_processado("vendas_corrigido"))
     dashboard_alertas(alertas)
-    logging.info("Sistema de alertas executado.")
\ No newline at end of file
+    logging.info("Sistema de alertas executado.")
+    return alertas
+
+if __name__ == "__main__":
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    executar_alertas()
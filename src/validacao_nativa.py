@@ -0,0 +1,362 @@
+"""
+Backend nativo de validação para as expectativas usadas nas suítes do projeto.
+
+Executa uma expectation suite salva pelo Great Expectations (o JSON em
+great_expectations/expectations/<suite>.json) diretamente com kernels
+vetorizados de numpy/pandas, sem get_validator nem RuntimeDataConnector:
+    expect_column_values_to_not_be_null
+    expect_column_values_to_be_unique
+    expect_column_values_to_match_regex
+    expect_column_values_to_be_between
+    expect_column_values_to_be_in_set
+    expect_column_values_to_be_close          (other: coluna ou lista de colunas multiplicadas)
+    expect_column_values_to_be_in_key_index   (expectativas_customizadas)
+
+Todas as expectativas são avaliadas em uma passada: os dados de cada coluna
+(máscara de nulos, texto, números) são derivados uma vez por bloco e
+compartilhados entre as expectativas da coluna. O estado de cada expectativa é
+feito só de contagens (para unicidade, das contagens de valores de cada bloco,
+somadas uma única vez no final), então o validador pode ser alimentado bloco a
+bloco e validadores de partes diferentes do arquivo podem ser combinados.
+
+O resultado segue o formato de ExpectationSuiteValidationResult.to_json_dict()
+(result_format BASIC): element_count, missing_count, unexpected_count,
+unexpected_percent, partial_unexpected_list, success calculado com mostly etc.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import ler_em_blocos
+from indice_chaves import abrir_indice
+from instrumentacao import contar, etapa
+
+DIRETORIO_SUITES = 'great_expectations/expectations'
+MAX_EXEMPLOS = 20
+MAX_CONTAGENS_PARCIAIS = 32
+TAMANHO_BLOCO = 1_000_000
+
+
+def carregar_suite(nome, diretorio=DIRETORIO_SUITES):
+    with open(os.path.join(diretorio, f"{nome}.json"), encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _valor_json(valor):
+    if isinstance(valor, (pd.Timestamp, datetime)):
+        return valor.isoformat()
+    if pd.isnull(valor):
+        return None
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+def _somar_contagens(contagens):
+    """
+    Soma contagens de valores parciais em uma única passada (concat + groupby).
+    """
+    if not contagens:
+        return pd.Series(dtype='int64')
+    if len(contagens) == 1:
+        return contagens[0]
+    return pd.concat(contagens).groupby(level=0, sort=False).sum()
+
+
+class _Coluna:
+    """
+    Derivações de uma coluna de um bloco, calculadas sob demanda uma única vez.
+    """
+
+    def __init__(self, serie):
+        self.serie = serie
+        self._cache = {}
+
+    def _derivar(self, nome, funcao):
+        if nome not in self._cache:
+            self._cache[nome] = funcao()
+        return self._cache[nome]
+
+    @property
+    def nulos(self):
+        return self._derivar('nulos', lambda: self.serie.isna().to_numpy())
+
+    @property
+    def preenchidos(self):
+        return self._derivar('preenchidos', lambda: self.serie[~self.nulos])
+
+    @property
+    def texto(self):
+        # object garante a semântica do módulo re em qualquer backend de string
+        return self._derivar('texto', lambda: self.preenchidos.astype(str).astype(object))
+
+    @property
+    def fatores(self):
+        """
+        (códigos, valores distintos) do texto: regex é avaliada só nos distintos.
+        """
+        return self._derivar('fatores', lambda: pd.factorize(self.texto))
+
+    @property
+    def numeros(self):
+        return self._derivar('numeros', lambda: pd.to_numeric(self.preenchidos, errors='coerce')
+                             .to_numpy(dtype='float64', na_value=np.nan))
+
+
+def _kernel_not_null(coluna, kwargs, bloco):
+    return coluna.nulos
+
+
+def _kernel_match_regex(coluna, kwargs, bloco):
+    padrao = re.compile(kwargs['regex'])
+    codigos, unicos = coluna.fatores
+    casou = pd.Series(unicos, dtype=object).str.contains(padrao, regex=True, na=False).to_numpy()
+    return ~casou[codigos]
+
+
+def _limites(coluna, kwargs):
+    minimo, maximo = kwargs.get('min_value'), kwargs.get('max_value')
+    serie = coluna.preenchidos
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return coluna.numeros, minimo, maximo
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        converter = lambda v: None if v is None else pd.Timestamp(v)
+        return serie.to_numpy(), converter(minimo), converter(maximo)
+    return serie.to_numpy(dtype=object), minimo, maximo
+
+
+def _kernel_between(coluna, kwargs, bloco):
+    valores, minimo, maximo = _limites(coluna, kwargs)
+    validos = np.ones(len(valores), dtype=bool)
+    if minimo is not None:
+        validos &= (valores > minimo) if kwargs.get('strict_min') else (valores >= minimo)
+    if maximo is not None:
+        validos &= (valores < maximo) if kwargs.get('strict_max') else (valores <= maximo)
+    return ~np.asarray(validos, dtype=bool)
+
+
+def _kernel_in_set(coluna, kwargs, bloco):
+    return ~coluna.preenchidos.isin(kwargs['value_set']).to_numpy()
+
+
+def _kernel_close(coluna, kwargs, bloco):
+    outras = kwargs['other']
+    referencia = np.ones(len(bloco))
+    for outra in [outras] if isinstance(outras, str) else outras:
+        referencia = referencia * pd.to_numeric(bloco[outra], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    referencia = referencia[~coluna.nulos]
+    tolerancia = kwargs.get('atol', 0.0) + kwargs.get('rtol', 0.0) * np.abs(referencia)
+    return ~(np.abs(coluna.numeros - referencia) <= tolerancia)
+
+
+def _kernel_in_key_index(coluna, kwargs, bloco):
+    return ~abrir_indice(kwargs['indice']).contem(coluna.preenchidos)
+
+
+# tipo -> (kernel, considera nulos como ausentes). Unicidade é tratada à parte
+# porque depende das contagens de valores do arquivo inteiro.
+KERNELS = {
+    'expect_column_values_to_not_be_null': (_kernel_not_null, False),
+    'expect_column_values_to_be_unique': (None, True),
+    'expect_column_values_to_match_regex': (_kernel_match_regex, True),
+    'expect_column_values_to_be_between': (_kernel_between, True),
+    'expect_column_values_to_be_in_set': (_kernel_in_set, True),
+    'expect_column_values_to_be_close': (_kernel_close, True),
+    'expect_column_values_to_be_in_key_index': (_kernel_in_key_index, True),
+}
+KWARGS_NAO_SUPORTADOS = ('row_condition',)
+
+
+def expectativa_suportada(config):
+    kwargs = config.get('kwargs', {})
+    return (config.get('expectation_type') in KERNELS
+            and not any(kwargs.get(chave) for chave in KWARGS_NAO_SUPORTADOS))
+
+
+class ValidadorNativo:
+    """
+    Acumula, bloco a bloco, o estado de todas as expectativas de uma suíte.
+    """
+
+    def __init__(self, suite, max_exemplos=MAX_EXEMPLOS):
+        self.suite = suite
+        self.max_exemplos = max_exemplos
+        self.expectativas = suite.get('expectations', [])
+        self.estados = [{'elementos': 0, 'ausentes': 0, 'inesperados': 0, 'exemplos': [], 'contagens': [],
+                         'erro': None} for _ in self.expectativas]
+
+    @property
+    def colunas(self):
+        colunas = set()
+        for config in self.expectativas:
+            kwargs = config.get('kwargs', {})
+            colunas.add(kwargs.get('column'))
+            if config.get('expectation_type') == 'expect_column_values_to_be_close':
+                outras = kwargs.get('other')
+                colunas.update([outras] if isinstance(outras, str) else outras or [])
+        colunas.discard(None)
+        return sorted(colunas)
+
+    def atualizar(self, bloco):
+        colunas = {}
+        for config, estado in zip(self.expectativas, self.estados):
+            if estado['erro'] is not None:
+                continue
+            try:
+                self._avaliar(config, estado, bloco, colunas)
+            except Exception as e:
+                estado['erro'] = repr(e)
+        return self
+
+    def _avaliar(self, config, estado, bloco, colunas):
+        tipo, kwargs = config['expectation_type'], config['kwargs']
+        if not expectativa_suportada(config):
+            raise ValueError(f"Expectativa não suportada pelo backend nativo: {tipo}")
+        nome = kwargs['column']
+        if nome not in colunas:
+            colunas[nome] = _Coluna(bloco[nome])
+        coluna = colunas[nome]
+        kernel, ignora_nulos = KERNELS[tipo]
+        estado['elementos'] += len(bloco)
+        if ignora_nulos:
+            estado['ausentes'] += int(coluna.nulos.sum())
+        if kernel is None:
+            estado['contagens'].append(coluna.preenchidos.value_counts(sort=False))
+            if len(estado['contagens']) > MAX_CONTAGENS_PARCIAIS:
+                estado['contagens'] = [_somar_contagens(estado['contagens'])]
+            return
+        inesperados = kernel(coluna, kwargs, bloco)
+        estado['inesperados'] += int(inesperados.sum())
+        faltam = self.max_exemplos - len(estado['exemplos'])
+        if faltam > 0:
+            valores = coluna.serie if not ignora_nulos else coluna.preenchidos
+            estado['exemplos'].extend(_valor_json(v) for v in valores[inesperados][:faltam].tolist())
+
+    def combinar(self, outro):
+        """
+        Soma ao estado deste validador o de outro validador da mesma suíte que
+        processou as linhas seguintes do arquivo.
+        """
+        for estado, parcial in zip(self.estados, outro.estados):
+            estado['erro'] = estado['erro'] or parcial['erro']
+            for chave in ('elementos', 'ausentes', 'inesperados'):
+                estado[chave] += parcial[chave]
+            faltam = self.max_exemplos - len(estado['exemplos'])
+            estado['exemplos'].extend(parcial['exemplos'][:max(faltam, 0)])
+            estado['contagens'].extend(parcial['contagens'])
+        return self
+
+    def _resultado_expectativa(self, config, estado):
+        kwargs = config.get('kwargs', {})
+        resultado = {
+            'success': False,
+            'expectation_config': {'expectation_type': config.get('expectation_type'), 'kwargs': kwargs,
+                                   'meta': config.get('meta', {})},
+            'result': {},
+            'meta': {},
+            'exception_info': {'raised_exception': estado['erro'] is not None,
+                               'exception_message': estado['erro'], 'exception_traceback': None},
+        }
+        if estado['erro'] is not None:
+            return resultado
+
+        inesperados, exemplos = estado['inesperados'], estado['exemplos']
+        if config['expectation_type'] == 'expect_column_values_to_be_unique':
+            contagens = _somar_contagens(estado['contagens'])
+            repetidos = contagens[contagens > 1]
+            inesperados = int(repetidos.sum())
+            exemplos = [_valor_json(v) for v in repetidos.index.repeat(repetidos.to_numpy())[:self.max_exemplos]]
+        elementos, ausentes = estado['elementos'], estado['ausentes']
+        considerados = elementos - ausentes
+        ignora_nulos = KERNELS[config['expectation_type']][1]
+
+        detalhes = {'element_count': elementos, 'unexpected_count': inesperados,
+                    'unexpected_percent': 100.0 * inesperados / considerados if considerados else None,
+                    'partial_unexpected_list': exemplos}
+        if ignora_nulos:
+            detalhes.update({
+                'missing_count': ausentes,
+                'missing_percent': 100.0 * ausentes / elementos if elementos else None,
+                'unexpected_percent_total': 100.0 * inesperados / elementos if elementos else None,
+                'unexpected_percent_nonmissing': 100.0 * inesperados / considerados if considerados else None,
+            })
+        mostly = kwargs.get('mostly')
+        mostly = 1.0 if mostly is None else mostly
+        # como no Great Expectations, sem linhas consideradas o sucesso é vacuamente verdadeiro
+        resultado['success'] = bool(not considerados or (considerados - inesperados) / considerados >= mostly)
+        resultado['result'] = detalhes
+        return resultado
+
+    def resultado(self):
+        resultados = [self._resultado_expectativa(config, estado)
+                      for config, estado in zip(self.expectativas, self.estados)]
+        sucessos = sum(r['success'] for r in resultados)
+        return {
+            'success': sucessos == len(resultados),
+            'results': resultados,
+            'statistics': {
+                'evaluated_expectations': len(resultados),
+                'successful_expectations': sucessos,
+                'unsuccessful_expectations': len(resultados) - sucessos,
+                'success_percent': 100.0 * sucessos / len(resultados) if resultados else None,
+            },
+            'evaluation_parameters': {},
+            'meta': {
+                'expectation_suite_name': self.suite.get('expectation_suite_name'),
+                'validation_time': datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%fZ'),
+                'backend': 'nativo',
+            },
+        }
+
+
+def validar_dataframe(df, suite):
+    return ValidadorNativo(suite).atualizar(df).resultado()
+
+
+def validar_arquivo(path, suite, chunksize=TAMANHO_BLOCO):
+    """
+    Valida um arquivo em blocos lendo apenas as colunas usadas pela suíte.
+    """
+    validador = ValidadorNativo(suite)
+    with etapa(f"validar_{suite.get('expectation_suite_name', 'suite')}"):
+        for bloco in ler_em_blocos(path, chunksize, colunas=validador.colunas or None):
+            contar('linhas_entrada', len(bloco))
+            validador.atualizar(bloco)
+        return validador.resultado()
+
+
+def validar_processados(datasets=('clientes', 'produtos', 'vendas'), diretorio='../data/quality'):
+    """
+    Valida os datasets corrigidos com as suítes salvas e grava cada resultado em
+    <diretorio>/validacao_<dataset>.json. Retorna {dataset: resultado}. Com
+    DATAOPS_BACKEND=sqlite a validação é executada no SQLite (backend_sql).
+    """
+    from armazenamento import caminho_processado
+    from backend_sql import BACKEND, validar_arquivo_sql
+
+    validar = validar_arquivo_sql if BACKEND == 'sqlite' else validar_arquivo
+
+    os.makedirs(diretorio, exist_ok=True)
+    resultados = {}
+    for dataset in datasets:
+        resultado = validar(caminho_processado(f"{dataset}_corrigido"), carregar_suite(f"{dataset}_suite"))
+        with open(os.path.join(diretorio, f'validacao_{dataset}.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        estatisticas = resultado['statistics']
+        logging.info(f"Suite {dataset}_suite: {estatisticas['successful_expectations']}/"
+                     f"{estatisticas['evaluated_expectations']} expectativas atendidas.")
+        resultados[dataset] = resultado
+    return resultados
+
+
+if __name__ == "__main__":
+    from configuracao_logs import configurar_logs
+
+    configurar_logs()
+    resultados = validar_processados()
+    sys.exit(0 if all(r['success'] for r in resultados.values()) else 1)
@@ -0,0 +1,158 @@
+"""
+Validação de schema vetorizada.
+
+Os schemas continuam declarados como dicionários {coluna: tipo} (int, float, str,
+bool ou 'data'). compilar_schema transforma cada declaração em uma verificação
+por coluna que olha primeiro o dtype inferido pelo pandas (custo O(1) quando o
+dtype já garante o tipo) e só então aplica um teste de coerção vetorizado nas
+colunas object/texto, sem chamar Python por célula.
+
+Colunas declaradas como str exigem texto, como o isinstance(x, str) original:
+uma coluna numérica, booleana ou de datas é inválida em todos os valores
+preenchidos, e uma coluna object mista aponta os valores que não são texto.
+Colunas 'data' aceitam o que o motor de datas (o mesmo da correção) interpreta.
+"""
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import ler_em_blocos
+from motor_datas import converter_datas
+
+MAX_EXEMPLOS = 5
+
+
+def _checar_inteiro(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.notna().to_numpy()
+    if pd.api.types.is_integer_dtype(serie):
+        return None
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+        return ~np.isnan(valores) & ~(np.isfinite(valores) & (valores == np.trunc(valores)))
+    numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    inteiros = np.isfinite(numeros) & (numeros == np.trunc(numeros))
+    return serie.notna().to_numpy() & ~inteiros
+
+
+def _checar_numero(serie):
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return None
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.notna().to_numpy()
+    numeros = pd.to_numeric(serie, errors='coerce')
+    return (serie.notna() & numeros.isna()).to_numpy()
+
+
+def _checar_booleano(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return None
+    texto = serie.astype(object).where(serie.notna()).astype(str).str.strip().str.lower()
+    validos = texto.isin(['true', 'false', '1', '0']) | serie.isna()
+    return ~validos.to_numpy()
+
+
+def _e_texto(valores):
+    return pd.api.types.infer_dtype(valores, skipna=True) in ('string', 'empty')
+
+
+def _checar_texto(serie):
+    if isinstance(serie.dtype, pd.StringDtype):
+        return None
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        if _e_texto(categorias):
+            return None
+        invalidas = np.flatnonzero([not isinstance(c, str) for c in categorias])
+        return np.isin(serie.cat.codes.to_numpy(), invalidas)
+    if not pd.api.types.is_object_dtype(serie):
+        return serie.notna().to_numpy()
+    if _e_texto(serie):
+        return None
+    # coluna mista: só neste caso os valores são testados um a um
+    return serie.map(lambda valor: not isinstance(valor, str), na_action='ignore').fillna(False).to_numpy(dtype=bool)
+
+
+def _checar_data(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return None
+    return (serie.notna() & converter_datas(serie).isna()).to_numpy()
+
+
+VERIFICACOES = {
+    int: _checar_inteiro,
+    float: _checar_numero,
+    str: _checar_texto,
+    bool: _checar_booleano,
+    'data': _checar_data,
+}
+
+
+def compilar_schema(schema):
+    """
+    Converte {coluna: tipo} em uma lista de (coluna, nome_do_tipo, verificacao).
+    """
+    compilado = []
+    for coluna, tipo in schema.items():
+        if tipo not in VERIFICACOES:
+            raise ValueError(f"Tipo não suportado no schema para a coluna '{coluna}': {tipo!r}")
+        nome_tipo = tipo if isinstance(tipo, str) else tipo.__name__
+        compilado.append((coluna, nome_tipo, VERIFICACOES[tipo]))
+    return compilado
+
+
+class ValidadorSchema:
+    """
+    Aplica um schema compilado a um DataFrame inteiro ou bloco a bloco,
+    acumulando a contagem de violações e os primeiros índices de linha inválidos
+    de cada coluna (com deslocamento global quando usado em blocos).
+    """
+
+    def __init__(self, schema, max_exemplos=MAX_EXEMPLOS):
+        self.compilado = compilar_schema(schema)
+        self.max_exemplos = max_exemplos
+        self.ausentes = []
+        self.contagens = {}
+        self.exemplos = {}
+        self.linhas = 0
+
+    def validar(self, df):
+        if self.linhas == 0:
+            self.ausentes = [coluna for coluna, _, _ in self.compilado if coluna not in df.columns]
+        for coluna, _, verificar in self.compilado:
+            if coluna not in df.columns:
+                continue
+            invalidos = verificar(df[coluna])
+            if invalidos is None or not invalidos.any():
+                continue
+            posicoes = np.flatnonzero(invalidos)
+            self.contagens[coluna] = self.contagens.get(coluna, 0) + len(posicoes)
+            exemplos = self.exemplos.setdefault(coluna, [])
+            faltam = self.max_exemplos - len(exemplos)
+            if faltam > 0:
+                exemplos.extend(int(self.linhas + p) for p in posicoes[:faltam])
+        self.linhas += len(df)
+        return self
+
+    def erros(self):
+        erros = [f'Coluna ausente: {coluna}' for coluna in self.ausentes]
+        tipos = {coluna: nome_tipo for coluna, nome_tipo, _ in self.compilado}
+        for coluna, total in self.contagens.items():
+            erros.append(f'Tipo incorreto na coluna: {coluna} (esperado {tipos[coluna]}; {total} valores; '
+                         f'primeiras linhas: {self.exemplos[coluna]})')
+        return erros
+
+
+def validar_dataframe(df, schema, max_exemplos=MAX_EXEMPLOS):
+    return ValidadorSchema(schema, max_exemplos).validar(df).erros()
+
+
+def ler_validando(caminho, validador, chunksize, tipos=None):
+    """
+    Lê caminho em blocos (tipos é o dtype= da leitura de CSV) validando cada
+    bloco durante a leitura. Os erros acumulados ficam em validador.erros() ao
+    final da iteração.
+    """
+    for bloco in ler_em_blocos(caminho, chunksize, dtype=tipos):
+        validador.validar(bloco)
+        yield bloco
@@ -0,0 +1,6 @@
+import os
+import sys
+
+DIRETORIO_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if DIRETORIO_SRC not in sys.path:
+    sys.path.insert(0, DIRETORIO_SRC)
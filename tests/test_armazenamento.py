@@ -0,0 +1,94 @@
+"""
+Escrita em blocos com promoção de esquema (EscritorTabela).
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from armazenamento import (EscritorTabela, anexar_tabela, ler_em_blocos, ler_intervalo, ler_tabela,  # noqa: E402
+                           lotes_csv, partes_tabela, salvar_tabela)
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_coluna_nula_no_primeiro_bloco(tmp_path, formato):
+    caminho = str(tmp_path / f"t.{formato}")
+    with EscritorTabela(caminho) as escritor:
+        escritor.escrever(pd.DataFrame({"id": [1, 2], "obs": [None, None]}))
+        escritor.escrever(pd.DataFrame({"id": [3, 4], "obs": ["a", None]}))
+    df = ler_tabela(caminho)
+    assert df["id"].tolist() == [1, 2, 3, 4]
+    assert df["obs"].isna().tolist() == [True, True, False, True]
+    assert df.loc[2, "obs"] == "a"
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_int_seguido_de_float(tmp_path, formato):
+    caminho = str(tmp_path / f"t.{formato}")
+    with EscritorTabela(caminho) as escritor:
+        escritor.escrever(pd.DataFrame({"valor": [1, 2]}))
+        escritor.escrever(pd.DataFrame({"valor": [3.5, 4.0]}))
+        escritor.escrever(pd.DataFrame({"valor": [5, 6]}))
+    df = ler_tabela(caminho)
+    assert df["valor"].dtype == "float64"
+    assert df["valor"].tolist() == [1.0, 2.0, 3.5, 4.0, 5.0, 6.0]
+
+
+def test_tipos_incompativeis_continuam_erro(tmp_path):
+    import pyarrow as pa
+
+    with pytest.raises((pa.ArrowTypeError, pa.ArrowInvalid)):
+        with EscritorTabela(str(tmp_path / "t.parquet")) as escritor:
+            escritor.escrever(pd.DataFrame({"valor": [1]}))
+            escritor.escrever(pd.DataFrame({"valor": ["a"]}))
+
+
+@pytest.mark.parametrize("final", ["\n", ""])
+@pytest.mark.parametrize("linhas_por_lote", [1, 2, 3, 10])
+def test_lotes_csv_cobrem_o_arquivo(tmp_path, final, linhas_por_lote):
+    caminho = tmp_path / "t.csv"
+    caminho.write_text('id,obs\n1,"a\nb"\n2,""""\n3,x\n4,"c,\nd"\n5,y' + final)
+    lotes = lotes_csv(str(caminho), linhas_por_lote)
+    # leituras de poucos bytes cruzam aspas e quebras de linha entre os pedaços
+    assert lotes_csv(str(caminho), linhas_por_lote, tamanho_leitura=3) == lotes
+    assert lotes[-1][1] == 5
+    partes = [ler_intervalo(str(caminho), inicio, fim, deslocamento=deslocamento)
+              for inicio, fim, deslocamento in lotes]
+    assert [len(parte) for parte in partes] == [fim - inicio for inicio, fim, _ in lotes]
+    pd.testing.assert_frame_equal(pd.concat(partes, ignore_index=True), ler_tabela(str(caminho)))
+
+
+def test_lotes_csv_sem_linhas(tmp_path):
+    caminho = tmp_path / "t.csv"
+    caminho.write_text("id,obs\n")
+    (lote,) = lotes_csv(str(caminho), 10)
+    assert lote[:2] == (0, 0)
+    assert list(ler_intervalo(str(caminho), 0, 0, colunas=["obs"], deslocamento=lote[2]).columns) == ["obs"]
+
+
+def test_parquet_ignora_coluna_ausente_com_linhas(tmp_path):
+    caminho = str(tmp_path / 'tabela.parquet')
+    pd.DataFrame({'id': [1, 2, 3]}).to_parquet(caminho, index=False)
+    blocos = list(ler_em_blocos(caminho, 2, colunas=['id', 'nao_existe']))
+    assert [bloco['id'].tolist() for bloco in blocos] == [[1, 2], [3]]
+    assert ler_intervalo(caminho, 1, 3, colunas=['id', 'nao_existe'])['id'].tolist() == [2, 3]
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_primeira_parte_vazia_nao_esconde_as_seguintes(tmp_path, formato):
+    caminho = str(tmp_path / f"t.{formato}")
+    salvar_tabela(pd.DataFrame({"id": pd.Series([], dtype="int64")}), caminho)
+    anexar_tabela(pd.DataFrame({"id": [1, 2, 3]}), caminho)
+    assert os.path.basename(partes_tabela(caminho)[0]) == f"parte-000000.{formato}"
+    assert pd.concat(ler_em_blocos(caminho, 2))["id"].tolist() == [1, 2, 3]
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_tabela_sem_linhas_produz_um_bloco_vazio(tmp_path, formato):
+    caminho = str(tmp_path / f"t.{formato}")
+    salvar_tabela(pd.DataFrame({"id": pd.Series([], dtype="int64"), "nome": pd.Series([], dtype=object)}), caminho)
+    blocos = list(ler_em_blocos(caminho, 2, colunas=["id"]))
+    assert len(blocos) == 1 and blocos[0].columns.tolist() == ["id"] and blocos[0].empty
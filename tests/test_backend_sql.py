@@ -0,0 +1,45 @@
+"""
+Backend SQLite: uma tabela por caminho e carga dentro da transação de quem a usa.
+"""
+
+import backend_sql
+from backend_sql import conectar, garantir_tabela, nome_tabela, transacao
+
+
+def _csv(caminho, texto):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(texto)
+    return str(caminho)
+
+
+def test_arquivos_com_mesmo_nome_nao_dividem_a_tabela(tmp_path, monkeypatch):
+    bruto = _csv(tmp_path / 'raw' / 'clientes.csv', 'id_cliente\n1\n2\n')
+    processado = _csv(tmp_path / 'processed' / 'clientes.csv', 'id_cliente\n3\n')
+    assert nome_tabela(bruto) != nome_tabela(processado)
+    assert nome_tabela(bruto).startswith('clientes_')
+
+    cargas = []
+    ler_em_blocos = backend_sql.ler_em_blocos
+    monkeypatch.setattr(backend_sql, 'ler_em_blocos', lambda caminho, *a, **k: cargas.append(caminho) or
+                        ler_em_blocos(caminho, *a, **k))
+    conexao = conectar(str(tmp_path / 'banco.sqlite'))
+    try:
+        for _ in range(2):
+            tabelas = [garantir_tabela(conexao, caminho) for caminho in (bruto, processado)]
+        assert cargas == [bruto, processado]
+        assert [conexao.execute(f'SELECT COUNT(*) FROM "{tabela}"').fetchone()[0] for tabela in tabelas] == [2, 1]
+    finally:
+        conexao.close()
+
+
+def test_garantir_tabela_usa_a_transacao_aberta(tmp_path):
+    origem = _csv(tmp_path / 'vendas.csv', 'id_venda\n1\n')
+    conexao = conectar(str(tmp_path / 'banco.sqlite'))
+    try:
+        with transacao(conexao):
+            garantir_tabela(conexao, origem)
+            # a trava continua com esta conexão até o fim do uso da tabela
+            assert conexao.in_transaction
+        assert not conexao.in_transaction
+    finally:
+        conexao.close()
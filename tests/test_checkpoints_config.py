@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+import backend_sql
+import checkpoints_config
+
+
+def test_checkpoint_sqlite_valida_a_tabela_do_banco(tmp_path, monkeypatch):
+    gx = pytest.importorskip("great_expectations")
+    pytest.importorskip("sqlalchemy")
+    from great_expectations.core import ExpectationConfiguration
+
+    (tmp_path / "src").mkdir()
+    (tmp_path / "data" / "datasets").mkdir(parents=True)
+    (tmp_path / "data" / "processed").mkdir()
+    monkeypatch.chdir(tmp_path / "src")
+    pd.DataFrame({'id_cliente': [1, 2, 3], 'nome': ['a', 'b', None]}).to_csv(
+        '../data/datasets/clientes.csv', index=False)
+    monkeypatch.setattr(backend_sql, 'BACKEND', 'sqlite')
+    monkeypatch.setattr(checkpoints_config, 'DATASETS', ('clientes',))
+
+    context = gx.get_context(project_root_dir=str(tmp_path))
+    suite = context.add_or_update_expectation_suite(expectation_suite_name='clientes_suite')
+    suite.add_expectation(ExpectationConfiguration('expect_column_values_to_not_be_null', {'column': 'nome'}))
+    context.save_expectation_suite(suite)
+
+    checkpoints_config.registrar_checkpoints_ge(context)
+    checkpoint = context.get_checkpoint('checkpoint_clientes')
+    assert checkpoint.config.validations[0]['batch_request']['datasource_name'] == 'sqlite_datasource'
+    assert checkpoint.config.validations[0]['batch_request']['data_asset_name'] == \
+        backend_sql.nome_tabela('../data/datasets/clientes.csv')
+
+    resultado = context.run_checkpoint('checkpoint_clientes')
+    validacao, = resultado.list_validation_results()
+    assert validacao.results[0].result['unexpected_count'] == 1
+    assert not resultado.success
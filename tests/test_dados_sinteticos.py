@@ -0,0 +1,21 @@
+"""
+Taxas de defeitos parciais nos geradores de dados sintéticos.
+"""
+
+import pandas as pd
+
+from dados_sinteticos import TAXAS_DEFEITOS, gerar_dataset, linhas_por_dataset, taxas_do_dataset
+
+
+def test_taxa_parcial_mantem_as_demais():
+    taxas = taxas_do_dataset('clientes', {'email_invalido': 0.5})
+    assert taxas == {**TAXAS_DEFEITOS['clientes'], 'email_invalido': 0.5}
+
+
+def test_gerar_dataset_com_taxa_parcial(tmp_path):
+    linhas = linhas_por_dataset(1000)
+    caminho = str(tmp_path / 'clientes.csv')
+    gerar_dataset('clientes', caminho, linhas, taxas={'clientes': {'email_vazio': 1.0}})
+    df = pd.read_csv(caminho)
+    assert len(df) >= linhas['clientes']
+    assert df['email'].isna().all()
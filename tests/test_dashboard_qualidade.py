@@ -0,0 +1,62 @@
+"""
+Data Docs incrementais: só os resultados novos são lidos do validations store.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+
+@pytest.fixture
+def contexto(tmp_path, monkeypatch):
+    gx = pytest.importorskip("great_expectations")
+    # data_docs_estado.json fica em ../data/quality, relativo ao diretório atual
+    (tmp_path / 'src').mkdir()
+    monkeypatch.chdir(tmp_path / 'src')
+    return gx.get_context(project_root_dir=str(tmp_path / 'src'))
+
+
+def _validar(context, dia):
+    from great_expectations.core import ExpectationSuiteValidationResult
+    from great_expectations.core.run_identifier import RunIdentifier
+    from great_expectations.data_context.types.resource_identifiers import (ExpectationSuiteIdentifier,
+                                                                            ValidationResultIdentifier)
+
+    run_id = RunIdentifier(run_name=f"execucao_{dia}", run_time=datetime(2024, 1, dia, tzinfo=timezone.utc))
+    chave = ValidationResultIdentifier(ExpectationSuiteIdentifier('vendas_suite'), run_id, f'lote_{dia}')
+    resultado = ExpectationSuiteValidationResult(
+        success=dia % 2 == 0, results=[], statistics={},
+        meta={'expectation_suite_name': 'vendas_suite', 'run_id': run_id,
+              'batch_kwargs': {'data_asset_name': 'vendas'}})
+    context.validations_store.set(chave, resultado)
+
+
+def _contar_leituras(context, monkeypatch):
+    leituras = []
+    store = context.validations_store
+    ler = store.get
+    monkeypatch.setattr(store, 'get', lambda chave, *a, **k: leituras.append(chave) or ler(chave, *a, **k))
+    return leituras
+
+
+def test_geracao_incremental_le_so_as_validacoes_novas(contexto, monkeypatch):
+    from dashboard_qualidade import gerar_data_docs
+
+    for dia in range(1, 6):
+        _validar(contexto, dia)
+    gerar_data_docs(contexto, incremental=True)
+
+    leituras = _contar_leituras(contexto, monkeypatch)
+    for novas, dias in ((1, [6]), (2, [7, 8])):
+        leituras.clear()
+        for dia in dias:
+            _validar(contexto, dia)
+        gerar_data_docs(contexto, incremental=True)
+        # a página e a entrada do índice de cada validação nova; nada do histórico
+        assert {chave.batch_identifier for chave in leituras} == {f'lote_{dia}' for dia in dias}
+        assert len(leituras) <= 2 * novas
+
+    indice = (contexto.root_directory + '/uncommitted/data_docs/local_site/index.html')
+    with open(indice, encoding='utf-8') as arquivo:
+        pagina = arquivo.read()
+    assert all(f'execucao_{dia}' in pagina for dia in range(1, 9))
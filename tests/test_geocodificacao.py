@@ -0,0 +1,38 @@
+"""
+Cache em disco do índice de municípios: gerações gravadas de forma atômica.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from geocodificacao import IndiceMunicipios, _chaves
+
+GAZETTEER = pd.DataFrame({'cidade': ['São Paulo', 'Rio de Janeiro'], 'estado': ['SP', 'RJ'],
+                          'latitude': [-23.55, -22.91], 'longitude': [-46.63, -43.17]})
+
+
+def test_regravar_troca_a_geracao_inteira(tmp_path):
+    diretorio, origem = str(tmp_path / 'geo'), {'caminho': 'municipios.csv', 'tamanho': 1, 'mtime_ns': 1}
+    indice = IndiceMunicipios.construir(GAZETTEER)
+    indice.salvar(diretorio, origem)
+    aberto = IndiceMunicipios.abrir(diretorio, origem)
+    indice.salvar(diretorio, origem)
+    with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as arquivo:
+        geracao = json.load(arquivo)['geracao']
+    # só os arrays da geração do meta.json ficam; o índice já aberto segue válido
+    assert sorted(os.listdir(diretorio)) == sorted(
+        [f"{nome}.{geracao}.npy" for nome in ('hashes', 'posicoes', 'coordenadas')] + ['meta.json'])
+    assert aberto.coordenadas[1].tolist() == [-22.91, -43.17]
+    chaves = _chaves(GAZETTEER['cidade'], GAZETTEER['estado'])
+    assert IndiceMunicipios.abrir(diretorio, origem).buscar(chaves).tolist() == [0, 1]
+
+
+def test_geracao_ausente_reconstroi(tmp_path):
+    diretorio, origem = str(tmp_path / 'geo'), {'caminho': 'municipios.csv', 'tamanho': 1, 'mtime_ns': 1}
+    IndiceMunicipios.construir(GAZETTEER).salvar(diretorio, origem)
+    for nome in os.listdir(diretorio):
+        if nome.startswith('posicoes.'):
+            os.remove(os.path.join(diretorio, nome))
+    assert IndiceMunicipios.abrir(diretorio, origem) is None
@@ -0,0 +1,134 @@
+"""
+Processamento incremental: só o delta é lido e a saída cresce em partes.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import incremental  # noqa: E402
+from armazenamento import ler_tabela, partes_tabela  # noqa: E402
+
+
+def _escrever(caminho, linhas, modo='w'):
+    with open(caminho, modo, encoding='utf-8') as arquivo:
+        if modo == 'w':
+            arquivo.write('id,valor\n')
+        else:
+            arquivo.write('\n')
+        arquivo.write('\n'.join(f'{i},{i * 10}' for i in linhas))  # sem '\n' no fim, como os CSVs de origem
+
+
+@pytest.fixture
+def area(tmp_path, monkeypatch):
+    # o estado fica em ../data/quality/incremental, relativo ao diretório atual
+    (tmp_path / 'src').mkdir()
+    monkeypatch.chdir(tmp_path / 'src')
+    return tmp_path
+
+
+def _processar(etapa, entrada, saida):
+    return incremental.processar_incremental(etapa, str(entrada), str(saida), 'id', ['id'], lambda df: df)
+
+
+def _proibir_leitura_completa(monkeypatch):
+    def falhar(*args, **kwargs):
+        raise AssertionError(f"leitura completa de {args[0]}")
+    monkeypatch.setattr(incremental, 'ler_em_blocos', falhar)
+
+
+def test_segunda_execucao_le_apenas_o_delta(area, monkeypatch):
+    origem, saida, corrigido = area / 'origem.csv', area / 'saida.parquet', area / 'corrigido.parquet'
+    _escrever(origem, range(1, 6))
+    assert _processar('ingestao', origem, saida) == 5
+    assert _processar('correcao', saida, corrigido) == 5
+
+    _escrever(origem, range(6, 9), modo='a')
+    # nem a entrada inteira nem as chaves da saída podem ser relidas
+    original = incremental.ler_em_blocos
+    _proibir_leitura_completa(monkeypatch)
+    assert _processar('ingestao', origem, saida) == 3
+    # a correção lê só a parte nova da saída da ingestão
+    monkeypatch.setattr(incremental, 'ler_em_blocos',
+                        lambda caminho, *a, **k: original(caminho, *a, **k) if 'parte-000001' in caminho
+                        else pytest.fail(f"leitura de {caminho}"))
+    assert _processar('correcao', saida, corrigido) == 3
+
+    assert len(partes_tabela(str(saida))) == 2
+    assert ler_tabela(str(saida))['id'].tolist() == list(range(1, 9))
+    assert ler_tabela(str(corrigido))['valor'].tolist() == [i * 10 for i in range(1, 9)]
+
+
+def test_ultima_linha_sem_quebra_nao_duplica(area):
+    origem, saida = area / 'origem.csv', area / 'saida.parquet'
+    _escrever(origem, range(1, 4))
+    _processar('ingestao', origem, saida)
+    _escrever(origem, [4], modo='a')
+    _processar('ingestao', origem, saida)
+    _escrever(origem, [5], modo='a')
+    _processar('ingestao', origem, saida)
+    assert ler_tabela(str(saida))['id'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_saida_regravada_reconstroi_chaves(area):
+    origem, saida = area / 'origem.csv', area / 'saida.parquet'
+    _escrever(origem, range(1, 4))
+    _processar('ingestao', origem, saida)
+    # execução completa regrava a saída com linhas que o estado não conhece
+    pd.DataFrame({'id': [1, 2, 3, 4], 'valor': [10, 20, 30, 40]}).to_parquet(saida, index=False)
+    _escrever(origem, [4, 5], modo='a')
+    _processar('ingestao', origem, saida)
+    assert sorted(ler_tabela(str(saida))['id'].tolist()) == [1, 2, 3, 4, 5]
+    assert not os.path.exists(str(saida) + '.convertendo')
+
+
+def test_particoes_novas_anexadas_em_uma_parte(area, monkeypatch):
+    (area / 'landing').mkdir()
+    particoes = {}
+    for rotulo, linhas in (('2024-01.csv', [1, 2]), ('2024-02.csv', [3])):
+        particoes[rotulo] = str(area / 'landing' / rotulo)
+        _escrever(particoes[rotulo], linhas)
+    saida = area / 'saida.parquet'
+
+    def processar():
+        return incremental.processar_incremental_particoes('ingestao', particoes, str(saida), 'id', ['id'],
+                                                           lambda df: df, 'particao')
+
+    assert processar() == 3
+    _escrever(particoes['2024-02.csv'], [4], modo='a')
+    for rotulo, linhas in (('2024-03.csv', [6, 7]), ('2023-12.csv', [5])):
+        particoes[rotulo] = str(area / 'landing' / rotulo)
+        _escrever(particoes[rotulo], linhas)
+    # a partição sem alteração não é lida; uma atrasada (ids menores) não é perdida
+    lidas = []
+    ler_delta = incremental._ler_delta
+    monkeypatch.setattr(incremental, '_ler_delta',
+                        lambda caminho, *a, **k: lidas.append(caminho) or ler_delta(caminho, *a, **k))
+    assert processar() == 4
+    assert particoes['2024-01.csv'] not in lidas
+    assert len(partes_tabela(str(saida))) == 2
+    df = ler_tabela(str(saida))
+    assert df['id'].tolist() == [1, 2, 3, 4, 6, 7, 5]
+    assert df['particao'].astype(str).tolist() == (['2024-01.csv'] * 2 + ['2024-02.csv'] * 2
+                                                   + ['2024-03.csv'] * 2 + ['2023-12.csv'])
+    assert processar() == 0
+
+
+def test_particoes_sem_linhas_criam_saida_com_o_esquema(area):
+    (area / 'landing').mkdir()
+    particao = area / 'landing' / 'a.csv'
+    particao.write_text('id,valor\n')
+    saida = area / 'saida.parquet'
+
+    def processar():
+        return incremental.processar_incremental_particoes('ingestao', {'a.csv': str(particao)}, str(saida), 'id',
+                                                           ['id'], lambda df: df, 'particao')
+
+    assert processar() == 0
+    assert ler_tabela(str(saida)).columns.tolist() == ['id', 'valor', 'particao']
+    _escrever(particao, [1, 2])
+    assert processar() == 2
+    assert ler_tabela(str(saida))['id'].tolist() == [1, 2]
@@ -0,0 +1,56 @@
+"""
+Índice de chaves de dimensão: nome por origem, chaves inteiras e conferência da origem.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indice_chaves import abrir_indice, caminho_indice, indice_chaves
+
+
+def _csv(caminho, texto):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(texto)
+    return str(caminho)
+
+
+def test_origens_com_mesmo_nome_nao_colidem(tmp_path):
+    bruto = _csv(tmp_path / 'raw' / 'clientes.csv', 'id_cliente\n1\n2\n')
+    processado = _csv(tmp_path / 'processed' / 'clientes.csv', 'id_cliente\n3\n')
+    cache = str(tmp_path / 'cache')
+    assert caminho_indice(bruto, 'id_cliente', cache) != caminho_indice(processado, 'id_cliente', cache)
+    assert indice_chaves(bruto, 'id_cliente', cache).contem(pd.Series([1, 3])).tolist() == [True, False]
+    assert indice_chaves(processado, 'id_cliente', cache).contem(pd.Series([1, 3])).tolist() == [False, True]
+
+
+def test_ids_inteiros_guardam_as_proprias_chaves(tmp_path):
+    origem = _csv(tmp_path / 'vendas.csv', 'id_venda,status\n5,a\n3,b\n,c\n5,d\n')
+    indice = indice_chaves(origem, 'id_venda', str(tmp_path / 'cache'))
+    assert indice.chaves.dtype == np.int64
+    assert indice.chaves.tolist() == [3, 5]
+    consulta = pd.Series([3, 4, None, 5.0, 5.5], dtype='float64')
+    assert indice.contem(consulta).tolist() == consulta.isin([5, 3, np.nan]).tolist()
+    assert indice.contem(pd.Series([3, None], dtype='Int32')).tolist() == [True, True]
+
+
+def test_chaves_de_texto_usam_hashes(tmp_path):
+    origem = _csv(tmp_path / 'produtos.csv', 'sku\nA-1\nB-2\n')
+    indice = indice_chaves(origem, 'sku', str(tmp_path / 'cache'))
+    assert indice.chaves.dtype == np.uint64
+    assert indice.contem(pd.Series(['B-2', 'C-3'])).tolist() == [True, False]
+
+
+def test_abrir_indice_reconstroi_quando_a_origem_muda(tmp_path):
+    origem = tmp_path / 'clientes.csv'
+    _csv(origem, 'id_cliente\n1\n')
+    arquivo = caminho_indice(str(origem), 'id_cliente', str(tmp_path / 'cache'))
+    indice_chaves(str(origem), 'id_cliente', str(tmp_path / 'cache'))
+    origem.write_text('id_cliente\n1\n2\n')
+    os.utime(origem, ns=(0, 10**9))
+    assert abrir_indice(arquivo).contem(pd.Series([2])).tolist() == [True]
+    origem.unlink()
+    with pytest.raises(ValueError):
+        abrir_indice(arquivo)
@@ -0,0 +1,50 @@
+"""
+Pico de memória por etapa sem zerar o pico do processo.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import instrumentacao
+from instrumentacao import etapa, memoria_atual_mb
+
+pytestmark = pytest.mark.skipif(memoria_atual_mb() is None, reason="requer /proc/self/status")
+
+
+@pytest.fixture
+def registros(tmp_path, monkeypatch):
+    arquivo = tmp_path / 'metricas.jsonl'
+    monkeypatch.setattr(instrumentacao, 'ARQUIVO_METRICAS', str(arquivo))
+    return lambda: {r['etapa']: r for r in map(json.loads, arquivo.read_text().splitlines())}
+
+
+def _alocar(mb):
+    bloco = np.ones(mb * 2**20 // 8)
+    return float(bloco.sum())
+
+
+def test_etapa_nao_zera_o_pico_do_processo(registros):
+    import resource
+
+    _alocar(300)
+    antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with etapa('pequena'):
+        _alocar(1)
+    assert resource.getrusage(resource.RUSAGE_SELF).ru_maxrss >= antes
+
+
+def test_pico_por_etapa(registros):
+    _alocar(400)
+    with etapa('externa'):
+        with etapa('pequena'):
+            _alocar(1)
+        with etapa('grande'):
+            _alocar(600)
+    medidas = registros()
+    base = memoria_atual_mb()
+    # a etapa pequena não herda o pico de 400 MB anterior a ela
+    assert medidas['pequena']['pico_memoria_mb'] < base + 200
+    assert medidas['grande']['pico_memoria_mb'] >= base + 500
+    assert medidas['externa']['pico_memoria_mb'] >= medidas['grande']['pico_memoria_mb']
@@ -0,0 +1,66 @@
+"""
+Paridade do motor vetorizado com as funções escalares de correcao_automatica.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_series_equal
+
+from correcao_automatica import padronizar_email, padronizar_telefone
+from limpeza_vetorizada import limitar_minimo, padronizar_emails, padronizar_telefones
+
+
+def test_emails_iguais_ao_escalar():
+    serie = pd.Series(["  Ana@Exemplo.COM ", np.nan, None, "", "JOSE@X.com", "\tÉdson@Y.BR\n"], name="email")
+    assert_series_equal(padronizar_emails(serie), serie.apply(padronizar_email))
+
+
+def test_email_nulo_vira_vazio():
+    assert padronizar_emails(pd.Series([np.nan, None])).tolist() == ["", ""]
+
+
+@pytest.mark.parametrize("telefone", [
+    "(11) 98765-4321",   # 11 dígitos
+    "9876-5432",         # completa com zeros à esquerda
+    "+55 (11) 98765-4321",  # trunca em 11
+    "123456789012345",
+    "sem numero",
+    "",
+    11987654321,
+    1.5,
+])
+def test_telefones_iguais_ao_escalar(telefone):
+    serie = pd.Series([telefone, np.nan], name="telefone", dtype=object)
+    assert_series_equal(padronizar_telefones(serie), serie.apply(padronizar_telefone))
+
+
+def test_telefone_zfill_e_truncamento():
+    serie = pd.Series(["9876-5432", "+55 (11) 98765-4321", np.nan])
+    assert padronizar_telefones(serie).tolist() == ["00098765432", "55119876543", ""]
+
+
+@pytest.mark.parametrize("valores, minimo, tipo", [
+    ([10.5, -3.0, 0.0, 7.25], 0, float),
+    ([-0.0, 2.0, -1.0], 0, float),
+    ([np.nan, -1.0, 3.0], 0, float),
+    ([5, -2, 0, 9], 0, int),
+    ([0, 3, -1], 1, int),
+    ([-1.0, -2.5, -0.5], 0, float),  # todos abaixo do mínimo
+    ([-4, 0, -1], 1, int),
+])
+def test_limitar_minimo_igual_ao_max(valores, minimo, tipo):
+    serie = pd.Series(valores, name="valor")
+    esperado = serie.apply(lambda x: max(tipo(x), minimo))
+    obtido = limitar_minimo(serie, minimo, tipo)
+    assert_series_equal(obtido, esperado)
+    # assert_series_equal não distingue -0.0 de 0.0
+    if tipo is float:
+        assert np.array_equal(np.signbit(obtido.to_numpy(dtype=float)), np.signbit(esperado.to_numpy(dtype=float)))
+
+
+def test_limitar_minimo_preserva_zero_negativo_e_nan():
+    obtido = limitar_minimo(pd.Series([-0.0, np.nan, -1.0]), 0, float)
+    assert np.signbit(obtido[0])
+    assert np.isnan(obtido[1])
+    assert obtido[2] == 0
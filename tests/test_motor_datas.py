@@ -0,0 +1,82 @@
+"""
+Motor de datas vetorizado contra as funções escalares originais
+(padronizar_data, calcular_idade e calcular_tempo_entrega).
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import enriquecimento_dados
+from correcao_automatica import padronizar_data
+from enriquecimento_dados import calcular_idade, calcular_tempo_entrega
+from motor_datas import calcular_idades, calcular_tempos_entrega, formatar_datas
+
+HOJE = datetime(2024, 6, 15, 12, 0)
+
+CASOS = {
+    'iso': ['2023-01-10', '1985-03-15', '2023-01-10'],
+    'com_horario': ['2023-01-10 08:30:00', '2023-01-10T23:59:59', '2023/02/01'],
+    'malformadas': ['31/02/2023', 'abc', '2023-13-01', '10/03/2023', '2023-02-30', ' '],
+    'com_fuso': ['2023-03-01T10:00:00+03:00', '2023-03-01 23:30:00-05:00', '2023-03-01T00:00:00Z'],
+    'nulas': [None, np.nan, '', '2023-01-10'],
+    'futuras': ['2099-01-01', '2024-06-16', '2024-06-15', '2024-12-31'],
+    'mistas': ['2023-01-10', pd.Timestamp('2020-02-29'), datetime(2001, 6, 15), 20230110, None],
+}
+
+
+class _Relogio(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return HOJE
+
+
+@pytest.fixture
+def hoje_fixo(monkeypatch):
+    monkeypatch.setattr(enriquecimento_dados, 'datetime', _Relogio)
+
+
+def _serie(valores):
+    return pd.Series(valores, dtype=object)
+
+
+@pytest.mark.parametrize('caso', CASOS)
+def test_formatar_datas(caso):
+    serie = _serie(CASOS[caso])
+    esperado = serie.apply(padronizar_data)
+    assert formatar_datas(serie).tolist() == esperado.tolist()
+
+
+def test_formatar_datas_coluna_datetime():
+    serie = pd.Series(pd.to_datetime(['2023-01-10', None, '1999-12-31']))
+    assert formatar_datas(serie).tolist() == serie.apply(padronizar_data).tolist()
+
+
+@pytest.mark.parametrize('caso', CASOS)
+def test_calcular_idades(caso, hoje_fixo):
+    serie = _serie(CASOS[caso])
+    esperado = serie.apply(calcular_idade)
+    assert calcular_idades(serie, hoje=HOJE).tolist() == esperado.tolist()
+
+
+ENTREGAS = {
+    'iso': (['2023-03-01', '2023-03-02'], ['2023-03-04', '2023-03-02']),
+    'antes_do_envio': (['2023-03-10'], ['2023-03-01']),
+    'malformadas': (['2023-03-01', 'abc'], ['31/02/2023', '2023-03-05']),
+    'nulas': (['2023-03-01', None], [None, '2023-03-05']),
+    'com_fuso': (['2023-03-01T00:00:00+05:00', '2023-03-01T10:00:00+03:00'],
+                 ['2023-03-02T00:00:00-05:00', '2023-03-03T09:00:00+03:00']),
+    'futuras': (['2099-01-01'], ['2099-01-31']),
+}
+
+
+@pytest.mark.parametrize('caso', ENTREGAS)
+def test_calcular_tempos_entrega(caso):
+    envio, entrega = (_serie(valores) for valores in ENTREGAS[caso])
+    esperado = pd.Series([calcular_tempo_entrega(a, b) for a, b in zip(envio, entrega)], dtype=object)
+    obtido = calcular_tempos_entrega(envio, entrega)
+    assert [None if pd.isna(v) else int(v) for v in obtido] == [None if pd.isna(v) else int(v) for v in esperado]
+    # o apply devolve int quando todas as datas são válidas e float com nulos
+    assert obtido.dtype == ('int64' if esperado.notna().all() else 'float64')
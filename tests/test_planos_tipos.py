@@ -0,0 +1,28 @@
+"""
+Planos de tipos aplicados já na leitura (tipos_leitura / carregar_tabela).
+"""
+
+import pandas as pd
+
+from carregador import carregar_tabela
+from planos_tipos import PLANOS, TEXTO, tipos_leitura
+
+
+def test_tipos_leitura_so_texto_categorias_e_datas():
+    tipos = tipos_leitura(PLANOS['produtos'])
+    assert tipos == {'nome_produto': TEXTO, 'categoria': 'category', 'data_criacao': 'str'}
+
+
+def test_csv_lido_com_o_plano(tmp_path):
+    caminho = tmp_path / 'clientes.csv'
+    caminho.write_text(
+        'id_cliente,nome,email,telefone,data_nascimento,cidade,estado,data_cadastro\n'
+        '1,Ana,ana@x.com,01199887766,1985-03-15,São Paulo,SP,2023-01-10\n'
+        '2,Bia,,,1990-07-22,Rio de Janeiro,RJ,2023-01-15\n'
+    )
+    df = carregar_tabela(str(caminho), dtypes=PLANOS['clientes'], cache_disco=False)
+    # lido como texto, o telefone mantém o zero à esquerda
+    assert df['telefone'].tolist()[0] == '01199887766'
+    assert isinstance(df['estado'].dtype, pd.CategoricalDtype)
+    assert str(df['id_cliente'].dtype) == 'Int32'
+    assert pd.api.types.is_datetime64_any_dtype(df['data_cadastro'])
@@ -0,0 +1,109 @@
+"""
+Backend nativo de validação: kernels e paridade com o Great Expectations.
+
+Os testes de paridade constroem as suítes com as funções de
+great_expectations_setup a partir dos datasets de exemplo e validam os mesmos
+DataFrames com get_validator e com ValidadorNativo; só rodam com o Great
+Expectations instalado.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from validacao_nativa import ValidadorNativo, validar_dataframe
+
+DATASETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'notebooks', 'datasets')
+
+
+def _suite(*expectativas):
+    return {'expectation_suite_name': 'teste', 'expectations': [
+        {'expectation_type': tipo, 'kwargs': kwargs} for tipo, kwargs in expectativas]}
+
+
+def test_be_close_multiplica_as_colunas_de_other():
+    df = pd.DataFrame({'quantidade': [2, 1, 3, 1], 'valor_unitario': [10.0, 5.0, 1.0, None],
+                       'valor_total': [20.0, 5.5, 3.0, 4.0]})
+    suite = _suite(('expect_column_values_to_be_close',
+                    {'column': 'valor_total', 'other': ['quantidade', 'valor_unitario'], 'atol': 1e-2}))
+    resultado = validar_dataframe(df, suite)['results'][0]
+    assert resultado['exception_info']['raised_exception'] is False
+    # 5.5 != 5.0 e a referência nula (valor_unitario ausente) são inesperados
+    assert resultado['result']['unexpected_count'] == 2
+    assert resultado['result']['partial_unexpected_list'] == [5.5, 4.0]
+
+
+def test_validador_combinado_igual_ao_inteiro():
+    df = pd.DataFrame({'id': [1, 2, 2, None, 5, 6], 'status': ['a', 'b', 'x', 'a', None, 'b']})
+    suite = _suite(('expect_column_values_to_be_unique', {'column': 'id'}),
+                   ('expect_column_values_to_be_in_set', {'column': 'status', 'value_set': ['a', 'b']}))
+    inteiro = ValidadorNativo(suite).atualizar(df).resultado()
+    partes = ValidadorNativo(suite).atualizar(df.iloc[:3]).combinar(ValidadorNativo(suite).atualizar(df.iloc[3:]))
+    for esperado, obtido in zip(inteiro['results'], partes.resultado()['results']):
+        assert esperado['result'] == obtido['result']
+        assert esperado['success'] == obtido['success']
+
+
+@pytest.fixture
+def contexto_ge(tmp_path, monkeypatch):
+    gx = pytest.importorskip("great_expectations")
+    pytest.importorskip("expectativas_customizadas")
+    from great_expectations_setup import ensure_pandas_datasource
+
+    # índices de chaves (../data/cache/chaves) e o contexto efêmero ficam em tmp_path
+    (tmp_path / 'src').mkdir()
+    monkeypatch.chdir(tmp_path / 'src')
+    context = gx.get_context()
+    assert ensure_pandas_datasource(context)
+    return context
+
+
+def _paridade(context, suite_name, df):
+    from great_expectations_setup import obter_validator
+
+    validator = obter_validator(context, df, f"{suite_name}_paridade", suite_name)
+    esperado = validator.validate().to_json_dict()
+    suite = context.get_expectation_suite(suite_name).to_json_dict()
+    obtido = validar_dataframe(df, suite)
+    assert len(esperado['results']) == len(obtido['results']) == len(suite['expectations'])
+    for ge_res in esperado['results']:
+        config = ge_res['expectation_config']
+        nativo = next(r for r in obtido['results']
+                      if r['expectation_config']['expectation_type'] == config['expectation_type']
+                      and r['expectation_config']['kwargs'].get('column') == config['kwargs'].get('column'))
+        contexto = (config['expectation_type'], config['kwargs'].get('column'))
+        assert not ge_res['exception_info']['raised_exception'], (contexto, ge_res['exception_info'])
+        assert nativo['success'] == ge_res['success'], contexto
+        for chave in ('element_count', 'unexpected_count', 'unexpected_percent'):
+            a, b = ge_res['result'].get(chave), nativo['result'].get(chave)
+            assert (a is None and b is None) or np.isclose(a, b), (contexto, chave, a, b)
+
+
+def test_paridade_ge_clientes_e_produtos(contexto_ge):
+    from carregador import carregar_tabela
+    from great_expectations_setup import create_expectation_suite_for_clientes, create_expectation_suite_for_produtos
+
+    for nome, criar in (('clientes', create_expectation_suite_for_clientes),
+                        ('produtos', create_expectation_suite_for_produtos)):
+        caminho = os.path.join(DATASETS, f'{nome}.csv')
+        criar(contexto_ge, caminho, suite_name=f'{nome}_suite')
+        _paridade(contexto_ge, f'{nome}_suite', carregar_tabela(caminho))
+
+
+def test_paridade_ge_vendas_e_logistica(contexto_ge):
+    from carregador import carregar_tabela
+    from great_expectations_setup import create_expectation_suite_for_logistica, create_expectation_suite_for_vendas
+
+    clientes, produtos, vendas, logistica = (os.path.join(DATASETS, f'{nome}.csv')
+                                             for nome in ('clientes', 'produtos', 'vendas', 'logistica'))
+    create_expectation_suite_for_vendas(contexto_ge, vendas, path_clientes_csv=clientes, path_produtos_csv=produtos,
+                                        suite_name='vendas_suite')
+    suite = contexto_ge.get_expectation_suite('vendas_suite').to_json_dict()
+    close = next(e for e in suite['expectations'] if e['expectation_type'] == 'expect_column_values_to_be_close')
+    assert close['kwargs']['other'] == ['quantidade', 'valor_unitario']
+    _paridade(contexto_ge, 'vendas_suite', carregar_tabela(vendas))
+
+    create_expectation_suite_for_logistica(contexto_ge, logistica, path_vendas_csv=vendas, suite_name='logistica_suite')
+    _paridade(contexto_ge, 'logistica_suite', carregar_tabela(logistica))
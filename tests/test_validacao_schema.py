@@ -0,0 +1,38 @@
+"""
+Verificações de tipo do ValidadorSchema para colunas str e 'data'.
+"""
+
+import pandas as pd
+
+from validacao_schema import validar_dataframe
+
+
+def test_str_aceita_texto():
+    df = pd.DataFrame({'nome': pd.Series(['a', None, 'c'], dtype='str'),
+                       'estado': pd.Categorical(['SP', 'RJ', None])})
+    assert validar_dataframe(df, {'nome': str, 'estado': str}) == []
+
+
+def test_str_rejeita_coluna_numerica():
+    df = pd.DataFrame({'telefone': [11999887766, 11888776655, None]})
+    erros = validar_dataframe(df, {'telefone': str})
+    assert len(erros) == 1
+    assert 'telefone' in erros[0] and '2 valores' in erros[0]
+
+
+def test_str_aponta_valores_nao_texto_em_coluna_mista():
+    df = pd.DataFrame({'nome': pd.Series(['a', 5, None, 'd', True], dtype=object)})
+    erros = validar_dataframe(df, {'nome': str})
+    assert erros == ['Tipo incorreto na coluna: nome (esperado str; 2 valores; primeiras linhas: [1, 4])']
+
+
+def test_str_rejeita_categorias_nao_texto():
+    df = pd.DataFrame({'codigo': pd.Categorical(['a', 1, 'a', None], categories=['a', 1])})
+    erros = validar_dataframe(df, {'codigo': str})
+    assert erros == ['Tipo incorreto na coluna: codigo (esperado str; 1 valores; primeiras linhas: [1])']
+
+
+def test_data_rejeita_valores_malformados():
+    df = pd.DataFrame({'data_venda': ['2024-01-10', 'ontem', None, '2024-02-30']})
+    erros = validar_dataframe(df, {'data_venda': 'data'})
+    assert erros == ['Tipo incorreto na coluna: data_venda (esperado data; 2 valores; primeiras linhas: [1, 3])']